@@ -0,0 +1,87 @@
+"""
+Benchmark `papyri.gen.DFSCollector` on a synthetic package of increasing size.
+
+Usage::
+
+    $ python benchmarks/bench_collector.py [real.package ...]
+
+For each size this prints the number of collected objects, the total time and
+the time per object; with a linear-time collector the last column should stay
+roughly constant as the package grows. Any extra argument is imported and
+collected as well, along with the per-submodule statistics of the collector.
+"""
+
+import sys
+import time
+from types import ModuleType
+
+from papyri.gen import DFSCollector
+
+
+class Unhashable:
+    """
+    Objects with an arbitrary `__eq__`, like numpy arrays.
+    """
+
+    __hash__ = None
+
+    def __init__(self, module, qualname):
+        self.__module__ = module
+        self.__qualname__ = qualname
+
+    def __eq__(self, other):
+        raise ValueError("ambiguous truth value")
+
+
+def make_package(name, n_modules, n_items):
+    """
+    Build and register in sys.modules a package with ``n_modules`` submodules
+    each containing ``n_items`` functions, ``n_items`` classes and a constant.
+    """
+    root = ModuleType(name)
+    sys.modules[name] = root
+    for m in range(n_modules):
+        mod_name = f"{name}.sub{m}"
+        mod = ModuleType(mod_name)
+        sys.modules[mod_name] = mod
+        setattr(root, f"sub{m}", mod)
+        for i in range(n_items):
+            ns = {"__name__": mod_name}
+            exec(f"def func{i}(x):\n    '''doc'''\n    return x\n", ns)
+            exec(
+                f"class Class{i}:\n    '''doc'''\n    def meth(self):\n        pass\n",
+                ns,
+            )
+            setattr(mod, f"func{i}", ns[f"func{i}"])
+            setattr(mod, f"Class{i}", ns[f"Class{i}"])
+            # re-exports in the root create aliases
+            setattr(root, f"func{m}_{i}", ns[f"func{i}"])
+        mod.constant = Unhashable(mod_name, "constant")
+    return root
+
+
+def bench(root, others=()):
+    collector = DFSCollector(root, list(others))
+    now = time.perf_counter()
+    items = collector.items()
+    delta = time.perf_counter() - now
+    return collector, len(items), delta
+
+
+def main(argv):
+    print(f"{'modules':>8} {'objects':>9} {'time (s)':>10} {'us/object':>10}")
+    for i, n_modules in enumerate([10, 20, 40, 80, 160]):
+        root = make_package(f"papyri_bench_{i}", n_modules, 50)
+        _, n, delta = bench(root)
+        print(f"{n_modules:>8} {n:>9} {delta:>10.3f} {delta / n * 1e6:>10.2f}")
+
+    for name in argv:
+        root = __import__(name)
+        collector, n, delta = bench(root)
+        print(f"{name}: {n} objects in {delta:.3f}s")
+        for sub, count, duration in collector.stats()[:20]:
+            print(f"    {sub:<50} {count:>6} {duration:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -169,8 +169,7 @@ Directive must not have spaces before double colon.
 
 import io
 import sys
-import zipfile
-from functools import lru_cache
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import List, Optional
 
@@ -243,13 +242,13 @@ def ingest(
     dummy_progress: bool = typer.Option(False, help="Disable rich progress bar"),
 ):
     """
-    Given paths to a docbundle folder, ingest it into the known libraries.
+    Given paths to a docbundle folder or zip file, ingest it into the known libraries.
 
     Parameters
     ----------
     paths : List of Path
-        list of paths (directories) to ingest. Maybe later we want to support zipped bundled but it's the not the case
-        yet.
+        list of paths (directories or zip files) to ingest, zip files are
+        read without being extracted.
     relink : bool
         after ingesting all the path, should we rescan the whole library to find new crosslinks ?
     """
@@ -273,7 +272,6 @@ def install(
     """
 
     from io import BytesIO
-    from tempfile import TemporaryDirectory
 
     import httpx
     import rich
@@ -281,6 +279,7 @@ def install(
     from rich.console import Console
 
     from . import crosslink as cr
+    from .bundle import read_bundle
 
     console = Console()
 
@@ -350,14 +349,7 @@ def install(
     for (name, version), data in datas.items():
         if data is not None:
             # print("Downloaded", name, version, len(data) // 1024, "kb")
-            zf = zipfile.ZipFile(io.BytesIO(data), "r")
-            with TemporaryDirectory() as d:
-                zf.extractall(d)
-                cr.main(
-                    next(iter([x for x in Path(d).iterdir() if x.is_dir()])),
-                    check,
-                    dummy_progress=dummy_progress,
-                )
+            cr.main(read_bundle(io.BytesIO(data)), check, dummy_progress=dummy_progress)
         else:
             print(f"Could not find docs for {name}=={version}")
     cr.relink()
@@ -390,6 +382,62 @@ def gen(
     examples: bool = True,
     narative: bool = True,
     fail: bool = typer.Option(False, help="Fail on first error"),
+    jobs: int = typer.Option(
+        1, help="Number of worker processes used to process the API items."
+    ),
+    incremental: bool = typer.Option(
+        False,
+        help="Reuse items unchanged since the previous bundle for this version.",
+    ),
+    zip: bool = typer.Option(
+        False, help="Write the bundle as a single zip file instead of a folder."
+    ),
+    report: Optional[str] = typer.Option(
+        None,
+        help="Write a JSON report of the time spent in each phase to this file; "
+        "with several packages, to <file>.<package>.json for each of them.",
+    ),
+    report_top: int = typer.Option(
+        10, help="Number of slowest objects listed per phase in the report."
+    ),
+    resume: bool = typer.Option(
+        False,
+        help="Resume an interrupted run, skipping the objects it already completed.",
+    ),
+    static: bool = typer.Option(
+        False,
+        help="Collect the API from the source, without importing the package; "
+        "examples are not executed.",
+    ),
+    force_exec: bool = typer.Option(
+        False,
+        help="Execute all the examples, ignoring the results cached by previous "
+        "runs.",
+    ),
+    shard: Optional[str] = typer.Option(
+        None,
+        help="Only generate the part i/n of the package, to a partial bundle; "
+        "combine the n partial bundles with merge-bundles.",
+    ),
+    only: Optional[str] = typer.Option(
+        None,
+        help="Only regenerate the objects whose name or alias match this glob "
+        "pattern, like 'numpy.linspace' or 'numpy.fft.*', or the narrative docs "
+        "and gallery examples matching 'docs/<path>' and 'examples/<name>', and "
+        "update the existing bundle in place.",
+    ),
+    watch: bool = typer.Option(
+        False,
+        help="Keep running, and regenerate and ingest the objects and pages "
+        "affected by each change to the sources; a running papyri serve shows "
+        "them on reload.",
+    ),
+    max_memory: Optional[int] = typer.Option(
+        None,
+        help="Memory limit in MB of each gen process: past it, documents and "
+        "figures held in memory are moved to disk and caches are dropped. The "
+        "peak memory of each phase is in the --report.",
+    ),
 ):
     """
     Generate documentation for a given package.
@@ -397,23 +445,75 @@ def gen(
     First item should be the root package to import, if subpackages need to be
     analyzed  but are not accessible from the root pass them as extra arguments.
 
+    Several configuration files can be given to generate several packages in
+    one process, sharing imports, caches and worker processes; list the
+    dependencies first so that references to them are resolved directly.
     """
     _intro()
-    from papyri.gen import gen_main
-
-    for file in files:
-        gen_main(
-            infer=infer,
-            exec_=exec,
-            target_file=file,
-            debug=debug,
-            dummy_progress=dummy_progress,
-            dry_run=dry_run,
-            api=api,
-            examples=examples,
-            fail=fail,
-            narative=narative,
+    from papyri.bundle import parse_shard
+    from papyri.gen import gen_batch
+
+    try:
+        shard_ = parse_shard(shard) if shard is not None else None
+    except ValueError as e:
+        sys.exit(str(e))
+    if watch:
+        if len(files) != 1 or zip or dry_run or shard or only:
+            sys.exit(
+                "--watch needs a single configuration file, and can't be used "
+                "with --zip, --dry-run, --shard or --only"
+            )
+        from papyri.watch import watch as watch_
+
+        run = partial(watch_, files[0])
+    else:
+        run = partial(gen_batch, files)
+    run(
+        infer=infer,
+        exec_=exec,
+        debug=debug,
+        dummy_progress=dummy_progress,
+        dry_run=dry_run,
+        api=api,
+        examples=examples,
+        fail=fail,
+        narative=narative,
+        jobs=jobs,
+        incremental=incremental,
+        zip_=zip,
+        report=report,
+        report_top=report_top,
+        resume=resume,
+        static=static,
+        force_exec=force_exec,
+        shard=shard_,
+        only=only,
+        max_memory=max_memory,
+    )
+
+
+@app.command()
+def merge_bundles(
+    bundles: List[str],
+    output: Optional[str] = typer.Option(
+        None,
+        help="Path of the merged bundle, <module>_<version> next to the first "
+        "partial bundle by default; a zip file if it ends with .zip.",
+    ),
+):
+    """
+    Combine the partial bundles written by gen --shard into a single bundle.
+    """
+    from papyri.bundle import merge_bundles as merge
+
+    try:
+        where = merge(
+            [Path(b).expanduser() for b in bundles],
+            Path(output).expanduser() if output is not None else None,
         )
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Merged {len(bundles)} bundles into {where}")
 
 
 @app.command()
@@ -0,0 +1,527 @@
+"""
+Writing of docbundles.
+
+A docbundle is written incrementally: each document and asset is flushed to
+disk as soon as it is produced, so the memory used by `papyri gen` does not
+grow with the size of the package.
+
+Everything is written to a staging folder next to the target, ``papyri.json``
+is written last and marks the bundle as complete; the staging folder then
+replaces the previous bundle. A crash during generation thus leaves the
+previous bundle untouched, and a folder without ``papyri.json`` is never a
+valid bundle.
+
+The manifest entries of completed objects are journaled in the staging
+folder, in ``checkpoint.jsonl``; an interrupted run can then be resumed, see
+``papyri gen --resume``.
+
+Bundles can also be written as a single zip file, with the same layout as the
+folder under a ``<module>_<version>/`` prefix. Zip files have a central index,
+so `ZipBundle` reads single documents without extracting the archive, and
+`Ingester.ingest` accepts either kind of bundle through `read_bundle`.
+
+A package can also be generated on several machines with ``papyri gen
+--shard i/n``: each shard processes the API objects, narrative docs and
+gallery examples whose manifest key hashes into its slot (see `in_shard`), and
+writes a partial bundle next to the full one (see `shard_path`). ``papyri
+merge-bundles`` combines the partial bundles with `merge_bundles` into the
+bundle a single run would have written.
+
+Finally ``papyri gen --only <pattern>`` regenerates a few objects and writes
+them in place in the existing bundle folder with a `BundlePatcher`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+
+class BundleWriter:
+    """
+    Stream a docbundle to ``where``.
+
+    Parameters
+    ----------
+    where : Path
+        final location of the bundle, typically
+        ``~/.papyri/data/<module>_<version>``.
+    resume : bool
+        keep the staging folder left over by an interrupted run, instead of
+        starting from scratch; the entries it completed are in `completed`.
+
+    Attributes
+    ----------
+    completed : dict
+        manifest entries journaled by the interrupted run, when resuming.
+    """
+
+    def __init__(self, where: Path, resume: bool = False):
+        self.where = where
+        self.staging = where.with_name(where.name + ".partial")
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        journal = self.staging / "checkpoint.jsonl"
+        if resume and journal.exists():
+            for line in journal.read_text().splitlines():
+                try:
+                    key, entry = json.loads(line)
+                except ValueError:
+                    # last line truncated by the interruption.
+                    continue
+                self.completed[key] = entry
+        elif self.staging.exists():
+            # left over by an interrupted run.
+            shutil.rmtree(self.staging)
+        for sub in ["module", "docs", "examples", "assets"]:
+            (self.staging / sub).mkdir(parents=True, exist_ok=True)
+        self._journal = journal.open("a")
+
+    def record(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Journal the manifest entry of a completed object, once its documents
+        and assets are written.
+        """
+        self._journal.write(json.dumps([key, entry]) + "\n")
+        self._journal.flush()
+
+    def put_module(self, name: str, data: str) -> None:
+        """
+        Write the json of an API object, ``name`` is ``<qualname>.json``.
+        """
+        (self.staging / "module" / name).write_text(data)
+
+    def put_doc(self, parts: Tuple[str, ...], data: str) -> None:
+        """
+        Write the json of a narrative doc, ``parts`` is the path of the source
+        file relative to the documentation folder.
+        """
+        path = self.staging.joinpath("docs", *parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(data)
+
+    def put_example(self, name: str, data: str) -> None:
+        """
+        Write the json of a gallery example.
+        """
+        (self.staging / "examples" / name).write_text(data)
+
+    def put_asset(self, name: str, data: bytes) -> None:
+        """
+        Write a binary asset, like a figure or the logo.
+        """
+        (self.staging / "assets" / name).write_bytes(data)
+
+    def put_meta(self, name: str, data: str) -> None:
+        """
+        Write a file at the top level of the bundle, like ``symbols.json``.
+        """
+        (self.staging / name).write_text(data)
+
+    def commit(self, manifest: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+        """
+        Write ``manifest.json`` and ``papyri.json``, and replace the bundle at
+        ``where`` with the staging folder.
+        """
+        self._journal.close()
+        (self.staging / "checkpoint.jsonl").unlink()
+        self.put_meta("manifest.json", json.dumps(manifest, indent=2, sort_keys=True))
+        self.put_meta("papyri.json", json.dumps(metadata, indent=2, sort_keys=True))
+
+        old = self.where.with_name(self.where.name + ".old")
+        if old.exists():
+            shutil.rmtree(old)
+        if self.where.exists():
+            self.where.rename(old)
+        self.staging.rename(self.where)
+        if old.exists():
+            shutil.rmtree(old)
+
+    def abort(self) -> None:
+        """
+        Remove the staging folder.
+        """
+        self._journal.close()
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+class ZipBundleWriter:
+    """
+    Stream a docbundle to the zip file ``where``.
+
+    Same interface as `BundleWriter`, the archive is written to
+    ``<where>.partial`` and moved in place by `commit`, once the index of the
+    archive is written. An archive without its index can't be appended to, so
+    interrupted runs can't be resumed: ``resume`` is accepted for
+    compatibility, and `completed` is always empty.
+
+    Parameters
+    ----------
+    where : Path
+        final location of the bundle, typically
+        ``~/.papyri/data/<module>_<version>.zip``.
+    """
+
+    def __init__(self, where: Path, resume: bool = False):
+        assert where.name.endswith(".zip"), where
+        self.where = where
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.staging = where.with_name(where.name + ".partial")
+        self._prefix = where.name[: -len(".zip")] + "/"
+        where.parent.mkdir(parents=True, exist_ok=True)
+        self._zf = zipfile.ZipFile(self.staging, "w", zipfile.ZIP_DEFLATED)
+
+    def _write(self, member: str, data: Union[str, bytes]) -> None:
+        self._zf.writestr(self._prefix + member, data)
+
+    def record(self, key: str, entry: Dict[str, Any]) -> None:
+        pass
+
+    def put_module(self, name: str, data: str) -> None:
+        self._write("module/" + name, data)
+
+    def put_doc(self, parts: Tuple[str, ...], data: str) -> None:
+        self._write("/".join(("docs",) + tuple(parts)), data)
+
+    def put_example(self, name: str, data: str) -> None:
+        self._write("examples/" + name, data)
+
+    def put_asset(self, name: str, data: bytes) -> None:
+        # already compressed, deflate would only cost time.
+        self._zf.writestr(
+            self._prefix + "assets/" + name, data, compress_type=zipfile.ZIP_STORED
+        )
+
+    def put_meta(self, name: str, data: str) -> None:
+        self._write(name, data)
+
+    def commit(self, manifest: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+        self.put_meta("manifest.json", json.dumps(manifest, indent=2, sort_keys=True))
+        self.put_meta("papyri.json", json.dumps(metadata, indent=2, sort_keys=True))
+        self._zf.close()
+        os.replace(self.staging, self.where)
+
+    def abort(self) -> None:
+        self._zf.close()
+        self.staging.unlink()
+
+
+def _replace(path: Path, data: Union[str, bytes]) -> None:
+    # the bundle may be read while it is patched, e.g. by papyri serve.
+    tmp = path.with_name(".tmp-" + path.name)
+    if isinstance(data, str):
+        tmp.write_text(data)
+    else:
+        tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class BundlePatcher:
+    """
+    Update some entries of an existing docbundle folder in place.
+
+    Same interface as `BundleWriter`, but documents and assets are written
+    directly to ``where``, each file atomically replacing the previous one.
+    The manifest and ``papyri.json`` are updated by `commit`.
+
+    Parameters
+    ----------
+    where : Path
+        an existing bundle folder.
+    patched : callable
+        called with manifest keys on `commit`, the entries of the previous
+        manifest for which it is true are replaced by the new ones, or removed
+        if there is no new one.
+    """
+
+    def __init__(self, where: Path, patched: Callable[[str], bool]):
+        if not (where / "papyri.json").exists():
+            raise FileNotFoundError(f"No bundle to patch at {where}")
+        self.where = where
+        self.staging = where
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.patched = patched
+        for sub in ["module", "docs", "examples", "assets"]:
+            (where / sub).mkdir(exist_ok=True)
+
+    def record(self, key: str, entry: Dict[str, Any]) -> None:
+        pass
+
+    def put_module(self, name: str, data: str) -> None:
+        _replace(self.where / "module" / name, data)
+
+    def put_doc(self, parts: Tuple[str, ...], data: str) -> None:
+        path = self.where.joinpath("docs", *parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _replace(path, data)
+
+    def put_example(self, name: str, data: str) -> None:
+        _replace(self.where / "examples" / name, data)
+
+    def put_asset(self, name: str, data: bytes) -> None:
+        if not (self.where / "assets" / name).exists():
+            _replace(self.where / "assets" / name, data)
+
+    def put_meta(self, name: str, data: str) -> None:
+        _replace(self.where / name, data)
+
+    def commit(self, manifest: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+        """
+        Merge ``manifest`` into the manifest of the bundle, remove the patched
+        entries that are gone and the figures only they used, and update
+        ``papyri.json`` with ``metadata``.
+
+        The ``assets`` of ``papyri.json`` are those of the merged manifest, so
+        that it is the same as if the whole bundle had been regenerated.
+        """
+        previous = json.loads((self.where / "manifest.json").read_text())
+        merged = {k: v for k, v in previous.items() if not self.patched(k)}
+        merged.update(manifest)
+        for key in previous.keys() - merged.keys():
+            if key.startswith(("docs/", "examples/")):
+                path = self.where / key
+            else:
+                path = self.where / "module" / (key + ".json")
+            path.unlink(missing_ok=True)
+        assets = {
+            name: stored
+            for entry in merged.values()
+            for name, stored in entry["assets"].items()
+        }
+        used = set(assets.values())
+        for entry in previous.values():
+            for stored in entry["assets"].values():
+                if stored not in used:
+                    (self.where / "assets" / stored).unlink(missing_ok=True)
+
+        meta = json.loads((self.where / "papyri.json").read_text())
+        meta.update(metadata)
+        if "assets" in meta:
+            meta["assets"] = assets
+        self.put_meta("manifest.json", json.dumps(merged, indent=2, sort_keys=True))
+        self.put_meta("papyri.json", json.dumps(meta, indent=2, sort_keys=True))
+
+    def abort(self) -> None:
+        pass
+
+
+def bundle_writer(
+    where: Path, resume: bool = False
+) -> Union[BundleWriter, ZipBundleWriter]:
+    """
+    Return a writer for a bundle at ``where``, a zip file if the name ends
+    with ``.zip``, a folder otherwise.
+    """
+    if where.name.endswith(".zip"):
+        return ZipBundleWriter(where, resume=resume)
+    return BundleWriter(where, resume=resume)
+
+
+class DirBundle:
+    """
+    Read access to a docbundle folder.
+
+    Members are designated by their path relative to the bundle, using forward
+    slashes, like ``module/numpy.linspace.json``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.name
+
+    def exists(self, member: str) -> bool:
+        return (self.path / member).exists()
+
+    def read_bytes(self, member: str) -> bytes:
+        return (self.path / member).read_bytes()
+
+    def read_text(self, member: str) -> str:
+        return (self.path / member).read_text()
+
+    def listdir(self, folder: str) -> List[str]:
+        """
+        Names of the files directly in ``folder``.
+        """
+        return sorted(p.name for p in (self.path / folder).glob("*") if p.is_file())
+
+
+class ZipBundle:
+    """
+    Read access to a zipped docbundle, see `DirBundle`.
+
+    Parameters
+    ----------
+    file : Path or file-like
+        the zip file; the bundle can be at the top level of the archive, or
+        in a single top level folder.
+    """
+
+    def __init__(self, file):
+        self._zf = zipfile.ZipFile(file, "r")
+        markers = [
+            PurePosixPath(n)
+            for n in self._zf.namelist()
+            if PurePosixPath(n).name == "papyri.json"
+        ]
+        if not markers:
+            raise ValueError(f"{file} is not a complete docbundle, no papyri.json")
+        parent = min(markers, key=lambda m: len(m.parts)).parent
+        self._prefix = "" if str(parent) == "." else str(parent) + "/"
+        if self._prefix:
+            self.name = parent.name
+        else:
+            self.name = Path(getattr(file, "name", "bundle.zip")).stem
+        self._members = set(self._zf.namelist())
+
+    def exists(self, member: str) -> bool:
+        return self._prefix + member in self._members
+
+    def read_bytes(self, member: str) -> bytes:
+        return self._zf.read(self._prefix + member)
+
+    def read_text(self, member: str) -> str:
+        return self.read_bytes(member).decode()
+
+    def listdir(self, folder: str) -> List[str]:
+        start = self._prefix + folder.rstrip("/") + "/"
+        return sorted(
+            m[len(start) :]
+            for m in self._members
+            if m.startswith(start) and "/" not in m[len(start) :] and m != start
+        )
+
+
+def read_bundle(source) -> Union[DirBundle, ZipBundle]:
+    """
+    Open a docbundle for reading.
+
+    Parameters
+    ----------
+    source : Path, file-like, DirBundle or ZipBundle
+        a bundle folder, a zip file, or an already opened bundle which is
+        returned as is.
+    """
+    if isinstance(source, (DirBundle, ZipBundle)):
+        return source
+    if isinstance(source, (str, Path)):
+        source = Path(source)
+        if source.is_dir():
+            return DirBundle(source)
+    return ZipBundle(source)
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a ``i/n`` shard specification, with ``0 <= i < n``.
+    """
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}, expected i/n like 0/4") from None
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard {spec!r}, expected 0 <= i < n")
+    return index, count
+
+
+def in_shard(key: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """
+    Whether the manifest entry ``key`` – a qualname, ``docs/<path>`` or
+    ``examples/<name>`` – is generated by ``shard``, an ``(index, count)``
+    tuple; every key is in the ``None`` shard.
+
+    The partition only depends on the key, so that all the shards agree on it
+    whatever the order in which objects are collected.
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    return int(hashlib.sha256(key.encode()).hexdigest(), 16) % count == index
+
+
+def shard_path(where: Path, shard: Optional[Tuple[int, int]]) -> Path:
+    """
+    Location of the partial bundle of ``shard`` for the bundle at ``where``,
+    like ``numpy_1.26-shard0of4`` or ``numpy_1.26-shard0of4.zip``.
+    """
+    if shard is None:
+        return where
+    suffix = "-shard{}of{}".format(*shard)
+    if where.name.endswith(".zip"):
+        return where.with_name(where.name[: -len(".zip")] + suffix + ".zip")
+    return where.with_name(where.name + suffix)
+
+
+def merge_bundles(sources: Sequence[Any], where: Optional[Path] = None) -> Path:
+    """
+    Combine the partial bundles written by ``papyri gen --shard`` into one.
+
+    Parameters
+    ----------
+    sources : sequence
+        the partial bundles, folders or zip files, one per shard.
+    where : Path, optional
+        location of the merged bundle, ``<module>_<version>`` next to the first
+        partial bundle by default; a zip file if the name ends with ``.zip``.
+
+    Returns
+    -------
+    The location of the merged bundle.
+
+    Raises
+    ------
+    ValueError
+        if the partial bundles are not all the shards of the same generation.
+    """
+    bundles = [read_bundle(s) for s in sources]
+    metas = [json.loads(b.read_text("papyri.json")) for b in bundles]
+    shards = [tuple(m.get("shard", ())) for m in metas]
+    if not shards or any(len(s) != 2 for s in shards):
+        raise ValueError("Can only merge partial bundles written by gen --shard")
+    count = shards[0][1]
+    if sorted(shards) != [(i, count) for i in range(count)]:
+        raise ValueError(f"Expected shards 0/{count} to {count - 1}/{count}: {shards}")
+    metadata = {k: v for k, v in metas[0].items() if k != "shard"}
+    for bundle, meta in zip(bundles, metas):
+        for k, v in meta.items():
+            if k == "assets":
+                metadata[k] = dict(metadata.get(k, {}), **v)
+            elif k != "shard" and metadata.get(k) != v:
+                raise ValueError(f"{bundle.name} has a different {k} than the others")
+
+    if where is None:
+        if "module" not in metadata:
+            raise ValueError("The partial bundles have no API, give the output path")
+        first = Path(sources[0])
+        name = metadata["module"] + "_" + metadata["version"]
+        where = first.with_name(name + (".zip" if first.suffix == ".zip" else ""))
+    writer = bundle_writer(where)
+    manifest: Dict[str, Dict[str, Any]] = {}
+    assets: Set[str] = set()
+    try:
+        for bundle in bundles:
+            part = json.loads(bundle.read_text("manifest.json"))
+            for name in bundle.listdir("module"):
+                writer.put_module(name, bundle.read_text("module/" + name))
+            for name in bundle.listdir("examples"):
+                writer.put_example(name, bundle.read_text("examples/" + name))
+            # the logo is in every shard, and figures are content addressed.
+            for name in sorted(set(bundle.listdir("assets")) - assets):
+                assets.add(name)
+                writer.put_asset(name, bundle.read_bytes("assets/" + name))
+            for key in part:
+                if key.startswith("docs/"):
+                    parts = tuple(key.split("/")[1:])
+                    writer.put_doc(parts, bundle.read_text(key))
+            manifest.update(part)
+        # all the shards collect the whole package, they have the same symbols.
+        if bundles[0].exists("symbols.json"):
+            writer.put_meta("symbols.json", bundles[0].read_text("symbols.json"))
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit(manifest, metadata)
+    return where
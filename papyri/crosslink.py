@@ -6,14 +6,16 @@ import logging
 import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, FrozenSet, List, Optional, Tuple
+from typing import Collection, Dict, FrozenSet, List, Optional, Tuple, Union
 
 from rich.logging import RichHandler
 from there import print
 
+from .bundle import DirBundle, ZipBundle, read_bundle
 from .config import ingest_dir
 from .gen import DocBlob, normalise_ref
 from .graphstore import GraphStore, Key
+from .symbols import SymbolTable
 from .take2 import Node, Param, RefInfo, Section, SeeAlsoItem
 from .tree import DVR, DirectiveVisiter, resolve_
 from .utils import progress
@@ -383,9 +385,37 @@ class Ingester:
         self.ingest_dir = ingest_dir
         self.gstore = GraphStore(self.ingest_dir)
 
-    def ingest(self, path: Path, check: bool):
+    def ingest(
+        self,
+        path: Union[Path, DirBundle, ZipBundle],
+        check: bool,
+        *,
+        changed: Optional[Collection[str]] = None,
+        removed: Collection[str] = (),
+    ):
+        """
+        Ingest a docbundle.
+
+        Parameters
+        ----------
+        path : Path, DirBundle or ZipBundle
+            bundle folder or zip file, see `papyri.bundle.read_bundle`; zip
+            files are read in place without being extracted.
+        check : bool
+            whether to skip objects whose name is not normalised.
+        changed : collection of str, optional
+            only ingest these entries of the manifest of the bundle – qualnames
+            and ``examples/<name>`` – and their figures; used by ``papyri gen
+            --watch`` after patching the bundle. Everything by default.
+        removed : collection of str
+            entries of the manifest to remove from the store.
+
+        The keys of the documents written or removed are journaled in the
+        store, see `GraphStore.record_changes`.
+        """
 
         gstore = self.gstore
+        bundle = read_bundle(path)
 
         known_refs, _ = find_all_refs(gstore)
 
@@ -393,46 +423,63 @@ class Ingester:
 
         ###
 
-        meta_path = path / "papyri.json"
-        data = json.loads(meta_path.read_text())
+        data = json.loads(bundle.read_text("papyri.json"))
+        if bundle.exists("symbols.json"):
+            symbols = SymbolTable.from_json(bundle.read_text("symbols.json"))
+            normalise = symbols.normalise
+        else:
+            # bundles from older versions, needs the package to be installed.
+            normalise = normalise_ref
         version = data["version"]
         root = data["module"]
         logo = data.get("logo", None)
         # long : short
         aliases: Dict[str, str] = data.get("aliases", {})
         rev_aliases = {v: k for k, v in aliases.items()}
-        for _, fe in progress(
-            (path / "examples/").glob("*"), description=f"{path.name} Reading Examples"
-        ):
-            s = Section.from_json(json.loads(fe.read_text()))
+        journal = []
+        for entry in removed:
+            key = _store_key(root, version, entry)
+            if key is not None and gstore.glob(key):
+                gstore.remove(key)
+                journal.append(key)
+        examples = bundle.listdir("examples")
+        if changed is not None:
+            examples = [e for e in examples if "examples/" + e in changed]
+        for _, fe in progress(examples, description=f"{bundle.name} Reading Examples"):
+            s = Section.from_json(json.loads(bundle.read_text("examples/" + fe)))
             visitor = DVR(
                 "TBD, supposed to be QA", known_refs, {}, aliases, version=version
             )
             s_code = visitor.visit(s)
             refs = list(map(tuple, visitor._targets))
             gstore.put(
-                Key(root, version, "examples", fe.name),
+                Key(root, version, "examples", fe),
                 json.dumps(s_code.to_json(), indent=2).encode(),
                 refs,
             )
+            journal.append(Key(root, version, "examples", fe))
 
+        known_qas = []
         for _, f1 in progress(
-            (path / "module").glob("*"),
-            description=f"{path.name} Reading doc bundle files ...",
+            bundle.listdir("module"),
+            description=f"{bundle.name} Reading doc bundle files ...",
         ):
-            assert f1.name.endswith(".json")
-            qa = f1.name[:-5]
+            assert f1.endswith(".json")
+            qa = f1[:-5]
             if check:
-                rqa = normalise_ref(qa)
+                rqa = normalise(qa)
                 if rqa != qa:
                     # numpy weird thing
                     print(f"skip {qa}")
                     continue
                 assert rqa == qa, f"{rqa} !+ {qa}"
+            known_qas.append(qa)
+            if changed is not None and qa not in changed:
+                continue
             try:
                 # TODO: version issue
                 nvisited_items[qa] = load_one_uningested(
-                    f1.read_text(),
+                    bundle.read_bytes("module/" + f1),
                     None,
                     qa=qa,
                     known_refs=known_refs,
@@ -443,7 +490,7 @@ class Ingester:
             except Exception as e:
                 raise RuntimeError(f"error Reading to {f1}") from e
 
-        known_refs_II = frozenset(nvisited_items.keys())
+        known_refs_II = frozenset(known_qas)
 
         # TODO :in progress, crosslink needs version information.
         known_ref_info = frozenset(
@@ -451,7 +498,7 @@ class Ingester:
         ).union(known_refs)
 
         for _, (qa, doc_blob) in progress(
-            nvisited_items.items(), description=f"{path.name} Cross referencing"
+            nvisited_items.items(), description=f"{bundle.name} Cross referencing"
         ):
             refs = doc_blob.process(known_ref_info, verbose=False, aliases=aliases)
             doc_blob.logo = logo
@@ -468,11 +515,22 @@ class Ingester:
                 if exists == "module":
                     sa.name.exists = True
                     sa.name.ref = resolved
+        assets = bundle.listdir("assets")
+        if changed is not None:
+            manifest = json.loads(bundle.read_text("manifest.json"))
+            figures = {
+                stored
+                for entry in changed
+                for stored in manifest.get(entry, {}).get("assets", {}).values()
+            }
+            assets = [a for a in assets if a in figures]
         for _, f2 in progress(
-            (path / "assets").glob("*"),
-            description=f"{path.name} Reading image files ...",
+            assets,
+            description=f"{bundle.name} Reading image files ...",
         ):
-            gstore.put(Key(root, version, "assets", f2.name), f2.read_bytes(), [])
+            gstore.put(
+                Key(root, version, "assets", f2), bundle.read_bytes("assets/" + f2), []
+            )
 
         gstore.put(
             Key(root, version, "meta", "papyri.json"),
@@ -481,7 +539,7 @@ class Ingester:
         )
 
         for _, (qa, doc_blob) in progress(
-            nvisited_items.items(), description=f"{path.name} Writing..."
+            nvisited_items.items(), description=f"{bundle.name} Writing..."
         ):
             # for qa, doc_blob in nvisited_items.items():
             # we might update other modules with backrefs
@@ -526,9 +584,11 @@ class Ingester:
                     json.dumps(js, indent=2).encode(),
                     refs,
                 )
+                journal.append(key)
 
             except Exception as e:
                 raise RuntimeError(f"error writing to {path}") from e
+        gstore.record_changes(None if changed is None else journal)
 
     def relink(self):
         gstore = self.gstore
@@ -601,6 +661,19 @@ class Ingester:
                 json.dumps(s_code.to_json(), indent=2).encode(),
                 refs,
             )
+        gstore.record_changes(None)
+
+
+def _store_key(root: str, version: str, entry: str) -> Optional[Key]:
+    """
+    Key in the `GraphStore` of the bundle manifest ``entry``, None for
+    narrative docs, which are not ingested.
+    """
+    if entry.startswith("docs/"):
+        return None
+    if entry.startswith("examples/"):
+        return Key(root, version, "examples", entry[len("examples/") :])
+    return Key(root, version, "module", entry)
 
 
 def main(path, check, *, dummy_progress):
@@ -609,22 +682,25 @@ def main(path, check, *, dummy_progress):
     Parameters
     ----------
 
+    path : Path, DirBundle or ZipBundle
+        docbundle folder or zip file to ingest.
     dummy_progress : bool
         whether to use a dummy progress bar instead of the rich one.
         Usefull when dropping into PDB.
         To be implemented. See gen step.
     """
-    builtins.print("Ingesting", path.name, "...")
+    if not isinstance(path, (DirBundle, ZipBundle)):
+        assert path.exists(), f"{path} does not exists"
+    bundle = read_bundle(path)
+    builtins.print("Ingesting", bundle.name, "...")
     from time import perf_counter
 
     now = perf_counter()
 
-    assert path.exists(), f"{path} does not exists"
-    assert path.is_dir(), f"{path} is not a directory"
-    Ingester().ingest(path, check)
+    Ingester().ingest(bundle, check)
     delta = perf_counter() - now
 
-    builtins.print(f"{path.name} Ingesting done in {delta:0.2f}s")
+    builtins.print(f"{bundle.name} Ingesting done in {delta:0.2f}s")
 
 
 def relink():
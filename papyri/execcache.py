@@ -0,0 +1,204 @@
+"""
+Persistent cache of the execution of docstring examples.
+
+With ``exec = true`` the examples of every object are executed on each gen
+run, which dominates its duration on packages with many figures. The
+``ce_status`` and figures of the blocks of an example section only depend on
+the code of those blocks – each one running after the previous ones of the same
+docstring – on the package and its version, and on the few configuration
+options that affect execution, so they are stored on disk under a hash of
+those and replayed by `papyri.gen.get_example_data` on the next runs.
+
+Jedi infers the tokens of examples executed in process from the namespace they
+leave behind, so the tokens of each block are stored as well: replayed
+examples give the same bundle as executed ones. Tokens are also resolved with
+the symbol tables of the package and its dependencies, which are thus part of
+the keys too, see `ExecCache.set_symbols`.
+
+The cache is shared by all packages, in ``~/.papyri/cache/exec``: one JSON
+entry per example section, with the ``ce_status`` and figure hashes of each
+executed block and the tokens of each block, and the figures stored once by
+hash. The least recently used entries are
+evicted when the cache grows over ``exec_cache_size`` MB, and ``papyri gen
+--force-exec`` executes all the examples again and refreshes their entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional, Set, Tuple
+
+from .execution import BlockResult
+from .symbols import SymbolTable
+
+# Config fields that change the results of the examples.
+EXEC_OPTIONS = (
+    "exec_backend",
+    "wait_for_plt_show",
+    "exec_failure",
+    "exec_timeout",
+    "exec_memory_limit",
+    "fig_format",
+    "fig_dpi",
+)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # workers of the same run, or concurrent runs, may write the same entries.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ExecCache:
+    """
+    On disk cache of the execution results of example sections.
+
+    Parameters
+    ----------
+    where : Path
+        directory of the cache.
+    package : str
+        root module of the package the examples are from.
+    version : str
+        version of the package.
+    config : Config
+        current configuration, only `EXEC_OPTIONS` are part of the keys.
+    force : bool
+        do not replay cached results, but still store the new ones.
+    """
+
+    def __init__(self, where: Path, package: str, version: str, config, *, force=False):
+        import jedi
+        import matplotlib
+        import numpy
+
+        from . import __version__
+
+        self.where = Path(where)
+        self.force = force
+        self._salt = json.dumps(
+            [
+                __version__,
+                package,
+                version,
+                numpy.__version__,
+                matplotlib.__version__,
+                jedi.__version__,
+                {name: getattr(config, name) for name in EXEC_OPTIONS},
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        self._symbols = ""
+
+    def set_symbols(self, *tables: SymbolTable) -> None:
+        """
+        Set the symbol tables examples are resolved with, see
+        `papyri.inference.StaticResolver`; they are part of the next keys.
+        """
+        digest = hashlib.sha256()
+        for table in tables:
+            digest.update(table.to_json().encode())
+        self._symbols = digest.hexdigest()
+
+    def key(self, qa: str, scripts: List[str], infer: bool) -> str:
+        """
+        Key of the example section of ``qa`` with the given blocks, with or
+        without type inference.
+        """
+        data = json.dumps([self._salt, self._symbols, qa, scripts, infer])
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.where / "entries" / (key + ".json")
+
+    def _figure(self, digest: str) -> Path:
+        return self.where / "figures" / digest
+
+    def get(
+        self, key: str
+    ) -> Optional[Tuple[List[BlockResult], List[List[Tuple[Any, ...]]]]]:
+        """
+        ce_status and figures of each executed block, and tokens of each block,
+        None if not cached or forced.
+        """
+        if self.force:
+            return None
+        path = self._entry(key)
+        try:
+            entry = json.loads(path.read_text())
+            results = [
+                (status, [self._figure(digest).read_bytes() for digest in digests])
+                for status, digests in entry["blocks"]
+            ]
+            # the modification time orders the entries for eviction.
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        tokens = [[tuple(t) for t in block] for block in entry["tokens"]]
+        return results, tokens
+
+    def put(
+        self,
+        key: str,
+        results: List[BlockResult],
+        tokens: List[List[Tuple[Any, ...]]],
+    ) -> None:
+        blocks = []
+        for status, figs in results:
+            digests = []
+            for fig in figs:
+                digest = hashlib.sha256(fig).hexdigest()
+                if not self._figure(digest).exists():
+                    _write_atomic(self._figure(digest), fig)
+                digests.append(digest)
+            blocks.append([status, digests])
+        entry = {"blocks": blocks, "tokens": tokens}
+        _write_atomic(self._entry(key), json.dumps(entry).encode())
+
+    def evict(self, max_size: int) -> int:
+        """
+        Remove the least recently used entries until the cache is at most
+        ``max_size`` bytes, then the figures no entry uses.
+
+        Returns
+        -------
+        number of entries removed.
+        """
+        entries = []
+        for path in (self.where / "entries").glob("*.json"):
+            try:
+                stat = path.stat()
+                blocks = json.loads(path.read_text())["blocks"]
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path, blocks))
+        entries.sort(key=lambda e: e[0], reverse=True)
+        size = 0
+        kept: Set[str] = set()
+        removed = 0
+        for _, entry_size, path, blocks in entries:
+            digests = {d for _, block_digests in blocks for d in block_digests}
+            new_size = entry_size
+            for digest in digests - kept:
+                try:
+                    new_size += self._figure(digest).stat().st_size
+                except OSError:
+                    pass
+            if size + new_size > max_size:
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            size += new_size
+            kept |= digests
+        for figure in (self.where / "figures").glob("*"):
+            if figure.name not in kept and not figure.name.startswith(".tmp-"):
+                figure.unlink(missing_ok=True)
+        return removed
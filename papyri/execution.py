@@ -0,0 +1,290 @@
+"""
+Execution of example code in isolated processes.
+
+The `ForkServerExecutor` starts a fork server (see `multiprocessing`) with the
+target package, numpy and matplotlib already imported. The examples of each
+object are then executed in a fresh child forked from that server, so each
+object pays neither for the imports nor for the state left behind by the
+examples of other objects, and a hanging or crashing example only takes
+down its own child.
+
+Results are streamed back over a pipe after each block, so when a child
+times out or dies, the blocks executed so far are kept.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+# ce_status of blocks that did not complete in the allotted time.
+TIMEOUT = "timeout"
+
+BlockResult = Tuple[str, List[bytes]]
+
+
+class ExampleExecutionError(Exception):
+    """
+    An example raised and the configuration does not allow to fall back.
+    """
+
+
+def _run_blocks(
+    conn,
+    qa: Optional[str],
+    aliases: List[str],
+    scripts: List[str],
+    wait_for_show: bool,
+    memory_limit: Optional[int],
+    fig_format: str,
+    fig_dpi: int,
+) -> None:
+    """
+    Child side of `ForkServerExecutor.submit`, execute ``scripts`` in order.
+
+    For each block send ``("block", ce_status, figures, seconds)``, where
+    ``seconds`` is the time spent encoding the figures; if a block raises
+    send ``("error", traceback)`` and stop. ``qa`` is None for gallery scripts,
+    which run in an empty namespace.
+    """
+    if memory_limit is not None:
+        import resource
+
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    from .gen import _resolve_qa
+    from .miscs import BlockExecutor
+
+    if qa is None:
+        ns = {}
+    else:
+        obj = _resolve_qa(qa, aliases)
+        ns = {"np": np, "plt": plt, obj.__name__: obj}
+    executor = BlockExecutor(ns)
+    with executor:
+        for script in scripts:
+            try:
+                _, fig_managers = executor.exec(script)
+            except Exception:
+                conn.send(("error", traceback.format_exc()))
+                conn.close()
+                return
+            figs = []
+            seconds = 0.0
+            if fig_managers and (("plt.show" in script) or not wait_for_show):
+                start = time.perf_counter()
+                figs = executor.get_figs(fig_format, fig_dpi)
+                plt.close("all")
+                seconds = time.perf_counter() - start
+            conn.send(("block", "execed", figs, seconds))
+    conn.send(("done",))
+    conn.close()
+
+
+class Job:
+    """
+    Handle on the execution of the examples of one object in a child process.
+
+    Attributes
+    ----------
+    figures_time : float
+        seconds the child spent encoding figures, known once `result` returns.
+    """
+
+    def __init__(self, proc, conn, n_blocks: int, timeout: Optional[float], release):
+        self._proc = proc
+        self._conn = conn
+        self._n_blocks = n_blocks
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._release = release
+        self.figures_time = 0.0
+
+    def result(self, fallback: bool) -> List[BlockResult]:
+        """
+        Wait for the child and return the (ce_status, figures) of each block.
+
+        Blocks that did not run because of an exception, a crash or the
+        timeout get the ``exception_in_exec`` or ``timeout`` status.
+
+        Parameters
+        ----------
+        fallback : bool
+            if False, raise `ExampleExecutionError` when an example raises
+            or the child dies.
+        """
+        results: List[BlockResult] = []
+        missing_status = "exception_in_exec"
+        try:
+            while len(results) < self._n_blocks:
+                if self._deadline is None:
+                    ready = self._conn.poll(None)
+                else:
+                    ready = self._conn.poll(max(0, self._deadline - time.monotonic()))
+                if not ready:
+                    self._proc.kill()
+                    missing_status = TIMEOUT
+                    break
+                try:
+                    msg = self._conn.recv()
+                except EOFError:
+                    # killed, likely by the memory limit.
+                    if not fallback:
+                        raise ExampleExecutionError(
+                            f"Child died with exit code {self._proc.exitcode}"
+                        )
+                    break
+                if msg[0] == "error":
+                    if not fallback:
+                        raise ExampleExecutionError(msg[1])
+                    break
+                _, ce_status, figs, seconds = msg
+                results.append((ce_status, figs))
+                self.figures_time += seconds
+        finally:
+            # the child may still be sending "done", close once it exited.
+            self._proc.join()
+            self._conn.close()
+            self._release()
+        results.extend([(missing_status, [])] * (self._n_blocks - len(results)))
+        return results
+
+
+class ForkServerExecutor:
+    """
+    Execute the examples of objects in children of a preloaded fork server.
+
+    Parameters
+    ----------
+    preload : list of str
+        modules to import in the fork server, typically the target package,
+        numpy and matplotlib.
+    timeout : float, optional
+        wall clock limit in seconds for all the examples of one object.
+    memory_limit : int, optional
+        address space limit of each child, in MB.
+    max_workers : int
+        maximum number of children running at the same time.
+    """
+
+    def __init__(
+        self,
+        preload: List[str],
+        *,
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        max_workers: int = 1,
+    ):
+        # need to be set before matplotlib.pyplot is imported in the server.
+        os.environ["MPLBACKEND"] = "agg"
+        self._ctx = multiprocessing.get_context("forkserver")
+        self._ctx.set_forkserver_preload(preload)
+        self.preload = preload
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def submit(
+        self,
+        qa: Optional[str],
+        aliases: List[str],
+        scripts: List[str],
+        *,
+        wait_for_show: bool,
+        fig_format: str = "png",
+        fig_dpi: int = 300,
+    ) -> Job:
+        """
+        Start executing ``scripts`` – the examples of ``qa``, or a gallery
+        script if ``qa`` is None – in a new child.
+
+        Blocks if ``max_workers`` children are already running.
+        """
+        self._slots.acquire()
+        try:
+            parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+            proc = self._ctx.Process(
+                target=_run_blocks,
+                args=(
+                    child_conn,
+                    qa,
+                    aliases,
+                    scripts,
+                    wait_for_show,
+                    self.memory_limit,
+                    fig_format,
+                    fig_dpi,
+                ),
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+        except BaseException:
+            self._slots.release()
+            raise
+        return Job(proc, parent_conn, len(scripts), self.timeout, self._slots.release)
+
+    def run(
+        self,
+        qa: Optional[str],
+        aliases: List[str],
+        scripts: List[str],
+        *,
+        wait_for_show: bool,
+        fallback: bool,
+        fig_format: str = "png",
+        fig_dpi: int = 300,
+    ) -> List[BlockResult]:
+        """
+        Execute ``scripts`` in a new child and wait for the results.
+        """
+        job = self.submit(
+            qa,
+            aliases,
+            scripts,
+            wait_for_show=wait_for_show,
+            fig_format=fig_format,
+            fig_dpi=fig_dpi,
+        )
+        return job.result(fallback)
+
+
+_executors: Dict[Any, ForkServerExecutor] = {}
+
+# modules imported in the fork server besides the target packages.
+PRELOAD = ["numpy", "matplotlib", "matplotlib.pyplot", "papyri.gen"]
+# packages imported in the fork server whatever the target, see preload_packages
+_preloaded: List[str] = []
+
+
+def preload_packages(roots: List[str]) -> None:
+    """
+    Import ``roots`` in the fork server, in addition to the target package.
+
+    A process has a single fork server, which only uses the preload list set
+    before it starts; `papyri.gen.gen_batch` thus lists all the packages of
+    the batch before executing the examples of the first one.
+    """
+    _preloaded[:] = roots
+
+
+def get_executor(root: str, config, max_workers: int = 1) -> ForkServerExecutor:
+    """
+    Return the fork server executor of the current process for ``root``.
+    """
+    key = (root, config.exec_timeout, config.exec_memory_limit, max_workers)
+    if key not in _executors:
+        _executors[key] = ForkServerExecutor(
+            list(dict.fromkeys([root, *_preloaded, *PRELOAD])),
+            timeout=config.exec_timeout,
+            memory_limit=config.exec_memory_limit,
+            max_workers=max_workers,
+        )
+    return _executors[key]
@@ -11,29 +11,50 @@ likely be separated into a separate module at some point.
 
 from __future__ import annotations
 
+import contextlib
+import copy
 import dataclasses
+import gc
+import hashlib
+import importlib
 import inspect
+import itertools
 import json
 import logging
+import multiprocessing
 import os
+import pickle
 import re
+import shutil
 import site
 import sys
-import warnings
-from collections import defaultdict
+import tempfile
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import timedelta
-from functools import lru_cache
+from fnmatch import fnmatchcase
+from functools import lru_cache, partial
 from pathlib import Path
 from types import FunctionType, ModuleType
-from typing import Any, Dict, List, MutableMapping, Optional, Sequence, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
-import jedi
 import toml
 from IPython.core.oinspect import find_file
-from pygments import lex
-from pygments.formatters import HtmlFormatter
-from pygments.lexers import PythonLexer
 from rich.logging import RichHandler
 from rich.progress import BarColumn, Progress, ProgressColumn
 from rich.progress import Text as RichText
@@ -41,7 +62,32 @@ from rich.progress import TextColumn
 from there import print
 from velin.examples_section_utils import InOut, splitblank, splitcode
 
+from .bundle import (
+    BundlePatcher,
+    BundleWriter,
+    DirBundle,
+    ZipBundle,
+    ZipBundleWriter,
+    bundle_writer,
+    in_shard,
+    read_bundle,
+    shard_path,
+)
+from .execcache import ExecCache
+from .execution import (
+    TIMEOUT,
+    BlockResult,
+    ExampleExecutionError,
+    get_executor,
+    preload_packages,
+)
+from .inference import get_engine, live_lookup
+from .memory import SpillDict, current_rss
 from .miscs import BlockExecutor, DummyP
+from .report import get_report
+from .source import SourceIndex
+from .static import StaticCollector, StaticItem, static_version
+from .symbols import SymbolTable
 from .take2 import (
     Code,
     Fig,
@@ -55,7 +101,7 @@ from .take2 import (
     parse_rst_section,
 )
 from .tree import DirectiveVisiter
-from .utils import dedent_but_first, pos_to_nl, progress
+from .utils import dedent_but_first, progress
 from .vref import NumpyDocString
 
 try:
@@ -86,7 +132,7 @@ def paragraph(lines) -> Any:
     return p2
 
 
-def parse_script(script, ns, prev, config):
+def parse_script(script, ns, prev, config, *, qa=None, lookup=None):
     """
     Parse a script into tokens and use Jedi to infer the fully qualified names
     of each token.
@@ -99,66 +145,41 @@ def parse_script(script, ns, prev, config):
         extra namespace to use with jedi's Interpreter.
     prev : str
         previous lines that lead to this.
-
-    Yields
-    ------
-    index
-        index in the tokenstream
-    type
-        pygments token type
-    text
-        text of the token
-    reference : str
-        fully qualified name of the type of current token
+    qa : str, optional
+        object the script comes from, for timing purposes.
+    lookup : callable, optional
+        canonical name of known objects, to resolve most tokens without Jedi,
+        see `papyri.inference.StaticResolver`.
+
+    Returns
+    -------
+    list of (text, reference, css class) tuples
+        text of each token, fully qualified name of the type of the token, and
+        class used to highlight it.
+
+    See Also
+    --------
+    papyri.inference.InferenceEngine.tokens
 
     """
-    jeds = []
-
-    warnings.simplefilter("ignore", UserWarning)
-
-    l_delta = len(prev.split("\n"))
-    contextscript = prev + "\n" + script
-    if ns:
-        jeds.append(jedi.Interpreter(contextscript, namespaces=[ns]))
-    jeds.append(jedi.Script(prev + "\n" + script))
-    P = PythonLexer()
-
-    for index, _type, text in P.get_tokens_unprocessed(script):
-        line_n, col_n = pos_to_nl(script, index)
-        line_n += l_delta
-        try:
-            ref = None
-            for jed in jeds:
-                failed = ""
-                try:
-                    if (
-                        config.infer
-                        and (text not in (" .=()[],"))
-                        and text.isidentifier()
-                    ):
-                        inf = jed.infer(line_n + 1, col_n)
-                        if inf:
-                            # TODO: we might want the qualname to be module_name:name for disambiguation.
-                            ref = inf[0].full_name
-                            # if ref.startswith('builtins'):
-                            #    ref = ''
-                    else:
-                        ref = ""
-                except (AttributeError, TypeError) as e:
-                    raise type(e)(
-                        f"{contextscript}, {line_n=}, {col_n=}, {prev=}, {jed=}"
-                    ) from e
-                    failed = "(jedi failed inference)"
-                    print("failed inference on ", script, ns, jed, col_n, line_n + 1)
-                break
-        except IndexError:
-            raise
-            ref = ""
-        yield text + failed, ref
-    warnings.simplefilter("default", UserWarning)
+    engine = get_engine()
+    report = get_report()
+    with report.phase("inference", qa):
+        tokens = engine.tokens(
+            script, ns, prev, infer=config.infer, qa=qa, lookup=lookup
+        )
+    timing = engine.last
+    report.count("tokens", timing["tokens"])
+    report.count("inferred", timing["inferred"])
+    if lookup is not None:
+        report.count("static_resolver_hits", timing["resolved"])
+        report.count("static_resolver_misses", timing["inferred"])
+    return tokens
 
 
-def get_example_data(doc, *, obj, qa: str, config, log):
+def get_example_data(
+    doc, *, obj, qa: str, config, log, aliases=(), lookup=None, exec_cache=None
+):
     """Extract example section data from a NumpyDocstring
 
     One of the section in numpydoc is "examples" that usually consist of number
@@ -174,6 +195,22 @@ def get_example_data(doc, *, obj, qa: str, config, log):
     ----------
     doc
         a docstring parsed into a NnumpyDoc document.
+    obj
+        the object being documented
+    qa : str
+        fully qualified name of obj
+    config : Config
+        current configuration, with ``exec_backend="forkserver"`` the examples
+        are executed in a child process, see `papyri.execution`.
+    log
+        logger
+    aliases : sequence of str
+        other names of obj, used to find it in the child process.
+    lookup : callable, optional
+        passed to `parse_script`.
+    exec_cache : ExecCache, optional
+        when executing, the results of the blocks are replayed from this cache
+        if the blocks did not change, and stored in it otherwise.
 
     Examples
     --------
@@ -220,6 +257,63 @@ def get_example_data(doc, *, obj, qa: str, config, log):
     fig_managers = executor.fig_man()
     assert (len(fig_managers)) == 0, f"init fail in {qa} {len(fig_managers)}"
     wait_for_show = config.wait_for_plt_show
+    ext = config.fig_format
+    report = get_report()
+
+    def get_figs():
+        with report.phase("figures", qa):
+            return executor.get_figs(config.fig_format, config.fig_dpi)
+
+    if qa in config.exclude_jedi:
+        print(f"Turning off type inference for func {qa!r}")
+        inf = False
+    else:
+        inf = config.infer
+
+    remote = None
+    scripts = []
+    all_scripts = []
+    if config.exec:
+        for b in blocks:
+            for item in b:
+                if isinstance(item, InOut):
+                    script = "\n".join(item.in_)
+                    all_scripts.append(script)
+                    try:
+                        compile(script, "<>", "exec")
+                        scripts.append(script)
+                    except SyntaxError:
+                        pass
+    # results of the executed blocks and tokens of all the blocks, to store in
+    # or replayed from exec_cache.
+    results: List[BlockResult] = []
+    tokens: List[List[Tuple[Any, ...]]] = []
+    replayed_tokens = None
+    cache_key = None
+    if scripts and exec_cache is not None:
+        cache_key = exec_cache.key(qa, all_scripts, inf)
+        cached = exec_cache.get(cache_key)
+        if cached is not None:
+            report.count("exec_cache_hits")
+            remote = iter(cached[0])
+            replayed_tokens = iter(cached[1])
+            cache_key = None
+        else:
+            report.count("exec_cache_misses")
+    if remote is None and scripts and config.exec_backend == "forkserver":
+        # figures are encoded in the child, that time is also part of "exec".
+        with report.phase("exec", qa):
+            job = get_executor(qa.split(".")[0], config).submit(
+                qa,
+                list(aliases),
+                scripts,
+                wait_for_show=wait_for_show,
+                fig_format=config.fig_format,
+                fig_dpi=config.fig_dpi,
+            )
+            remote = iter(job.result(config.exec_failure == "fallback"))
+        if job.figures_time:
+            report.add_time("figures", job.figures_time, qa)
     with executor:
         for b in blocks:
             for item in b:
@@ -235,25 +329,39 @@ def get_example_data(doc, *, obj, qa: str, config, log):
                         pass
                     raise_in_fig = None
                     did_except = False
-                    if config.exec and ce_status == "compiled":
+                    if remote is not None and ce_status == "compiled":
+                        ce_status, block_figs = next(remote)
+                        results.append((ce_status, block_figs))
+                        report.count("blocks_" + ce_status)
+                        if ce_status == TIMEOUT:
+                            log.warning("Timeout executing examples of %s", qa)
+                        for fig in block_figs:
+                            counter += 1
+                            figname = f"fig-{qa}-{counter}.{ext}"
+                            figs.append((figname, fig))
+                    elif config.exec and ce_status == "compiled":
+                        n_figs = len(figs)
                         try:
                             if not wait_for_show:
                                 assert len(fig_managers) == 0
                             try:
-                                res, fig_managers = executor.exec(script)
+                                with report.phase("exec", qa):
+                                    res, fig_managers = executor.exec(script)
                                 ce_status = "execed"
                             except Exception:
                                 log.exception("error in execution: %s", qa)
                                 ce_status = "exception_in_exec"
                                 if config.exec_failure != "fallback":
                                     raise
+                            finally:
+                                report.count("blocks_" + ce_status)
                             if fig_managers and (
                                 ("plt.show" in script) or not wait_for_show
                             ):
                                 raise_in_fig = True
-                                for fig in executor.get_figs():
+                                for fig in get_figs():
                                     counter += 1
-                                    figname = f"fig-{qa}-{counter}.png"
+                                    figname = f"fig-{qa}-{counter}.{ext}"
                                     figs.append((figname, fig))
                                 plt.close("all")
                                 raise_in_fig = False
@@ -267,9 +375,9 @@ def get_example_data(doc, *, obj, qa: str, config, log):
                         finally:
                             if not wait_for_show:
                                 if fig_managers:
-                                    for fig in executor.get_figs():
+                                    for fig in get_figs():
                                         counter += 1
-                                        figname = f"fig-{qa}-{counter}.png"
+                                        figname = f"fig-{qa}-{counter}.{ext}"
                                         figs.append((figname, fig))
                                         print(
                                             f"Still fig manager(s) open for {qa}: {figname}"
@@ -279,20 +387,19 @@ def get_example_data(doc, *, obj, qa: str, config, log):
                                 assert len(fig_managers) == 0, fig_managers + [
                                     did_except,
                                 ]
-                    infer_exclude = config.exclude_jedi
-                    if qa in infer_exclude:
-                        print(f"Turning off type inference for func {qa!r}")
-                        inf = False
+                        results.append((ce_status, [f for _, f in figs[n_figs:]]))
+                    if replayed_tokens is not None:
+                        entries = next(replayed_tokens)
                     else:
-                        inf = config.infer
-                    entries = list(
-                        parse_script(
+                        entries = parse_script(
                             script,
                             ns=ns,
                             prev=acc,
                             config=config.replace(infer=inf),
+                            qa=qa,
+                            lookup=lookup,
                         )
-                    )
+                        tokens.append(entries)
                     acc += "\n" + script
                     example_section_data.append(
                         Code(entries, "\n".join(item.out), ce_status)
@@ -303,20 +410,42 @@ def get_example_data(doc, *, obj, qa: str, config, log):
                     assert isinstance(item.out, list)
                     example_section_data.append(Text("\n".join(item.out)))
 
+    if cache_key is not None and all(status != TIMEOUT for status, _ in results):
+        exec_cache.put(cache_key, results, tokens)
+
     # TODO fix this if plt.close not called and still a ligering figure.
     fig_managers = executor.fig_man()
     if len(fig_managers) != 0:
         print(f"Unclosed figures in {qa}!!")
         plt.close("all")
-    return processed_example_data(example_section_data), figs
+    _use_asset_names(example_section_data, figs)
+    report.count("figures", len(figs))
+    with report.phase("highlight", qa):
+        return processed_example_data(example_section_data), figs
+
+
+def asset_name(name: str, data: bytes) -> str:
+    """
+    Name under which a figure is stored in the bundle.
+
+    Assets are content addressed so that identical figures, from aliases or
+    repeated examples, are stored only once. The extension of ``name`` is kept.
+    """
+    return hashlib.sha256(data).hexdigest()[:32] + Path(name).suffix
+
+
+def _use_asset_names(section: Section, figs: List[Tuple[str, bytes]]) -> None:
+    """
+    Make the `Fig` nodes of ``section`` point to the stored assets of ``figs``.
+    """
+    names = {name: asset_name(name, data) for name, data in figs}
+    for node in section:
+        if isinstance(node, Fig):
+            node.value = names.get(node.value, node.value)
 
 
 def get_classes(code):
-    list(lex(code, PythonLexer()))
-    FMT = HtmlFormatter()
-    classes = [FMT.ttype2class.get(x) for x, y in lex(code, PythonLexer())]
-    classes = [c if c is not None else "" for c in classes]
-    return classes
+    return get_engine().classes(code)
 
 
 def P2(lines) -> List[Node]:
@@ -348,7 +477,7 @@ def processed_example_data(example_section_data):
 
         elif type_ == "Code":
             in_ = in_out.entries
-            # assert len(in_[0]) == 3, len(in_[0])
+            # entries from parse_script already have their css class.
             if len(in_[0]) == 2:
                 text = "".join([x for x, y in in_])
                 classes = get_classes(text)
@@ -394,6 +523,97 @@ def normalise_ref(ref):
     return ref
 
 
+def _signature(target_item) -> Optional[str]:
+    """
+    Signature of an object as a string, None if it has none.
+
+    Memory addresses are masked, so that it is stable between runs.
+    """
+    if isinstance(target_item, StaticItem):
+        return target_item.signature
+    try:
+        sig = str(inspect.signature(target_item))
+    except (ValueError, TypeError):
+        return None
+    return re.sub("at 0x[0-9a-f]+", "at 0x0000000", sig)
+
+
+def _item_type(target_item) -> str:
+    """
+    Type of an object, as a string.
+    """
+    if isinstance(target_item, StaticItem):
+        return target_item.item_type
+    return str(type(target_item))
+
+
+def _source_location(
+    target_item, sources: Optional[SourceIndex] = None
+) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Cheaply find the file and first line of an object, for change detection.
+    """
+    located = sources.locate(target_item) if sources is not None else None
+    if located is not None:
+        return located
+    try:
+        item_file = find_file(target_item)
+    except Exception:
+        item_file = None
+    code = getattr(inspect.unwrap(target_item), "__code__", None)
+    if code is not None:
+        return item_file, code.co_firstlineno
+    try:
+        return item_file, inspect.getsourcelines(target_item)[1]
+    except (OSError, TypeError):
+        return item_file, None
+
+
+def refs_digest(known_refs: FrozenSet[RefInfo]) -> str:
+    """
+    Hash of the references known in a package, see `item_digest`.
+    """
+    key = json.dumps(sorted(tuple(ref) for ref in known_refs), default=str)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def item_digest(
+    target_item,
+    *,
+    config_digest: str,
+    refs_digest: str,
+    aliases: List[str],
+    sources: Optional[SourceIndex] = None,
+) -> str:
+    """
+    Hash of everything that goes into the documentation of one object.
+
+    This covers the docstring, signature, source location and aliases of the
+    object; ``config_digest`` should cover the configuration and the package
+    and papyri versions (see `Gen.config_digest`).
+
+    Cross references within the package are turned into links at generation
+    time, against all the objects known at that point; ``refs_digest`` should
+    cover those (see `refs_digest`), so that adding or removing an object
+    invalidates the documentation that may link to it.
+
+    ``sources`` is used to locate the object when given, see `SourceIndex`.
+    """
+    key = json.dumps(
+        [
+            config_digest,
+            refs_digest,
+            getattr(target_item, "__doc__", None),
+            _signature(target_item),
+            _source_location(target_item, sources),
+            _item_type(target_item),
+            aliases,
+        ],
+        default=str,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
 @dataclass
 class Config:
     dummy_progress: bool = False
@@ -412,6 +632,15 @@ class Config:
     wait_for_plt_show: Optional[bool] = True
     examples_exclude: Sequence[str] = ()
     exclude_jedi: Sequence[str] = ()
+    # "inprocess" or "forkserver", see papyri.execution
+    exec_backend: str = "inprocess"
+    exec_timeout: Optional[float] = None  # seconds, per object, forkserver only
+    exec_memory_limit: Optional[int] = None  # MB, forkserver only
+    fig_format: str = "png"  # any format supported by savefig, like svg
+    fig_dpi: int = 300
+    exec_cache_size: int = 1024  # MB, shared by all packages, see papyri.execcache
+    # collect from the source without importing the package, see papyri.static
+    static: bool = False
 
     def replace(self, **kwargs):
         return dataclasses.replace(self, **kwargs)
@@ -429,9 +658,49 @@ def gen_main(
     examples,
     fail,
     narative,
-):
+    jobs: int = 1,
+    incremental: bool = False,
+    zip_: bool = False,
+    report: Optional[str] = None,
+    report_top: int = 10,
+    resume: bool = False,
+    pool: Optional[ProcessPoolExecutor] = None,
+    dependency_symbols: Optional[SymbolTable] = None,
+    static: bool = False,
+    force_exec: bool = False,
+    shard: Optional[Tuple[int, int]] = None,
+    only: Optional[str] = None,
+    max_memory: Optional[int] = None,
+) -> Gen:
     """
     main entry point
+
+    When ``report`` is given, write the per phase timing report of the run
+    to this path, with the ``report_top`` slowest objects of each phase, see
+    `papyri.report`.
+
+    With ``resume``, objects completed by an interrupted run for the same
+    package version are not regenerated, unless the configuration changed.
+
+    ``pool`` and ``dependency_symbols`` are the state shared between packages
+    by `gen_batch`.
+
+    With ``static``, the package is not imported, see `papyri.static`; examples
+    are not executed.
+
+    When executing examples, their results are cached across runs, see
+    `papyri.execcache`; with ``force_exec`` they are all executed again.
+
+    With ``shard``, an ``(index, count)`` tuple, only the part of the package
+    assigned to this shard is generated, to a partial bundle, see
+    `papyri.bundle.merge_bundles`.
+
+    With ``only``, a glob pattern, only the entries matching it are
+    regenerated, and written in place in the existing bundle, see
+    `Gen.patch_bundle` and `Gen.matches_only`.
+
+    With ``max_memory``, in MB, each process of the generation releases memory
+    when it uses more, see `Gen.check_memory`.
     """
     conffile = Path(target_file).expanduser()
     if conffile.exists():
@@ -442,6 +711,10 @@ def gen_main(
             config.exec = exec_
         if infer is not None:
             config.infer = infer
+        if static:
+            config.static = True
+        if config.static and config.exec:
+            config.exec = False
 
         if len(conf.keys()) != 1:
             raise ValueError(
@@ -462,7 +735,18 @@ def gen_main(
 
     g = Gen(
         dummy_progress=dummy_progress,
+        jobs=jobs,
+        pool=pool,
     )
+    if dependency_symbols is not None:
+        g.dependency_symbols = dependency_symbols
+    g.shard = shard
+    g.only = only
+    if max_memory is not None:
+        g.max_memory = max_memory * 2**20
+    if config.static:
+        g.log.info("Static mode: %s is not imported, nor its examples run", names[0])
+    get_report().reset()
     g.log.info("Will write data to %s", target_dir)
     if debug:
         g.log.setLevel("DEBUG")
@@ -473,24 +757,112 @@ def gen_main(
         relative_dir=Path(target_file).parent,
         config=config,
     )
+    if config.exec:
+        g.exec_cache = ExecCache(
+            Path("~/.papyri/cache/exec").expanduser(),
+            g.root,
+            g.version,
+            config,
+            force=force_exec,
+        )
+    if incremental:
+        g.load_previous(shard_path(target_dir / (g.root + "_" + g.version), shard))
+    if not dry_run:
+        p = target_dir / (g.root + "_" + g.version + (".zip" if zip_ else ""))
+        p = shard_path(p, shard)
+        if only is not None:
+            if zip_ or not (p / "papyri.json").exists():
+                sys.exit(f"--only needs an existing bundle folder to patch, {p}")
+            g.log.info("Patching Doc bundle %s", p)
+            g.patch_bundle(p)
+        else:
+            g.log.info("Streaming Doc bundle to %s", p)
+            g.open_bundle(p, resume=resume)
     if examples:
         g.collect_examples_out(config)
     if api:
-        g.do_one_mod(
-            names[0],
-            config=config,
-        )
+        g.do_one_mod(names[0], config=config)
     docs_path: Optional[str] = config.docs_path
     if docs_path is not None and narative:
         path = Path(docs_path).expanduser()
         g.do_docs(path, fail, config)
     if not dry_run:
-        p = target_dir / (g.root + "_" + g.version)
-        p.mkdir(exist_ok=True)
+        with get_report().phase("write"):
+            g.commit_bundle()
+    if g.exec_cache is not None:
+        evicted = g.exec_cache.evict(config.exec_cache_size * 2**20)
+        if evicted:
+            g.log.info("Evicted %s entries from the execution cache", evicted)
+    if report is not None:
+        get_report().write(Path(report).expanduser(), report_top)
+        g.log.info("Timing report written to %s", report)
+    return g
+
+
+def _package_name(target_file: str) -> Optional[str]:
+    """
+    Name of the package configured in ``target_file``, None if it does not exist.
+    """
+    conffile = Path(target_file).expanduser()
+    if not conffile.exists():
+        return None
+    return next(iter(toml.loads(conffile.read_text())))
+
+
+def batch_report_path(report: str, name: str) -> Path:
+    """
+    Path of the report of package ``name`` in a batch, next to ``report``:
+    ``report.json`` gives ``report.<name>.json``.
+    """
+    path = Path(report).expanduser()
+    return path.with_name(f"{path.stem}.{name}{path.suffix or '.json'}")
 
-        g.log.info("Saving current Doc bundle to %s", p)
-        g.clean(p)
-        g.write(p)
+
+def gen_batch(
+    target_files: List[str],
+    *,
+    jobs: int = 1,
+    report: Optional[str] = None,
+    **kwargs,
+) -> None:
+    """
+    Generate the docbundles of several packages in a single process.
+
+    The packages share the warm state of the process – imported modules, the
+    jedi caches of the inference engine, the fork server of examples, which
+    preloads all the packages of the batch – and, with ``jobs`` > 1, the same
+    pool of worker processes. References to the packages generated earlier in
+    the batch are resolved with their symbol tables, so dependencies should be
+    listed first, e.g. numpy before scipy.
+
+    With several packages, the ``report`` of each one is written next to
+    ``report``, see `batch_report_path`. Other keyword arguments are passed to
+    `gen_main`.
+    """
+    names = [_package_name(f) for f in target_files]
+    preload_packages([n for n in names if n is not None])
+    symbols = SymbolTable()
+    with contextlib.ExitStack() as stack:
+        pool = None
+        if jobs > 1 and len(target_files) > 1:
+            pool = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+                )
+            )
+        for target_file, name in zip(target_files, names):
+            package_report = report
+            if report is not None and len(target_files) > 1 and name is not None:
+                package_report = str(batch_report_path(report, name))
+            g = gen_main(
+                target_file=target_file,
+                jobs=jobs,
+                pool=pool,
+                dependency_symbols=symbols,
+                report=package_report,
+                **kwargs,
+            )
+            symbols.update(g.symbols)
 
 
 class TimeElapsedColumn(ProgressColumn):
@@ -561,21 +933,33 @@ class DFSCollector:
         self.root = root.__name__
         assert "." not in self.root
         self.obj: Dict[str, Any] = dict()
+        # ids of the objects in self.obj -> qualified name; we can't use
+        # `obj in self.obj.values()` as it is linear and uses `__eq__`, which
+        # can be arbitrary (numpy arrays).
+        self._seen_ids: Dict[int, str] = {}
         self.aliases = defaultdict(lambda: [])
-        self._open_list = [(root, [root.__name__])]
+        # every path through which an object was reached -> qualified name,
+        # aliases only has the first one. See papyri.symbols.
+        self.paths: Dict[str, str] = {}
+        self._open_list = deque([(root, [root.__name__])])
         for o in others:
             self._open_list.append((o, o.__name__.split(".")))
+        # per submodule number of visited objects and time spent visiting them.
+        self.visit_counts: Dict[str, int] = defaultdict(int)
+        self.visit_times: Dict[str, float] = defaultdict(float)
 
     def scan(self) -> None:
         """
         Attempt to find all objects.
         """
-        while len(self._open_list) >= 1:
-            current, stack = self._open_list.pop(0)
+        while self._open_list:
+            current, stack = self._open_list.popleft()
 
             # numpy objects ane no bool values.
-            if id(current) not in [id(x) for x in self.obj.values()]:
+            if id(current) not in self._seen_ids:
                 self.visit(current, stack)
+            else:
+                self.paths[".".join(stack)] = self._seen_ids[id(current)]
 
     def prune(self) -> None:
         """
@@ -589,10 +973,10 @@ class DFSCollector:
         in order to extract the canonical import name (visible to users),
         and to resolve references.
         """
-        for qa, item in self.obj.items():
+        for qa, item in list(self.obj.items()):
             if (nqa := full_qual(item)) != qa:
                 print("after import qa differs : {qa} -> {nqa}")
-                if self.obj[nqa] == item:
+                if self.obj.get(nqa) is item:
                     print("present twice")
                     del self.obj[nqa]
                 else:
@@ -603,6 +987,18 @@ class DFSCollector:
         self.prune()
         return self.obj
 
+    def stats(self) -> List[Tuple[str, int, float]]:
+        """
+        Per submodule number of visited objects and time spent, slowest first.
+        """
+        return sorted(
+            (
+                (sub, count, self.visit_times[sub])
+                for sub, count in self.visit_counts.items()
+            ),
+            key=lambda x: -x[2],
+        )
+
     def visit(self, obj, stack):
         """
         Recursively visit Module, Classes, and Functions by tracking which path
@@ -611,7 +1007,7 @@ class DFSCollector:
         try:
             qa = full_qual(obj)
         except Exception as e:
-            raise RuntimeError(f"error visiting {'.'.join(self.stack)}") from e
+            raise RuntimeError(f"error visiting {'.'.join(stack)}") from e
         if not qa:
             if (
                 "__doc__" not in stack
@@ -623,21 +1019,32 @@ class DFSCollector:
             return
         if not qa.split(".")[0] == self.root:
             return
-        if obj in self.obj.values():
+        if id(obj) in self._seen_ids:
             return
-        if (qa in self.obj) and self.obj[qa] != obj:
+        if (qa in self.obj) and self.obj[qa] is not obj:
             pass
         self.obj[qa] = obj
+        self._seen_ids[id(obj)] = qa
         self.aliases[qa].append(".".join(stack))
+        self.paths[".".join(stack)] = qa
 
         if isinstance(obj, ModuleType):
-            return self.visit_ModuleType(obj, stack)
-        elif isinstance(obj, FunctionType):
-            return self.visit_FunctionType(obj, stack)
-        elif isinstance(obj, type):
-            return self.visit_ClassType(obj, stack)
+            submodule = obj.__name__
         else:
-            pass
+            submodule = getattr(obj, "__module__", None) or qa.rsplit(".", 1)[0]
+        start = time.perf_counter()
+        try:
+            if isinstance(obj, ModuleType):
+                return self.visit_ModuleType(obj, stack)
+            elif isinstance(obj, FunctionType):
+                return self.visit_FunctionType(obj, stack)
+            elif isinstance(obj, type):
+                return self.visit_ClassType(obj, stack)
+            else:
+                pass
+        finally:
+            self.visit_counts[submodule] += 1
+            self.visit_times[submodule] += time.perf_counter() - start
 
     def visit_ModuleType(self, mod, stack):
         for k in dir(mod):
@@ -786,6 +1193,16 @@ class DocBlob(Node):
         assert self._content is not None
 
 
+@lru_cache
+def _init_logging() -> None:
+    """
+    Configure logging, once per process.
+    """
+    logging.basicConfig(
+        level="INFO", format="%(message)s", datefmt="[%X]", handlers=[RichHandler()]
+    )
+
+
 class Gen:
     """
     Core class to generate docbundles for a given library.
@@ -795,24 +1212,59 @@ class Gen:
 
     """
 
-    def __init__(self, dummy_progress):
+    def __init__(self, dummy_progress, jobs: int = 1, pool=None):
 
+        self.Progress: Type[Progress]
         if dummy_progress:
             self.Progress = DummyP
         else:
             self.Progress = Progress
-        FORMAT = "%(message)s"
-        logging.basicConfig(
-            level="INFO", format=FORMAT, datefmt="[%X]", handlers=[RichHandler()]
-        )
+        _init_logging()
 
         self.log = logging.getLogger("papyri")
 
-        self.data = {}
-        self.bdata = {}
-        self.metadata = {}
-        self.examples = {}
-        self.docs = {}
+        # documents put before open_bundle, or with --dry-run, moved to disk
+        # when the process uses more than max_memory, see check_memory.
+        self.data = SpillDict()
+        self.bdata = SpillDict()
+        self.metadata: Dict[str, Any] = {}
+        self.examples = SpillDict()
+        self.docs = SpillDict()
+        # bytes, see check_memory
+        self.max_memory: Optional[int] = None
+        self._over_memory = False
+        self.jobs = jobs
+        # worker processes shared with other packages, see gen_batch.
+        self.pool: Optional[ProcessPoolExecutor] = pool
+        self._worker_failures: Dict[str, List[str]] = defaultdict(lambda: [])
+        # qualname -> {"hash": ..., "assets": [...]}, see item_digest
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        # figure name -> content addressed asset name, see put_fig
+        self.asset_names: Dict[str, str] = {}
+        # when set, data is streamed to the bundle instead of kept in memory.
+        self._writer: Optional[Union[BundleWriter, ZipBundleWriter, BundlePatcher]]
+        self._writer = None
+        self._stored_assets: Set[str] = set()
+        self._previous: Optional[Tuple[Path, Dict[str, Dict[str, Any]]]] = None
+        # same for the entries finished by an interrupted run, see open_bundle.
+        self._checkpoint: Optional[Tuple[Path, Dict[str, Dict[str, Any]]]] = None
+        # opened lazily, as bundles can't be sent to worker processes.
+        self._source_bundles: Dict[Path, Union[DirBundle, ZipBundle]] = {}
+        # names of the objects of the package -> canonical names, see normalise_ref
+        self.symbols = SymbolTable()
+        # same for the packages generated before this one by gen_batch.
+        self.dependency_symbols = SymbolTable()
+        # file and line of the objects, see do_one_item
+        self.sources = SourceIndex()
+        # (kind, hash of docstring text) -> parsed IR, see _cached_parse
+        self._parse_cache: Dict[Tuple[str, str], Any] = {}
+        # results of the examples of previous runs, see get_example_data
+        self.exec_cache: Optional[ExecCache] = None
+        # (index, count) when only generating a part of the bundle, see in_shard
+        self.shard: Optional[Tuple[int, int]] = None
+        # pattern of the objects to regenerate, see patch_bundle
+        self.only: Optional[str] = None
+        self._patched: Set[str] = set()
 
     def clean(self, where: Path):
         """
@@ -830,7 +1282,10 @@ class Gen:
         for _, path in progress(
             (where / "docs").glob("*"), description="cleaning previous bundle 3/3"
         ):
-            path.unlink()
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
 
         if (where / "module").exists():
             (where / "module").rmdir()
@@ -838,6 +1293,8 @@ class Gen:
             (where / "assets").rmdir()
         if (where / "papyri.json").exists():
             (where / "papyri.json").unlink()
+        if (where / "manifest.json").exists():
+            (where / "manifest.json").unlink()
         if (where / "docs").exists():
             (where / "docs").rmdir()
 
@@ -845,76 +1302,330 @@ class Gen:
         """
         Crawl the filesystem for all docs/rst files
 
+        Files are parsed on ``self.jobs`` worker processes, and files whose
+        content did not change since the previous bundle (see `load_previous`)
+        are reused from it.
         """
         self.log.info("Scraping Documentation")
-        for p in path.glob("**/*.rst"):
+        report = get_report()
+        config_digest = self.config_digest(config)
+        to_parse = []
+        for p in sorted(path.glob("**/*.rst")):
             assert p.is_file()
             parts = p.relative_to(path).parts
             assert parts[-1].endswith("rst")
+            key = "docs/" + "/".join(parts)
+            if not in_shard(key, self.shard) or not self.matches_only(key):
+                continue
+            content = p.read_bytes()
+            digest = hashlib.sha256(config_digest.encode() + content).hexdigest()
+            previous = self._reuse(key, digest)
+            if previous is not None:
+                report.count("docs_reused")
+                self.put_doc(parts, previous[0])
+                self._record(key, {"hash": digest, "assets": {}})
+            else:
+                to_parse.append((parts, content, digest))
 
-            data = ts.parse(p.read_bytes())
-            blob = DocBlob()
-            blob.arbitrary = data
-            blob.content = {}
-
-            blob.ordered_sections = []
-            blob.item_file = None
-            blob.item_line = None
-            blob.item_type = None
-            blob.aliases = []
-            blob.example_section_data = Section()
-            blob.see_also = []
-            blob.signature = None
-            blob.references = None
-            blob.refs = []
+        with contextlib.ExitStack() as stack:
+            if self.jobs > 1 and len(to_parse) > 1:
+                pool = stack.enter_context(self._worker_pool())
+                results = _ordered_map(
+                    pool, _do_one_doc, [c for _, c, _ in to_parse], self.jobs * 2
+                )
+            else:
+                results = map(_do_one_doc, [c for _, c, _ in to_parse])
+            for (parts, _, digest), (data, seconds) in zip(to_parse, results):
+                self.check_memory()
+                report.add_time("docs", seconds, "/".join(parts))
+                report.count("docs")
+                self.put_doc(parts, data)
+                self._record("docs/" + "/".join(parts), {"hash": digest, "assets": {}})
+
+    @contextlib.contextmanager
+    def _worker_pool(self):
+        """
+        Pool of ``self.jobs`` worker processes: ``self.pool`` when it is shared
+        by several packages (see `gen_batch`), otherwise a new one, shut down on
+        exit.
+        """
+        if self.pool is not None:
+            yield self.pool
+            return
+        pool = ProcessPoolExecutor(
+            max_workers=self.jobs, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            yield pool
+        finally:
+            pool.shutdown()
 
-            self.docs[parts] = json.dumps(blob.to_json(), indent=2, sort_keys=True)
-            # data = p.read_bytes()
+    def check_memory(self) -> None:
+        """
+        Keep the resident memory of the process under ``self.max_memory``.
 
-    def write(self, where: Path):
+        The documents and figures held in memory are spilled to disk when the
+        process uses more than the limit, or when they alone use more than
+        a quarter of it. Past the limit, the caches of parsed docstrings and of
+        the inference engine are also dropped, and a garbage collection is
+        run. The objects themselves are released by `do_one_mod` as soon as
+        they are processed.
+
+        The peak size of the documents held in memory is recorded in the
+        report, with or without limit.
         """
-        Write a docbundle folder.
+        buffers = (self.data, self.bdata, self.docs, self.examples)
+        buffered = sum(buffer.size for buffer in buffers)
+        report = get_report()
+        report.record_buffered(buffered)
+        if self.max_memory is None:
+            return
+        rss = current_rss()
+        if rss <= self.max_memory and buffered <= self.max_memory // 4:
+            return
+        report.count("memory_spills")
+        for buffer in buffers:
+            report.count("spilled_bytes", buffer.spill())
+        if rss <= self.max_memory:
+            return
+        self._parse_cache.clear()
+        get_engine().clear_caches()
+        gc.collect()
+        rss = current_rss()
+        if rss > self.max_memory and not self._over_memory:
+            self._over_memory = True
+            self.log.warning(
+                "Using %s MB after dropping caches, more than --max-memory %s MB",
+                rss // 2**20,
+                self.max_memory // 2**20,
+            )
+
+    def open_bundle(self, where: Path, resume: bool = False):
         """
-        (where / "module").mkdir(exist_ok=True)
-        for k, v in self.data.items():
-            with (where / "module" / k).open("w") as f:
-                f.write(v)
+        Start streaming the docbundle to ``where``.
+
+        Data put before this call is flushed to the bundle; afterwards each
+        document and asset is written as soon as it is produced and not kept
+        in memory. The bundle at ``where`` is only replaced when
+        `commit_bundle` is called, see `BundleWriter`. If the name of ``where``
+        ends with ``.zip`` the bundle is written as a single zip file.
 
-        (where / "docs").mkdir(exist_ok=True)
+        The entries of the manifest are also journaled as they are completed;
+        with ``resume``, entries completed by a previous, interrupted, run
+        writing to the same bundle are reused if their digest did not change.
+        """
+        self._writer = bundle_writer(where, resume=resume)
+        if resume and not self._writer.completed:
+            self.log.info("Nothing to resume for %s, starting from scratch", where)
+        elif resume:
+            self._checkpoint = (self._writer.staging, self._writer.completed)
+            self.log.info(
+                "Resuming %s, %s entries already done",
+                where,
+                len(self._writer.completed),
+            )
+        for k, v in self.data.items():
+            self._writer.put_module(k, v)
         for k, v in self.docs.items():
-            subf = where / "docs"
-            for s in k[:-1]:
-                subf = subf / s
-            file = k[-1]
-            subf.mkdir(exist_ok=True)
-            with (subf / file).open("w") as f:
-                f.write(v)
-
-        (where / "examples").mkdir(exist_ok=True)
+            self._writer.put_doc(k, v)
         for k, v in self.examples.items():
-            with (where / "examples" / k).open("w") as f:
-                f.write(v)
-
-        assets = where / "assets"
-        assets.mkdir()
+            self._writer.put_example(k, v)
         for k, v in self.bdata.items():
-            with (assets / k).open("wb") as f:
-                f.write(v)
+            self._writer.put_asset(k, v)
+        self.data.clear()
+        self.docs.clear()
+        self.examples.clear()
+        self.bdata.clear()
+
+    def patch_bundle(self, where: Path):
+        """
+        Start writing to the existing bundle folder at ``where``, in place.
+
+        Only the entries matching ``self.only`` are processed, see
+        `matches_only`; `commit_bundle` then replaces them in the bundle, and
+        removes those of matching objects or files that are gone, see
+        `BundlePatcher`. Objects reused from this same bundle (see
+        `load_previous`) are not written again.
+        """
+        self._writer = BundlePatcher(where, self._is_patched)
+
+    def matches_only(self, key: str, aliases: Sequence[str] = ()) -> bool:
+        """
+        Whether the manifest entry ``key`` is regenerated: ``key`` or one of
+        the ``aliases`` of the object matches the ``self.only`` glob pattern.
+
+        The keys of API objects are their qualnames, those of narrative docs
+        and gallery examples are ``docs/<path>`` and ``examples/<name>``.
+        """
+        if self.only is None:
+            return True
+        return any(fnmatchcase(name, self.only) for name in [key, *aliases])
 
-        with (where / "papyri.json").open("w") as f:
-            f.write(json.dumps(self.metadata, indent=2, sort_keys=True))
+    def _is_patched(self, key: str) -> bool:
+        return key in self._patched or self.matches_only(key)
+
+    def _patching_previous(self) -> bool:
+        """
+        Whether the bundle being patched is the one items are reused from.
+        """
+        return (
+            isinstance(self._writer, BundlePatcher)
+            and self._previous is not None
+            and self._previous[0] == self._writer.where
+        )
+
+    def commit_bundle(self):
+        """
+        Write papyri.json and make the bundle opened with `open_bundle` current.
+        """
+        assert self._writer is not None
+        if len(self.symbols):
+            self._writer.put_meta("symbols.json", self.symbols.to_json())
+        metadata = self.metadata
+        if self.shard is not None:
+            # checked by merge_bundles.
+            metadata = dict(metadata, shard=list(self.shard))
+        self._writer.commit(self.manifest, metadata)
+        self._writer = None
+
+    def write(self, where: Path):
+        """
+        Write a docbundle folder.
+        """
+        self.open_bundle(where)
+        self.commit_bundle()
+
+    def load_previous(self, where: Path):
+        """
+        Load the manifest of a previously generated bundle.
+
+        Objects whose `item_digest` did not change since that bundle was
+        written will reuse the json and figures from it instead of being
+        processed again.
+
+        ``where`` is the bundle folder, a zipped bundle at ``<where>.zip`` is
+        used if there is no folder.
+        """
+        zipped = where.with_name(where.name + ".zip")
+        if not where.exists() and zipped.exists():
+            where = zipped
+        if not where.exists() or not read_bundle(where).exists("manifest.json"):
+            self.log.info("No previous manifest in %s, regenerating everything", where)
+            return
+        self._previous = (
+            where,
+            json.loads(read_bundle(where).read_text("manifest.json")),
+        )
+        self.log.info(
+            "Loaded manifest with %s items from %s", len(self._previous[1]), where
+        )
+
+    def config_digest(self, config: Config) -> str:
+        """
+        Hash of the configuration and versions that affect every object.
+        """
+        from . import __version__
+
+        conf = dataclasses.asdict(config)
+        del conf["dummy_progress"]
+        del conf["exec_cache_size"]
+        key = json.dumps([__version__, self.version, conf], sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _reuse(self, key: str, digest: str, member: Optional[str] = None):
+        """
+        Return the (json, figures) of manifest entry ``key`` if its digest is
+        unchanged in the checkpoint of an interrupted run (see `open_bundle`)
+        or in the previous bundle, None otherwise.
+
+        ``member`` is the path of the json in the bundle, ``key`` by default.
+        """
+        for source in (self._checkpoint, self._previous):
+            if source is None:
+                continue
+            where, manifest = source
+            entry = manifest.get(key)
+            if entry is None or entry["hash"] != digest:
+                continue
+            if where not in self._source_bundles:
+                self._source_bundles[where] = read_bundle(where)
+            bundle = self._source_bundles[where]
+            try:
+                data = bundle.read_text(member or key)
+                figs = [
+                    (name, bundle.read_bytes("assets/" + stored))
+                    for name, stored in entry["assets"].items()
+                ]
+            except (FileNotFoundError, KeyError):
+                self.log.warning("Incomplete %s for %s, regenerating", where, key)
+                continue
+            if source is self._checkpoint:
+                get_report().count("resumed")
+            return data, figs
+        return None
+
+    def _reuse_previous(self, qa: str, digest: str):
+        """
+        Return the (json, figures) of ``qa`` if it can be reused, see `_reuse`.
+        """
+        return self._reuse(qa, digest, "module/" + qa + ".json")
+
+    def _record(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Add an entry to the manifest, and to the checkpoint of the bundle.
+        """
+        self.manifest[key] = entry
+        if self._writer is not None:
+            self._writer.record(key, entry)
 
     def put(self, path: str, data):
         """
         put some json data at the given path
         """
-        self.data[path + ".json"] = data
+        if self._writer is not None:
+            self._writer.put_module(path + ".json", data)
+        else:
+            self.data[path + ".json"] = data
 
     def put_raw(self, path: str, data):
         """
         put some rbinary data at the given path.
         """
-        self.bdata[path] = data
+        if self._writer is not None:
+            self._writer.put_asset(path, data)
+        else:
+            self.bdata[path] = data
+
+    def put_doc(self, parts: Tuple[str, ...], data: str):
+        """
+        put the json of a narrative document, ``parts`` is its relative path.
+        """
+        if self._writer is not None:
+            self._writer.put_doc(parts, data)
+        else:
+            self.docs[parts] = data
+
+    def put_example(self, name: str, data: str):
+        """
+        put the json of a gallery example.
+        """
+        if self._writer is not None:
+            self._writer.put_example(name, data)
+        else:
+            self.examples[name] = data
+
+    def put_fig(self, name: str, data: bytes):
+        """
+        put a figure in the content addressed assets, see `asset_name`.
+
+        ``name`` is the name the figure was generated with, the mapping from
+        names to stored assets is kept in the ``assets`` field of papyri.json.
+        """
+        stored = asset_name(name, data)
+        if stored not in self._stored_assets:
+            self._stored_assets.add(stored)
+            self.put_raw(stored, data)
+        self.asset_names[name] = stored
 
     def do_one_item(
         self, target_item: Any, ndoc, *, qa: str, config: Config, aliases: List[str]
@@ -960,7 +1671,11 @@ class Gen:
 
         # try to find relative path WRT site package.
         # will not work for dev install. Maybe an option to set the root location ?
-        item_file = find_file(target_item)
+        located = self.sources.locate(target_item)
+        if located is not None:
+            item_file, item_line = located
+        else:
+            item_file = find_file(target_item)
         if item_file is not None:
             for s in SITE_PACKAGE + [os.path.expanduser("~")]:
                 if item_file.startswith(s):
@@ -987,9 +1702,10 @@ class Gen:
                     type(target_item).__name__,
                 )
 
-        item_type = str(type(target_item))
+        item_type = _item_type(target_item)
         try:
-            item_line = inspect.getsourcelines(target_item)[1]
+            if located is None:
+                item_line = inspect.getsourcelines(target_item)[1]
         except OSError:
             self.log.debug("Could not find item_line for %s, (OSERROR)", target_item)
         except TypeError:
@@ -1008,13 +1724,9 @@ class Gen:
                 )
 
         if not blob.content["Signature"]:
-            sig = None
-            try:
-                sig = str(inspect.signature(target_item))
+            sig = _signature(target_item)
+            if sig is not None:
                 sig = qa.split(".")[-1] + sig
-                sig = re.sub("at 0x[0-9a-f]+", "at 0x0000000", sig)
-            except (ValueError, TypeError):
-                pass
             # mutate argument ! BAD
             blob.content["Signature"] = sig
 
@@ -1029,7 +1741,14 @@ class Gen:
 
         try:
             ndoc.example_section_data, figs = get_example_data(
-                ndoc, obj=target_item, qa=qa, config=config, log=self.log
+                ndoc,
+                obj=target_item,
+                qa=qa,
+                config=config,
+                log=self.log,
+                aliases=aliases,
+                lookup=self._lookup,
+                exec_cache=self.exec_cache,
             )
             ndoc.figs = figs
         except Exception as e:
@@ -1050,7 +1769,15 @@ class Gen:
 
         blob.example_section_data = ndoc.example_section_data
         ndoc.refs.extend(refs)
-        ndoc.refs = [normalise_ref(r) for r in sorted(set(ndoc.refs))]
+        # in static mode, references unknown to the symbol tables are kept as
+        # is, normalise_ref imports them.
+        fallback = None if config.static else normalise_ref
+        ndoc.refs = [
+            self.symbols.normalise(
+                r, partial(self.dependency_symbols.normalise, fallback=fallback)
+            )
+            for r in sorted(set(ndoc.refs))
+        ]
         figs = ndoc.figs
         del ndoc.figs
 
@@ -1070,31 +1797,59 @@ class Gen:
             # TODO:fix
             blob.references = None
         blob.aliases = aliases
+        # the parsing only depends on the text of the docstring, and is shared
+        # by the objects with the same docstring, like inherited methods.
+        blob.content, blob.see_also = self._cached_parse(
+            "sections",
+            repr(blob.content),
+            lambda: self._parse_sections(blob.content, qa),
+        )
+        return blob, figs
+
+    def _parse_sections(
+        self, raw: Dict[str, Any], qa: str
+    ) -> Tuple[Dict[str, Any], List[SeeAlsoItem]]:
+        """
+        Parse the sections of a numpydoc docstring with tree-sitter.
+
+        Parameters
+        ----------
+        raw : dict
+            sections of the docstring as split by numpydoc; not modified.
+        qa : str
+            fully qualified name of the object, for error messages.
+
+        Returns
+        -------
+        content : dict
+            the sections, parsed.
+        see_also : list of SeeAlsoItem
+        """
+        report = get_report()
+        content = dict(raw)
         for section in ["Extended Summary", "Summary", "Notes", "Warnings"]:
             try:
-                data = blob.content.get(section, None)
+                data = content.get(section, None)
                 if data is None:
                     # don't exists
                     pass
                 elif not data:
                     # is empty
-                    blob.content[section] = Section()
+                    content[section] = Section()
                 else:
-                    tsc = ts.parse("\n".join(data).encode())
+                    with report.phase("ts_parse", qa):
+                        tsc = ts.parse("\n".join(data).encode())
                     assert len(tsc) in (0, 1), (tsc, data)
                     if tsc:
                         tssc = tsc[0]
                     else:
                         tssc = Section()
                     assert isinstance(tssc, Section)
-                    blob.content[section] = tssc
+                    content[section] = tssc
             except Exception:
                 self.log.exception(f"Skipping section {section!r} in {qa!r} (Error)")
                 raise
-        assert isinstance(blob.content["Summary"], Section)
-        assert isinstance(
-            blob.content.get("Summary", Section()), Section
-        ), blob.content["Summary"]
+        assert isinstance(content["Summary"], Section), content["Summary"]
 
         sections_ = [
             "Parameters",
@@ -1108,25 +1863,59 @@ class Gen:
             "Receives",
         ]
 
-        for s in set(sections_).intersection(blob.content.keys()):
-            assert isinstance(blob.content[s], list), f"{s}, {blob.content[s]} {qa} "
+        for s in set(sections_).intersection(content.keys()):
+            assert isinstance(content[s], list), f"{s}, {content[s]} {qa} "
             new_content = Section()
-            for param, type_, desc in blob.content[s]:
+            for param, type_, desc in content[s]:
                 assert isinstance(desc, list)
                 items = []
                 if desc:
                     try:
-                        items = P2(desc)
+                        with report.phase("ts_parse", qa):
+                            items = P2(desc)
                     except Exception as e:
                         raise type(e)(f"from {qa}")
                     for l in items:
                         assert not isinstance(l, Section)
                 new_content.append(Param(param, type_, desc=items).validate())
-            blob.content[s] = new_content
+            content[s] = new_content
 
-        blob.see_also = self._normalize_see_also(blob.content.get("See Also", None), qa)
-        del blob.content["See Also"]
-        return blob, figs
+        see_also = self._normalize_see_also(content.get("See Also", []), qa)
+        del content["See Also"]
+        return content, see_also
+
+    def _cached_parse(self, kind: str, text: str, parse: Callable[[], Any]) -> Any:
+        """
+        Return ``parse()``, computed once per ``kind`` and ``text`` in this run.
+
+        Many objects share the exact same docstring – inherited methods,
+        ufuncs, mirrored modules... – so the parsed IR is cached by hash of the
+        text, and a copy is returned as callers modify it. Hits and misses are
+        counted in the gen report.
+        """
+        key = (kind, hashlib.sha256(text.encode()).hexdigest())
+        report = get_report()
+        if key in self._parse_cache:
+            report.count("parse_cache_hits")
+        else:
+            report.count("parse_cache_misses")
+            self._parse_cache[key] = parse()
+        return copy.deepcopy(self._parse_cache[key])
+
+    def _lookup(self, name: str) -> Optional[Tuple[str, bool]]:
+        """
+        Canonical name of ``name`` and whether it is a class, for the
+        `StaticResolver` of examples.
+
+        The symbol tables of this package and its dependencies give the
+        canonical names, the objects already imported whether they are
+        classes.
+        """
+        found = live_lookup(name)
+        canonical = self.symbols.get(name) or self.dependency_symbols.get(name)
+        if canonical is None:
+            return found
+        return canonical, found is not None and found[1]
 
     def _normalize_see_also(self, see_also: List[Any], qa):
         """
@@ -1151,7 +1940,7 @@ class Gen:
 
         for nts, raw_description in see_also:
             try:
-                for (name, type_or_description) in nts:
+                for name, type_or_description in nts:
                     if type_or_description and not raw_description:
                         assert isinstance(type_or_description, str)
                         type_ = None
@@ -1177,17 +1966,146 @@ class Gen:
                 ) from e
         return new_see_also
 
+    def _exec_examples(self, examples: List[Path], config):
+        """
+        Execute gallery scripts.
+
+        With the fork server backend, or more than one job, each script runs in
+        its own child of the fork server (see `papyri.execution`), with at most
+        ``self.jobs`` running at the same time and a timeout of
+        ``config.exec_timeout`` per script; otherwise they run in this process.
+
+        Yields
+        ------
+        example : Path
+        script : str
+        ce_status : str
+            "None" when not executing, "execed", "exception_in_exec" or
+            "timeout".
+        figs : list of (name, bytes)
+            figures, as soon as each script completes.
+        """
+        report = get_report()
+
+        def fig_names(example, figs):
+            return [
+                (f"ex-{example.name}-{i}.{config.fig_format}", f)
+                for i, f in enumerate(figs)
+            ]
+
+        if not config.exec:
+            for example in examples:
+                yield example, example.read_text(), "None", []
+            return
+        if config.exec_backend != "forkserver" and self.jobs == 1:
+            for example in examples:
+                executor = BlockExecutor({})
+                script = example.read_text()
+                ce_status = "None"
+                figs = []
+                with executor:
+                    try:
+                        with report.phase("exec", example.name):
+                            executor.exec(script)
+                        with report.phase("figures", example.name):
+                            figs = fig_names(
+                                example,
+                                executor.get_figs(config.fig_format, config.fig_dpi),
+                            )
+                        ce_status = "execed"
+                    except Exception as e:
+                        if config.exec_failure != "fallback":
+                            raise type(e)(f"Within {example}")
+                        self.log.error("%s failed %s", example, type(e))
+                        ce_status = "exception_in_exec"
+                yield example, script, ce_status, figs
+            return
+
+        remote = get_executor(self.root, config, max_workers=self.jobs)
+
+        def run(example):
+            script = example.read_text()
+            start = time.perf_counter()
+            job = remote.submit(
+                None,
+                [],
+                [script],
+                wait_for_show=False,
+                fig_format=config.fig_format,
+                fig_dpi=config.fig_dpi,
+            )
+            try:
+                [(ce_status, figs)] = job.result(config.exec_failure == "fallback")
+            except ExampleExecutionError as e:
+                raise ExampleExecutionError(f"Within {example}\n{e}") from e
+            return (
+                script,
+                ce_status,
+                figs,
+                time.perf_counter() - start,
+                job.figures_time,
+            )
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            futures = {pool.submit(run, example): example for example in examples}
+            for future in as_completed(futures):
+                example = futures[future]
+                script, ce_status, figs, seconds, fig_seconds = future.result()
+                report.add_time("exec", seconds, example.name)
+                # included in "exec" as well, like with the examples of objects.
+                report.add_time("figures", fig_seconds, example.name)
+                if ce_status == TIMEOUT:
+                    self.log.error("%s timed out", example)
+                elif ce_status != "execed":
+                    self.log.error("%s failed", example)
+                yield example, script, ce_status, fig_names(example, figs)
+
     def collect_examples(self, folder, config):
-        acc = []
+        """
+        Execute, infer and highlight gallery scripts.
+
+        Scripts whose content and configuration did not change since the
+        previous bundle, or the interrupted run being resumed, are reused
+        without being executed.
+
+        Yields
+        ------
+        name : str
+        data : str
+            json of the example.
+        figs : list of (name, bytes)
+        digest : str
+            of the script and the configuration, for the manifest.
+        """
+        report = get_report()
         examples = list(folder.glob("**/*.py"))
 
         valid_examples = []
         for e in examples:
             if any(str(e).endswith(p) for p in config.examples_exclude):
                 continue
+            key = "examples/" + e.name
+            if not in_shard(key, self.shard) or not self.matches_only(key):
+                continue
             valid_examples.append(e)
         examples = valid_examples
 
+        config_digest = self.config_digest(config)
+        digests = {}
+        to_exec = []
+        for example in examples:
+            digest = hashlib.sha256(
+                config_digest.encode() + example.read_bytes()
+            ).hexdigest()
+            previous = self._reuse("examples/" + example.name, digest)
+            if previous is not None:
+                report.count("examples_reused")
+                yield (example.name,) + previous + (digest,)
+            else:
+                digests[example] = digest
+                to_exec.append(example)
+        examples = to_exec
+
         # TODO: resolve this path with respect the configuration file.
         # this is of course if we have configuration file.
         #        assert (
@@ -1204,50 +2122,32 @@ class Gen:
         with p() as p2:
             failed = []
             taskp = p2.add_task(description="Collecting examples", total=len(examples))
-            for example in examples:
+            for example, script, ce_status, figs in self._exec_examples(
+                examples, config
+            ):
                 p2.update(taskp, description=str(example).ljust(7))
                 p2.advance(taskp)
-                executor = BlockExecutor({})
-                script = example.read_text()
-                ce_status = "None"
-                figs = []
-                if config.exec:
-                    with executor:
-                        try:
-                            executor.exec(script)
-                            print(script)
-                            figs = [
-                                (f"ex-{example.name}-{i}.png", f)
-                                for i, f in enumerate(executor.get_figs())
-                            ]
-                            ce_status = "execed"
-                        except Exception as e:
-                            failed.append(str(example))
-                            if config.exec_failure == "fallback":
-                                self.log.error("%s failed %s", example, type(e))
-                            else:
-                                raise type(e)(f"Within {example}")
-                entries = list(
-                    parse_script(
-                        script,
-                        ns={},
-                        prev="",
-                        config=config,
-                    )
+                if ce_status in ("exception_in_exec", TIMEOUT):
+                    failed.append(str(example))
+                report.count("figures", len(figs))
+                entries = parse_script(
+                    script,
+                    ns={},
+                    prev="",
+                    config=config,
+                    qa=example.name,
+                    lookup=self._lookup,
                 )
                 s = Section(
-                    [Code(entries, "", ce_status)] + [Fig(name) for name, _ in figs]
+                    [Code(entries, "", ce_status)]
+                    + [Fig(asset_name(name, data)) for name, data in figs]
                 )
                 s = processed_example_data(s)
 
-                acc.append(
-                    (
-                        {example.name: s},
-                        figs,
-                    )
-                )
+                yield example.name, json.dumps(
+                    s.to_json(), indent=2, sort_keys=True
+                ), figs, digests[example]
         assert len(failed) == 0, failed
-        return acc
 
     def configure(self, root: str, config):
         """
@@ -1261,6 +2161,9 @@ class Gen:
 
         """
         assert "." not in root
+        if config.static:
+            self.version = static_version(root)
+            return StaticCollector(root, config.submodules)
         n0 = __import__(root)
         modules = [n0]
 
@@ -1287,19 +2190,22 @@ class Gen:
         self.log.debug("Example Folder: %s", examples_folder)
         if examples_folder is not None:
             examples_folder = Path(examples_folder).expanduser()
-            examples_data = self.collect_examples(
-                examples_folder,
-                config=config,
-            )
-            for edoc, figs in examples_data:
-                self.examples.update(
-                    {
-                        k: json.dumps(v.to_json(), indent=2, sort_keys=True)
-                        for k, v in edoc.items()
-                    }
-                )
-                for name, data in figs:
-                    self.put_raw(name, data)
+            with get_report().phase("examples"):
+                for name, data, figs, digest in self.collect_examples(
+                    examples_folder,
+                    config=config,
+                ):
+                    self.check_memory()
+                    self.put_example(name, data)
+                    for fig_name, fig in figs:
+                        self.put_fig(fig_name, fig)
+                    self._record(
+                        "examples/" + name,
+                        {
+                            "hash": digest,
+                            "assets": {n: asset_name(n, f) for n, f in figs},
+                        },
+                    )
 
     def helper_1(self, *, qa: str, target_item, failure_collection):
         """
@@ -1321,7 +2227,11 @@ class Gen:
         elif item_docstring is None and isinstance(target_item, ModuleType):
             item_docstring = """This module has no documentation"""
         try:
-            arbitrary = ts.parse(dedent_but_first(item_docstring).encode())
+            arbitrary = self._cached_parse(
+                "ts",
+                item_docstring,
+                lambda: ts.parse(dedent_but_first(item_docstring).encode()),
+            )
         except (AssertionError, NotImplementedError) as e:
             self.log.error("TS could not parse %s, %s", repr(qa), e)
             raise type(e)(f"from {qa}") from e
@@ -1333,6 +2243,10 @@ class Gen:
 
     def do_generic_info(self, root, relative_dir, config):
         self.root = root
+        if config.static:
+            self.version = static_version(root)
+        else:
+            self.version = getattr(importlib.import_module(root), "__version__", "???")
         if config.logo:
             self.put_raw("logo.png", (relative_dir / Path(config.logo)).read_bytes())
 
@@ -1349,12 +2263,12 @@ class Gen:
         ----------
         root : str
             module name to generate docbundle for.
-        exec_ : bool
-            Whether to try to execute the code blocks and embed resulting values like plots.
+        config : Config
+            current configuration
 
         See Also
         --------
-        do_one_item, do_one_iteration
+        do_one_item
 
         """
 
@@ -1366,8 +2280,166 @@ class Gen:
             TimeElapsedColumn(),
         )
 
+        report = get_report()
+        with report.phase("collect"):
+            collector, collected = self.collect(root, config)
+        report.count("collected", len(collected))
+        self.symbols = SymbolTable.from_collector(collector)
+        if self.exec_cache is not None:
+            self.exec_cache.set_symbols(self.symbols, self.dependency_symbols)
+
+        known_refs = frozenset(
+            {RefInfo(root, self.version, "module", qa) for qa in collected.keys()}
+        )
+        config_digest = self.config_digest(config)
+        known_digest = refs_digest(known_refs)
+        if self.shard is not None:
+            # references, symbols and aliases are still those of the whole
+            # package, so that merged shards are identical to a single run.
+            collected = {k: v for k, v in collected.items() if in_shard(k, self.shard)}
+            self.log.info(
+                "Shard %s/%s: processing %s items", *self.shard, len(collected)
+            )
+        if self.only is not None:
+            collected = {
+                k: v
+                for k, v in collected.items()
+                if self.matches_only(k, collector.aliases[k])
+            }
+            self._patched.update(collected)
+            self.log.info(
+                "Regenerating %s items matching %s", len(collected), self.only
+            )
+        all_aliases = collector.aliases
+        # only the aliases are needed from now on, and the collector can hold
+        # much more, like the syntax trees of the static collector; objects
+        # are also released as soon as they are processed, see check_memory.
+        del collector
+        total = len(collected)
+
+        with p() as p2:
+
+            # just nice display of progression.
+            taskp = p2.add_task(description="parsing", total=total)
+
+            failure_collection: Dict[str, List[str]] = defaultdict(lambda: [])
+
+            if self.jobs > 1:
+                results = self._do_items_parallel(
+                    root,
+                    [(qa, all_aliases[qa]) for qa in collected.keys()],
+                    config,
+                    known_refs,
+                    config_digest,
+                    known_digest,
+                )
+                collected.clear()
+            else:
+                results = (
+                    (
+                        qa,
+                        self.do_one_qa(
+                            qa,
+                            collected.pop(qa),
+                            config=config,
+                            aliases=all_aliases[qa],
+                            known_refs=known_refs,
+                            failure_collection=failure_collection,
+                            config_digest=config_digest,
+                            refs_digest=known_digest,
+                        ),
+                    )
+                    for qa in list(collected)
+                )
+
+            reused = 0
+            in_place = self._patching_previous()
+            for qa, res in results:
+                p2.update(taskp, description=qa)
+                p2.advance(taskp)
+                self.check_memory()
+                if res is None:
+                    continue
+                data, figs, digest, was_reused = res
+                reused += was_reused
+                with report.phase("write", qa):
+                    if not (was_reused and in_place):
+                        self.put(qa, data)
+                    for name, fig in figs:
+                        self.put_fig(name, fig)
+                    self._record(
+                        qa,
+                        {
+                            "hash": digest,
+                            "assets": {
+                                name: asset_name(name, fig) for name, fig in figs
+                            },
+                        },
+                    )
+            if self._previous is not None:
+                self.log.info("Reused %s/%s items from previous bundle", reused, total)
+            engine = get_engine()
+            if engine.totals["blocks"]:
+                self.log.debug(
+                    "Inferred %d example blocks in %.2fs, slowest:",
+                    engine.totals["blocks"],
+                    engine.totals["seconds"],
+                )
+                for t in engine.slowest:
+                    self.log.debug(
+                        "  %s: %s tokens, %s inferred in %.3fs",
+                        t["qa"],
+                        t["tokens"],
+                        t["inferred"],
+                        t["seconds"],
+                    )
+            engine.reset_timings()
+            for k, v in self._worker_failures.items():
+                failure_collection[k].extend(v)
+            if failure_collection:
+                self.log.info(
+                    "The following parsing failed \n%s",
+                    json.dumps(failure_collection, indent=2, sort_keys=True),
+                )
+            found = {}
+            not_found = []
+            for k, v in all_aliases.items():
+                if [item for item in v if item != k]:
+                    if shorter := find_cannonical(k, v):
+                        found[k] = shorter
+                    else:
+                        not_found.append((k, v))
+
+            self.metadata = {
+                "version": self.version,
+                "logo": "logo.png",
+                "aliases": found,
+                "module": self.root,
+                "assets": self.asset_names,
+            }
+
+    def collect(
+        self, root: str, config: Config
+    ) -> Tuple[Union[DFSCollector, StaticCollector], Dict[str, Any]]:
+        """
+        Collect all the items of ``root`` we want to document.
+
+        Returns
+        -------
+        collector : DFSCollector or StaticCollector
+            collector used to find the items, it also holds the aliases.
+        collected : dict
+            mapping from fully qualified name to object, minus the items
+            excluded by the configuration.
+        """
         collector = self.configure(root, config)
+        now = time.perf_counter()
         collected: Dict[str, Any] = collector.items()
+        self.log.info(
+            "Collected %s items in %.2fs", len(collected), time.perf_counter() - now
+        )
+        for sub, count, duration in collector.stats()[:10]:
+            self.log.debug("  %s: %s objects in %.3fs", sub, count, duration)
 
         self.log.debug("Configuration: %s", config)
 
@@ -1388,117 +2460,355 @@ class Gen:
             )
 
         collected = {k: v for k, v in collected.items() if k not in excluded}
+        return collector, collected
 
-        known_refs = frozenset(
-            {RefInfo(root, self.version, "module", qa) for qa in collected.keys()}
-        )
-
-        with p() as p2:
-
-            # just nice display of progression.
-            taskp = p2.add_task(description="parsing", total=len(collected))
+    def do_one_qa(
+        self,
+        qa: str,
+        target_item: Any,
+        *,
+        config: Config,
+        aliases: List[str],
+        known_refs,
+        failure_collection: Dict[str, List[str]],
+        config_digest: str,
+        refs_digest: str,
+    ) -> Optional[Tuple[str, List[Tuple[str, bytes]], str, bool]]:
+        """
+        Process a single collected object, from docstring to serialised json.
 
-            failure_collection: Dict[str, List[str]] = defaultdict(lambda: [])
+        Parameters
+        ----------
+        qa : str
+            fully qualified name of the object
+        target_item : any
+            the object itself
+        config : Config
+            current configuration
+        aliases : list of str
+            aliases of the object found by the collector
+        known_refs : frozenset of RefInfo
+            all the references found in current package
+        failure_collection : dict
+            mutable mapping of failure kinds to qualnames, updated in place.
+        config_digest : str
+            digest of the current configuration, see `config_digest`.
+        refs_digest : str
+            digest of ``known_refs``, see `refs_digest`.
 
-            for qa, target_item in collected.items():
-                p2.update(taskp, description=qa)
-                p2.advance(taskp)
+        Returns
+        -------
+        None if the object has nothing to document, otherwise a tuple with the
+        serialised DocBlob, a list of (name, bytes) figures, the `item_digest`
+        of the object, and whether the result was reused from the previous
+        bundle.
 
-                try:
+        See Also
+        --------
+        do_one_item, do_one_mod
+        """
+        report = get_report()
+        report.count("items")
+        with report.phase("item", qa):
+            digest = item_digest(
+                target_item,
+                config_digest=config_digest,
+                refs_digest=refs_digest,
+                aliases=aliases,
+                sources=self.sources,
+            )
+            previous = self._reuse_previous(qa, digest)
+            if previous is not None:
+                report.count("reused")
+                return previous + (digest, True)
+            try:
+                with report.phase("ts_parse", qa):
                     item_docstring, arbitrary = self.helper_1(
                         qa=qa,
                         target_item=target_item,
                         # mutable, not great.
                         failure_collection=failure_collection,
                     )
-                except Exception as e:
-                    failure_collection["ErrorHelper1-" + str(type(e))].append(qa)
-                    raise
-                    # continue
+            except Exception as e:
+                failure_collection["ErrorHelper1-" + str(type(e))].append(qa)
+                raise
+                # continue
 
-                try:
-                    if item_docstring is None:
-                        continue
-                    else:
-                        ndoc = NumpyDocString(dedent_but_first(item_docstring))
-                except Exception as e:
-                    if not isinstance(target_item, ModuleType):
-                        self.log.exception(
-                            "Unexpected error parsing %s – %s",
-                            qa,
-                            target_item.__name__,
+            try:
+                if item_docstring is None:
+                    return None
+                else:
+                    with report.phase("numpydoc", qa):
+                        ndoc = self._cached_parse(
+                            "numpydoc",
+                            item_docstring,
+                            lambda: NumpyDocString(dedent_but_first(item_docstring)),
                         )
-                        failure_collection["NumpydocError-" + str(type(e))].append(qa)
-                    if isinstance(target_item, ModuleType):
-                        # TODO: ndoc-placeholder : remove placeholder here
-                        ndoc = NumpyDocString(f"To remove in the future –– {qa}")
-                    else:
-                        continue
+            except Exception as e:
                 if not isinstance(target_item, ModuleType):
-                    arbitrary = []
-                ex = config.exec
-                if config.exec and any(
-                    qa.startswith(pat) for pat in config.execute_exclude_patterns
-                ):
-                    ex = False
-                dv = DirectiveVisiter(qa, known_refs, local_refs={}, aliases={})
-
-                try:
-                    # TODO: ndoc-placeholder : make sure ndoc placeholder handled here.
-                    doc_blob, figs = self.do_one_item(
-                        target_item,
-                        ndoc,
-                        qa=qa,
-                        config=config.replace(exec=ex),
-                        aliases=collector.aliases[qa],
+                    self.log.exception(
+                        "Unexpected error parsing %s – %s",
+                        qa,
+                        target_item.__name__,
                     )
-                    doc_blob.arbitrary = [dv.visit(s) for s in arbitrary]
-                except Exception as e:
-                    self.log.error("Execution error in %s", repr(qa))
-                    failure_collection["ExecError-" + str(type(e))].append(qa)
-                    # continue
-                    raise
-
-                doc_blob.example_section_data = dv.visit(doc_blob.example_section_data)
+                    failure_collection["NumpydocError-" + str(type(e))].append(qa)
+                if isinstance(target_item, ModuleType):
+                    # TODO: ndoc-placeholder : remove placeholder here
+                    ndoc = NumpyDocString(f"To remove in the future –– {qa}")
+                else:
+                    return None
+            if not isinstance(target_item, ModuleType):
+                arbitrary = []
+            ex = config.exec
+            if config.exec and any(
+                qa.startswith(pat) for pat in config.execute_exclude_patterns
+            ):
+                ex = False
+            dv = DirectiveVisiter(qa, known_refs, local_refs={}, aliases={})
 
-                # eg, dask: str, dask.array.gufunc.apply_gufun: List[str]
-                assert isinstance(doc_blob.references, (list, str, type(None))), (
-                    repr(doc_blob.references),
-                    qa,
+            try:
+                # TODO: ndoc-placeholder : make sure ndoc placeholder handled here.
+                doc_blob, figs = self.do_one_item(
+                    target_item,
+                    ndoc,
+                    qa=qa,
+                    config=config.replace(exec=ex),
+                    aliases=aliases,
                 )
+                doc_blob.arbitrary = [dv.visit(s) for s in arbitrary]
+            except Exception as e:
+                self.log.error("Execution error in %s", repr(qa))
+                failure_collection["ExecError-" + str(type(e))].append(qa)
+                # continue
+                raise
+
+            doc_blob.example_section_data = dv.visit(doc_blob.example_section_data)
+
+            # eg, dask: str, dask.array.gufunc.apply_gufun: List[str]
+            assert isinstance(doc_blob.references, (list, str, type(None))), (
+                repr(doc_blob.references),
+                qa,
+            )
 
-                if isinstance(doc_blob.references, str):
-                    print(repr(doc_blob.references))
-                doc_blob.references = None
+            if isinstance(doc_blob.references, str):
+                print(repr(doc_blob.references))
+            doc_blob.references = None
 
-                # end processing
+            # end processing
+            with report.phase("serialize", qa):
                 try:
                     doc_blob.validate()
                 except Exception as e:
                     raise type(e)(f"Error in {qa}")
-                self.put(qa, json.dumps(doc_blob.to_json(), indent=2, sort_keys=True))
-                for name, data in figs:
-                    self.put_raw(name, data)
-            if failure_collection:
-                self.log.info(
-                    "The following parsing failed \n%s",
-                    json.dumps(failure_collection, indent=2, sort_keys=True),
+                data = json.dumps(doc_blob.to_json(), indent=2, sort_keys=True)
+            return data, figs, digest, False
+
+    def _do_items_parallel(
+        self,
+        root: str,
+        items,
+        config: Config,
+        known_refs,
+        config_digest: str,
+        refs_digest: str,
+    ):
+        """
+        Process the given items on a pool of ``self.jobs`` worker processes.
+
+        Each worker imports and collects ``root`` once (see `_worker_init`), so
+        only qualnames and serialised results cross process boundaries.
+        Results are yielded in the order of ``items`` so that the generated
+        bundle is identical to a serial run.
+
+        Parameters
+        ----------
+        root : str
+            root module name
+        items : list of (str, list of str)
+            qualnames to process, with their aliases.
+        config : Config
+            current configuration
+        known_refs : frozenset of RefInfo
+            all the references found in current package
+        config_digest : str
+            digest of the current configuration, see `config_digest`.
+        refs_digest : str
+            digest of ``known_refs``, see `refs_digest`.
+        """
+        self.log.info("Processing %s items with %s workers", len(items), self.jobs)
+        chunksize = max(1, len(items) // (self.jobs * 8))
+        chunks = [items[i : i + chunksize] for i in range(0, len(items), chunksize)]
+        with tempfile.TemporaryDirectory() as tmp, self._worker_pool() as pool:
+            # the workers may outlive this package when the pool is shared, so
+            # they (re)initialise from this file when they see a new one.
+            state = Path(tmp) / "state.pickle"
+            state.write_bytes(
+                pickle.dumps(
+                    (
+                        root,
+                        config,
+                        known_refs,
+                        config_digest,
+                        refs_digest,
+                        self._previous,
+                        self._checkpoint,
+                        self.symbols,
+                        self.dependency_symbols,
+                        self.exec_cache,
+                        self.max_memory,
+                        self.log.level,
+                    )
                 )
-            found = {}
-            not_found = []
-            for k, v in collector.aliases.items():
-                if [item for item in v if item != k]:
-                    if shorter := find_cannonical(k, v):
-                        found[k] = shorter
-                    else:
-                        not_found.append((k, v))
+            )
+            for chunk_results, failures, report in _ordered_map(
+                pool,
+                partial(_worker_do_chunk, str(state)),
+                chunks,
+                self.jobs * 2,
+            ):
+                for k, v in failures.items():
+                    self._worker_failures[k].extend(v)
+                get_report().merge(report)
+                yield from chunk_results
 
-            self.metadata = {
-                "version": self.version,
-                "logo": "logo.png",
-                "aliases": found,
-                "module": self.root,
-            }
+
+def _do_one_doc(content: bytes) -> Tuple[str, float]:
+    """
+    Parse a narrative doc file, return its json and the time it took.
+    """
+    start = time.perf_counter()
+    blob = DocBlob()
+    blob.arbitrary = ts.parse(content)
+    blob.content = {}
+
+    blob.ordered_sections = []
+    blob.item_file = None
+    blob.item_line = None
+    blob.item_type = None
+    blob.aliases = []
+    blob.example_section_data = Section()
+    blob.see_also = []
+    blob.signature = None
+    blob.references = None
+    blob.refs = []
+
+    data = json.dumps(blob.to_json(), indent=2, sort_keys=True)
+    return data, time.perf_counter() - start
+
+
+def _ordered_map(pool, fn, items: Sequence[Any], in_flight: int):
+    """
+    Like ``pool.map(fn, items)``, but only submit ``in_flight`` items ahead of
+    the result being consumed, so that results waiting for an earlier slow
+    item do not pile up in memory.
+    """
+    pending = deque(pool.submit(fn, item) for item in items[:in_flight])
+    queued = iter(items[in_flight:])
+    while pending:
+        result = pending.popleft().result()
+        for item in itertools.islice(queued, 1):
+            pending.append(pool.submit(fn, item))
+        yield result
+
+
+# per process state of the gen workers, see Gen._do_items_parallel
+_worker_state: Dict[str, Any] = {}
+
+
+def _worker_init(
+    root: str,
+    config: Config,
+    known_refs,
+    config_digest: str,
+    refs_digest: str,
+    previous,
+    checkpoint,
+    symbols: SymbolTable,
+    dependency_symbols: SymbolTable,
+    exec_cache: Optional[ExecCache],
+    max_memory: Optional[int],
+    level,
+) -> None:
+    """
+    Initialise a gen worker process: import and collect ``root`` once.
+    """
+    g = Gen(dummy_progress=True)
+    g.log.setLevel(level)
+    g.root = root
+    g._previous = previous
+    g._checkpoint = checkpoint
+    g.symbols = symbols
+    g.dependency_symbols = dependency_symbols
+    g.exec_cache = exec_cache
+    g.max_memory = max_memory
+    _, collected = g.collect(root, config)
+    _worker_state["gen"] = g
+    _worker_state["collected"] = collected
+    _worker_state["config"] = config
+    _worker_state["known_refs"] = known_refs
+    _worker_state["config_digest"] = config_digest
+    _worker_state["refs_digest"] = refs_digest
+    # only report the processing of items, the main process collects too.
+    get_report().reset()
+
+
+def _resolve_qa(qa: str, aliases: List[str]) -> Any:
+    """
+    Find an object from its fully qualified name or one of its aliases.
+
+    The collection in a worker may differ slightly from the main process, as it
+    depends on which submodules happened to be imported; this imports the
+    longest module prefix and walks the remaining attributes.
+    """
+    for candidate in [qa] + aliases:
+        parts = candidate.split(".")
+        for i in range(len(parts), 0, -1):
+            try:
+                obj = importlib.import_module(".".join(parts[:i]))
+            except ImportError:
+                continue
+            try:
+                for attr in parts[i:]:
+                    obj = getattr(obj, attr)
+            except AttributeError:
+                break
+            return obj
+    raise KeyError(qa)
+
+
+def _worker_do_chunk(state: str, items: List[Tuple[str, List[str]]]):
+    """
+    Process a chunk of (qualname, aliases) in a gen worker process.
+
+    ``state`` is the path of the pickled arguments of `_worker_init` for the
+    current package.
+    """
+    if _worker_state.get("state") != state:
+        _worker_init(*pickle.loads(Path(state).read_bytes()))
+        _worker_state["state"] = state
+    g = _worker_state["gen"]
+    collected = _worker_state["collected"]
+    failure_collection: Dict[str, List[str]] = defaultdict(lambda: [])
+    results = []
+    for qa, aliases in items:
+        g.check_memory()
+        if qa in collected:
+            # each item is processed once, see Gen.check_memory
+            target_item = collected.pop(qa)
+        else:
+            target_item = _resolve_qa(qa, aliases)
+        res = g.do_one_qa(
+            qa,
+            target_item,
+            config=_worker_state["config"],
+            aliases=aliases,
+            known_refs=_worker_state["known_refs"],
+            failure_collection=failure_collection,
+            config_digest=_worker_state["config_digest"],
+            refs_digest=_worker_state["refs_digest"],
+        )
+        results.append((qa, res))
+    return results, dict(failure_collection), get_report().pop_state()
 
 
 def is_private(path):
@@ -1,8 +1,9 @@
 import json
+import os
 import sqlite3
 from collections import namedtuple
 from pathlib import Path as _Path
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Set, Tuple
 
 
 class Path:
@@ -80,6 +81,11 @@ class GraphStore:
     One more question is about the dangling documents? Like document we have references to,
     but do not exist yet, and a bunch of other stuff.
 
+    Writers append the keys of the documents they changed to a journal, see
+    `record_changes`, which lets a running ``papyri serve`` drop the pages it
+    cached for them. The journal is emptied when any document may have changed,
+    like after a full ingest, so it only grows with partial ingests.
+
     """
 
     def __init__(self, root: _Path, link_finder=None):
@@ -101,6 +107,7 @@ class GraphStore:
         assert isinstance(root, _Path)
         self._root = Path(root)
         self._link_finder = link_finder
+        self._journal = root / "changes.jsonl"
 
     def _key_to_paths(self, key: Key) -> Tuple[Path, Path]:
         """
@@ -148,9 +155,14 @@ class GraphStore:
 
     def remove(self, key: Key) -> None:
         data, backrefs = self._key_to_paths(key)
+        if "assets" not in key and data.exists():
+            old = json.loads(data.read_bytes().decode())
+            for b in old.get("refs", []):
+                ref = Key(b["module"], b["version"], b["kind"], b["path"])
+                self._remove_edge(key, ref)
         data.unlink()
         #  this is likely incorrect if we want to deal with dangling links.
-        backrefs.unlink()
+        backrefs.path.unlink(missing_ok=True)
         print("Removign link from table")
         self.table.execute(
             "delete from links where source=?",
@@ -284,6 +296,58 @@ class GraphStore:
                     (str(key), str(refkey), "debug"),
                 )
 
+    def record_changes(self, keys: Optional[Iterable[Key]]) -> None:
+        """
+        Journal the keys of documents that were put or removed, ``None`` when
+        any document may have changed, like after a full ingest; see
+        `changes`.
+
+        With ``None`` the previous entries don't matter anymore, and the
+        journal is replaced by an empty one.
+        """
+        if keys is None:
+            tmp = self._journal.with_name(self._journal.name + ".tmp")
+            tmp.write_text("")
+            os.replace(tmp, self._journal)
+            return
+        with self._journal.open("a") as f:
+            f.write(json.dumps(sorted(set(keys))) + "\n")
+
+    def changes(
+        self, cursor: Tuple[int, int] = (0, 0)
+    ) -> Tuple[Tuple[int, int], List[Optional[Set[Key]]]]:
+        """
+        Entries journaled by `record_changes` after ``cursor``, and the cursor
+        of the end of the journal.
+
+        A cursor is the inode of the journal file and an offset in it. An entry
+        is a set of keys, or ``None`` if anything may have changed, which is
+        the only entry returned when the journal was replaced since ``cursor``.
+        """
+        try:
+            stat = self._journal.stat()
+            end = (stat.st_ino, stat.st_size)
+        except FileNotFoundError:
+            end = (0, 0)
+        if end == cursor:
+            return cursor, []
+        inode, offset = cursor
+        if inode == 0:
+            # there was no journal yet.
+            inode = end[0]
+        if end[0] != inode or end[1] < offset:
+            return end, [None]
+        with self._journal.open("rb") as f:
+            f.seek(offset)
+            data = f.read(end[1] - offset)
+        # a line may be written concurrently, keep it for the next call.
+        complete = data[: data.rfind(b"\n") + 1]
+        entries: List[Optional[Set[Key]]] = []
+        for line in complete.decode().splitlines():
+            keys = json.loads(line)
+            entries.append(None if keys is None else {Key(*k) for k in keys})
+        return (inode, offset + len(complete)), entries
+
     def glob(self, pattern) -> List[Key]:
         acc = ""
         for p in pattern:
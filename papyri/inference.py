@@ -0,0 +1,508 @@
+"""
+Type inference of the tokens of example code blocks.
+
+Each example block is tokenized once with Pygments, every identifier is resolved
+to a fully qualified name with Jedi, taking into account the previous blocks of
+the same docstring, and every token gets the css class used for highlighting.
+
+The `InferenceEngine` keeps the lexer, the formatter, and the Jedi project and
+environment alive across blocks and objects, so that they are only created once
+per process.
+
+Most identifiers of examples are names imported at the top of the example,
+attribute chains on them like ``np.linalg.norm``, or builtins; with a
+``lookup`` of known names, the `StaticResolver` resolves them from the
+import statements of the examples, and only the other identifiers are
+inferred with Jedi.
+"""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import heapq
+import itertools
+import keyword
+import re
+import sys
+import time
+import warnings
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import jedi
+from jedi.api.environment import InterpreterEnvironment
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import PythonLexer
+
+
+class LineIndex:
+    """
+    Map offsets in a string to (line, column), both 0-based.
+
+    This is equivalent to `papyri.utils.pos_to_nl`, but precomputes the start
+    of each line so that each lookup is a bisection instead of a scan of the
+    whole script.
+    """
+
+    def __init__(self, text: str):
+        self._starts = [0]
+        start = text.find("\n")
+        while start != -1:
+            self._starts.append(start + 1)
+            start = text.find("\n", start + 1)
+
+    def __call__(self, offset: int) -> Tuple[int, int]:
+        line = bisect_right(self._starts, offset) - 1
+        return line, offset - self._starts[line]
+
+
+# fully qualified name of an object -> (canonical name, whether it is a class)
+Lookup = Callable[[str], Optional[Tuple[str, bool]]]
+
+
+def live_ref(obj) -> Optional[Tuple[str, bool]]:
+    """
+    Fully qualified name of a module, class or function, and whether it is a
+    class; None for other objects.
+    """
+    if isinstance(obj, ModuleType):
+        return obj.__name__, False
+    try:
+        module = getattr(obj, "__module__", None)
+        qualname = getattr(obj, "__qualname__", None)
+        if not callable(obj) or not isinstance(module, str):
+            return None
+        if not isinstance(qualname, str) or "<" in qualname:
+            return None
+        return module + "." + qualname, isinstance(obj, type)
+    except Exception:
+        return None
+
+
+def live_lookup(name: str) -> Optional[Tuple[str, bool]]:
+    """
+    `Lookup` of the objects of the modules already imported, see `live_ref`;
+    no module is imported.
+    """
+    parts = name.split(".")
+    for i in range(len(parts), 0, -1):
+        obj = sys.modules.get(".".join(parts[:i]))
+        if obj is not None:
+            break
+    else:
+        return None
+    for attr in parts[i:]:
+        try:
+            obj = getattr(obj, attr)
+        except Exception:
+            return None
+    return live_ref(obj)
+
+
+def _char_col(line: str, byte_col: int) -> int:
+    # ast offsets are in utf-8 bytes, pygments' in characters.
+    if line.isascii():
+        return byte_col
+    return len(line.encode()[:byte_col].decode(errors="ignore"))
+
+
+class StaticResolver:
+    """
+    Resolve the identifiers of a script from its import statements, without
+    Jedi.
+
+    Only names bound once in the script are resolved: imported names, and
+    instances of known classes (``x = Thing()``), as well as attribute chains
+    on the imported modules and classes. Names not bound in the script are
+    looked up in ``ns``, then in builtins.
+
+    Parameters
+    ----------
+    code : str
+        the script, with the previous blocks of the same docstring.
+    lookup : Lookup
+        fully qualified names of known objects.
+    ns : dict, optional
+        namespace the script runs in.
+
+    Attributes
+    ----------
+    refs : dict
+        (line, column) of an identifier, both 0-based -> fully qualified name.
+    """
+
+    def __init__(self, code: str, lookup: Lookup, ns: Optional[Dict[str, Any]] = None):
+        self.refs: Dict[Tuple[int, int], str] = {}
+        self._lookup = lookup
+        self._lines = code.split("\n")
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return
+        counts, star = self._count_bindings(tree)
+        # name -> (fully qualified name, is a class, is an instance)
+        bound: Dict[str, Tuple[str, bool, bool]] = {}
+        for stmt in tree.body:
+            if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                bound.update(self._import(stmt))
+            elif (
+                isinstance(stmt, ast.Assign)
+                and len(stmt.targets) == 1
+                and isinstance(stmt.targets[0], ast.Name)
+                and isinstance(stmt.value, ast.Call)
+            ):
+                cls = self._chain(stmt.value.func, bound)
+                if cls is not None and cls[1]:
+                    bound[stmt.targets[0].id] = (cls[0], False, True)
+        bound = {k: v for k, v in bound.items() if counts[k] == 1}
+        if not star:
+            for name in {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}:
+                if counts[name]:
+                    continue
+                if ns and name in ns:
+                    found = live_ref(ns[name])
+                elif hasattr(builtins, name):
+                    found = live_ref(getattr(builtins, name))
+                else:
+                    found = None
+                if found is not None:
+                    bound[name] = found + (False,)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id in bound:
+                self._add(node.lineno, node.col_offset, bound[node.id][0])
+            elif isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load):
+                found = self._chain(node, bound)
+                if found is not None:
+                    assert node.end_lineno is not None
+                    assert node.end_col_offset is not None
+                    self._add(
+                        node.end_lineno,
+                        node.end_col_offset - len(node.attr.encode()),
+                        found[0],
+                    )
+
+    @staticmethod
+    def _count_bindings(tree: ast.AST) -> Tuple[Counter, bool]:
+        """
+        Number of bindings of each name, and whether there is a star import.
+        """
+        counts: Counter = Counter()
+        star = False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+                counts[node.id] += 1
+            elif isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                counts[node.name] += 1
+            elif isinstance(node, ast.arg):
+                counts[node.arg] += 1
+            elif isinstance(node, ast.alias):
+                if node.name == "*":
+                    star = True
+                counts[(node.asname or node.name).split(".")[0]] += 1
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                counts[node.name] += 1
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                counts.update({name: 2 for name in node.names})
+            elif sys.version_info < (3, 10):
+                # no match statement.
+                continue
+            elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+                counts[node.name] += 1
+            elif isinstance(node, ast.MatchMapping) and node.rest:
+                counts[node.rest] += 1
+        return counts, star
+
+    def _add(self, lineno: int, byte_col: int, ref: str) -> None:
+        line = lineno - 1
+        self.refs[(line, _char_col(self._lines[line], byte_col))] = ref
+
+    def _chain(self, node, bound) -> Optional[Tuple[str, bool]]:
+        """
+        Fully qualified name of a name or attribute chain, and whether it is
+        a class.
+        """
+        if isinstance(node, ast.Name):
+            found = bound.get(node.id)
+            if found is None or found[2]:
+                # attributes of instances are left to jedi.
+                return None
+            return found[:2]
+        if isinstance(node, ast.Attribute):
+            base = self._chain(node.value, bound)
+            if base is not None:
+                return self._lookup(base[0] + "." + node.attr)
+        return None
+
+    def _import(self, node) -> Dict[str, Tuple[str, bool, bool]]:
+        """
+        Resolve the tokens of an import statement, and return the names it
+        binds.
+        """
+        bound: Dict[str, Tuple[str, bool, bool]] = {}
+        # (expected word, fully qualified name of the token)
+        words: List[Tuple[str, Optional[str]]] = []
+        if isinstance(node, ast.Import):
+            words.append(("import", None))
+            for alias in node.names:
+                parts = alias.name.split(".")
+                for i, part in enumerate(parts):
+                    words.append((part, ".".join(parts[: i + 1])))
+                if alias.asname:
+                    words += [("as", None), (alias.asname, alias.name)]
+                    binding = alias.name
+                else:
+                    binding = parts[0]
+                found = self._lookup(binding)
+                if found is not None:
+                    bound[alias.asname or parts[0]] = found + (False,)
+        else:
+            if node.level or not node.module:
+                return {}
+            words.append(("from", None))
+            parts = node.module.split(".")
+            for i, part in enumerate(parts):
+                words.append((part, ".".join(parts[: i + 1])))
+            words.append(("import", None))
+            for alias in node.names:
+                if alias.name == "*":
+                    continue
+                name = node.module + "." + alias.name
+                words.append((alias.name, name))
+                if alias.asname:
+                    words += [("as", None), (alias.asname, name)]
+                found = self._lookup(name)
+                if found is not None:
+                    bound[alias.asname or alias.name] = found + (False,)
+
+        found_words: List[Tuple[int, int, str]] = []
+        for lineno in range(node.lineno, node.end_lineno + 1):
+            line = self._lines[lineno - 1]
+            start = _char_col(line, node.col_offset) if lineno == node.lineno else 0
+            end = (
+                _char_col(line, node.end_col_offset)
+                if lineno == node.end_lineno
+                else len(line)
+            )
+            text = line[:end].split("#")[0]
+            for m in re.finditer(r"[^\W\d]\w*", text[start:]):
+                found_words.append((lineno - 1, start + m.start(), m.group()))
+        if [w for _, _, w in found_words] != [w for w, _ in words]:
+            return bound
+        for (row, col, _), (_, name) in zip(found_words, words):
+            if name is None:
+                continue
+            found = self._lookup(name)
+            if found is not None:
+                self.refs[(row, col)] = found[0]
+        return bound
+
+
+class InferenceEngine:
+    """
+    Tokenize example blocks, infer the fully qualified names of identifiers, and
+    find the css class of each token.
+
+    Attributes
+    ----------
+    last : dict
+        timing of the last inferred block: qualified name of the object the
+        block is from, number of tokens, number of identifiers for which Jedi
+        inference was run, number of identifiers resolved without Jedi, and
+        duration in seconds.
+    totals : dict
+        the same numbers summed over the blocks inferred since
+        `reset_timings`, and the number of blocks.
+    """
+
+    #: number of timings kept by `slowest`
+    SLOWEST = 10
+
+    def __init__(self):
+        self._lexer = PythonLexer()
+        self._ttype2class = HtmlFormatter().ttype2class
+        self._project = None
+        self._environment = None
+        self.last: Dict[str, Any] = {}
+        self.totals: Dict[str, float] = defaultdict(float)
+        # min-heap of (seconds, order, timing), see slowest
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._order = itertools.count()
+
+    @property
+    def project(self):
+        if self._project is None:
+            self._project = jedi.get_default_project()
+        return self._project
+
+    @property
+    def environment(self):
+        if self._environment is None:
+            self._environment = InterpreterEnvironment()
+        return self._environment
+
+    def _jedi(self, code: str, ns: Optional[Dict[str, Any]]):
+        if ns:
+            return jedi.Interpreter(code, namespaces=[ns], project=self.project)
+        return jedi.Script(code, project=self.project, environment=self.environment)
+
+    def clear_caches(self) -> None:
+        """
+        Drop the caches of jedi and parso, which grow with every inferred
+        block; used by `papyri.gen.Gen.check_memory`.
+        """
+        import jedi.cache
+        import parso.cache
+
+        jedi.cache.clear_time_caches(delete_all=True)
+        parso.cache.parser_cache.clear()
+        self._project = None
+
+    @property
+    def slowest(self) -> List[Dict[str, Any]]:
+        """
+        Timings of the slowest blocks since `reset_timings`, slowest first.
+        """
+        return [t for _, _, t in sorted(self._slowest, reverse=True)]
+
+    def reset_timings(self) -> None:
+        """
+        Forget the timings, for example once they are reported.
+        """
+        self.last = {}
+        self.totals.clear()
+        self._slowest.clear()
+
+    def _record(self, timing: Dict[str, Any]) -> None:
+        self.last = timing
+        self.totals["blocks"] += 1
+        for key in ("tokens", "inferred", "resolved", "seconds"):
+            self.totals[key] += timing[key]
+        entry = (timing["seconds"], next(self._order), timing)
+        if len(self._slowest) < self.SLOWEST:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def css_class(self, ttype) -> str:
+        """
+        css class of a Pygments token type, empty string if there is none.
+        """
+        return self._ttype2class.get(ttype) or ""
+
+    def classes(self, code: str) -> List[str]:
+        """
+        css class of each token of ``code``.
+        """
+        return [self.css_class(ttype) for ttype, _ in self._lexer.get_tokens(code)]
+
+    def tokens(
+        self,
+        script: str,
+        ns,
+        prev: str,
+        *,
+        infer: bool,
+        qa: Optional[str] = None,
+        lookup: Optional[Lookup] = None,
+    ) -> List[Tuple[str, Optional[str], str]]:
+        """
+        Tokenize ``script``, infer the fully qualified name of each identifier,
+        and find the css class of each token.
+
+        Parameters
+        ----------
+        script : str
+            the script to tokenize and infer types on
+        ns : dict
+            extra namespace to use with jedi's Interpreter.
+        prev : str
+            previous lines that lead to this.
+        infer : bool
+            whether to run inference at all.
+        qa : str, optional
+            object the script comes from, only used for the timings.
+        lookup : Lookup, optional
+            when given, the identifiers the `StaticResolver` can resolve with
+            it, and keywords, are not inferred with Jedi.
+
+        Returns
+        -------
+        List of (text, reference, css class) for each token. reference is the
+        fully qualified name of the type of the token, None if it could not be
+        inferred, and the empty string for non-identifiers.
+        """
+        start = time.perf_counter()
+        tokens = list(self._lexer.get_tokens_unprocessed(script))
+        to_check = [
+            i
+            for i, (_, _, text) in enumerate(tokens)
+            if infer and (text not in (" .=()[],")) and text.isidentifier()
+        ]
+        refs: List[Optional[str]] = [""] * len(tokens)
+        resolved = 0
+        inferred = 0
+        if to_check:
+            l_delta = len(prev.split("\n"))
+            contextscript = prev + "\n" + script
+            line_index = LineIndex(script)
+            static = None
+            if lookup is not None:
+                static = StaticResolver(contextscript, lookup, ns).refs
+            jed = None
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                for i in to_check:
+                    index, _, text = tokens[i]
+                    line_n, col_n = line_index(index)
+                    line_n += l_delta
+                    if static is not None:
+                        if keyword.iskeyword(text):
+                            refs[i] = None
+                            resolved += 1
+                            continue
+                        if (line_n, col_n) in static:
+                            refs[i] = static[(line_n, col_n)]
+                            resolved += 1
+                            continue
+                    if jed is None:
+                        jed = self._jedi(contextscript, ns)
+                    inferred += 1
+                    try:
+                        inf = jed.infer(line_n + 1, col_n)
+                    except (AttributeError, TypeError) as e:
+                        raise type(e)(
+                            f"{contextscript}, {line_n=}, {col_n=}, {prev=}, {jed=}"
+                        ) from e
+                    # TODO: we might want the qualname to be module_name:name for disambiguation.
+                    refs[i] = inf[0].full_name if inf else None
+        self._record(
+            {
+                "qa": qa,
+                "tokens": len(tokens),
+                "inferred": inferred,
+                "resolved": resolved,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+        return [
+            (text, ref, self.css_class(ttype))
+            for (_, ttype, text), ref in zip(tokens, refs)
+        ]
+
+
+_engine: Optional[InferenceEngine] = None
+
+
+def get_engine() -> InferenceEngine:
+    """
+    Return the inference engine of the current process, creating it if needed.
+    """
+    global _engine
+    if _engine is None:
+        _engine = InferenceEngine()
+    return _engine
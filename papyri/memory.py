@@ -0,0 +1,177 @@
+"""
+Memory use of `papyri gen`.
+
+``papyri gen --max-memory`` caps the resident memory of the generation: when
+the process grows over the limit, `Gen` moves the documents and figures it
+holds in memory to disk, see `SpillDict`, and drops its caches, see
+`papyri.gen.Gen.check_memory`. The peak memory of each phase is in the report,
+see `papyri.report`: on Linux the peak of the process can be reset, see
+`reset_peak_rss`, so that it is measured for each phase.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+# pid, and file descriptors of /proc/self/status and /proc/self/clear_refs
+# when they can be opened, see _proc_files.
+_proc: Optional[Tuple[int, Optional[int], Optional[int]]] = None
+
+
+def _open(path: str, flags: int) -> Optional[int]:
+    try:
+        return os.open(path, flags)
+    except OSError:
+        return None
+
+
+def _proc_files() -> Tuple[Optional[int], Optional[int]]:
+    """
+    Descriptors of the status and clear_refs files of the process, opened once
+    per process as `GenReport.phase` reads them often.
+    """
+    global _proc
+    if _proc is None or _proc[0] != os.getpid():
+        if _proc is not None:
+            # inherited from the parent, they describe the parent.
+            for fd in _proc[1:]:
+                if fd is not None:
+                    os.close(fd)
+        _proc = (
+            os.getpid(),
+            _open("/proc/self/status", os.O_RDONLY),
+            _open("/proc/self/clear_refs", os.O_WRONLY),
+        )
+    return _proc[1], _proc[2]
+
+
+def peak_rss() -> int:
+    """
+    Highest resident memory of the process, in bytes, since the last
+    `reset_peak_rss`, or since it started.
+    """
+    status, _ = _proc_files()
+    if status is not None:
+        data = os.pread(status, 4096, 0)
+        start = data.find(b"VmHWM:")
+        if start >= 0:
+            return int(data[start + 6 : data.index(b"kB", start)]) * 1024
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak resident memory of the process to the current one, see
+    `peak_rss`; False where it can't be reset, that is outside of Linux.
+    """
+    _, clear_refs = _proc_files()
+    if clear_refs is None:
+        return False
+    try:
+        # see "clear_refs" in the proc(5) man page.
+        os.write(clear_refs, b"5")
+    except OSError:
+        return False
+    return True
+
+
+def current_rss() -> int:
+    """
+    Resident memory of the process, in bytes; the peak where it can't be read.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+class SpillDict(MutableMapping):
+    """
+    Dict of str or bytes whose values can be moved to disk.
+
+    Values are kept in memory until `spill` writes them to files in a
+    temporary folder, from where they are read back on access. The order of
+    insertion is kept, so a `SpillDict` can replace a plain dict of documents.
+
+    Attributes
+    ----------
+    size : int
+        length of the values in memory.
+    """
+
+    def __init__(self):
+        self._memory: Dict[Any, Union[str, bytes]] = {}
+        # key -> (file, whether the value is text)
+        self._disk: Dict[Any, Tuple[Path, bool]] = {}
+        # all the keys, in insertion order.
+        self._keys: Dict[Any, None] = {}
+        self._dir: Optional[tempfile.TemporaryDirectory] = None
+        self._files = 0
+        self.size = 0
+
+    def __setitem__(self, key, value: Union[str, bytes]) -> None:
+        if key in self._keys:
+            del self[key]
+        self._memory[key] = value
+        self._keys[key] = None
+        self.size += len(value)
+
+    def __getitem__(self, key) -> Union[str, bytes]:
+        if key in self._memory:
+            return self._memory[key]
+        path, text = self._disk[key]
+        return path.read_text() if text else path.read_bytes()
+
+    def __delitem__(self, key) -> None:
+        del self._keys[key]
+        if key in self._memory:
+            self.size -= len(self._memory.pop(key))
+        else:
+            self._disk.pop(key)[0].unlink()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def spill(self) -> int:
+        """
+        Move the values in memory to disk, return the number of bytes moved.
+        """
+        if not self._memory:
+            return 0
+        if self._dir is None:
+            self._dir = tempfile.TemporaryDirectory(prefix="papyri-spill-")
+        folder = Path(self._dir.name)
+        moved = self.size
+        for key, value in self._memory.items():
+            path = folder / str(self._files)
+            self._files += 1
+            if isinstance(value, str):
+                path.write_text(value)
+            else:
+                path.write_bytes(value)
+            self._disk[key] = (path, isinstance(value, str))
+        self._memory.clear()
+        self.size = 0
+        return moved
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._disk.clear()
+        self._keys.clear()
+        self.size = 0
+        if self._dir is not None:
+            self._dir.cleanup()
+            self._dir = None
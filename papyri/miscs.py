@@ -3,6 +3,8 @@ Misc helper functions
 """
 
 import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from rich.progress import Progress
 
@@ -56,14 +58,29 @@ class BlockExecutor:
 
         return _pylab_helpers.Gcf.get_all_fig_managers()
 
-    def get_figs(self):
-        figs = []
-        for fig_man in self.fig_man():
+    def get_figs(self, fmt="png", dpi=300):
+        """
+        Encode all the open figures in the given format, on a thread pool.
+        """
+        import matplotlib
+
+        figures = [fig_man.canvas.figure for fig_man in self.fig_man()]
+        # svg embed the date and random ids by default, keep them reproducible.
+        metadata = {"Date": None} if fmt == "svg" else None
+
+        def encode(figure):
             buf = io.BytesIO()
-            fig_man.canvas.figure.savefig(buf, dpi=300)  # , bbox_inches="tight"
-            buf.seek(0)
-            figs.append(buf.read())
-        return figs
+            figure.savefig(
+                buf, dpi=dpi, format=fmt, metadata=metadata
+            )  # , bbox_inches="tight"
+            return buf.getvalue()
+
+        with matplotlib.rc_context({"svg.hashsalt": "papyri"}):
+            if len(figures) <= 1:
+                return [encode(f) for f in figures]
+            workers = min(len(figures), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(encode, figures))
 
     def exec(self, text):
         from matplotlib import _pylab_helpers, cbook
@@ -1,6 +1,7 @@
 import builtins
 import json
 import logging
+import mimetypes
 import operator
 import os
 import random
@@ -9,7 +10,7 @@ from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Set, Tuple
 
 from flatlatex import converter
 from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
@@ -538,10 +539,11 @@ async def _route(
         return error.render(backrefs=list(set(br)), tree=tree, ref=ref, module=root)
 
 
-async def img(package, version, subpath=None) -> Optional[bytes]:
+async def img(package, version, subpath=None):
     file = ingest_dir / package / version / "assets" / subpath
     if file.exists():
-        return file.read_bytes()
+        mimetype, _ = mimetypes.guess_type(file.name)
+        return file.read_bytes(), 200, {"Content-Type": mimetype or "image/png"}
     return None
 
 
@@ -562,15 +564,91 @@ def logo() -> bytes:
         return f.read()
 
 
+class PageCache:
+    """
+    Rendered API pages of ``papyri serve``.
+
+    A page shows its document, the documents it references and those that
+    reference it, and the back references of those for the graph, see
+    `compute_graph`. Before each request, the keys journaled by the writers of
+    the store since the last one (see `GraphStore.record_changes`) are read,
+    and the pages showing them, or showing documents they now reference, are
+    dropped. Everything is dropped when documents are added or removed, as
+    each page lists the known documents of its module.
+
+    Only the ``maxsize`` most recently used pages are kept.
+    """
+
+    def __init__(self, gstore: GraphStore, maxsize: int = 512):
+        from cachetools import LRUCache
+
+        self.gstore = gstore
+        self._cursor, _ = gstore.changes()
+        self._pages: LRUCache[Tuple[str, ...], Tuple[Any, Set[Key]]] = LRUCache(maxsize)
+        self._known = set(gstore.glob((None, None, "module", None)))
+
+    def _refs(self, key: Key) -> Set[Key]:
+        try:
+            data = json.loads(self.gstore.get(key))
+        except (FileNotFoundError, ValueError):
+            return set()
+        return {
+            Key(r["module"], r["version"], r["kind"], r["path"])
+            for r in data.get("refs", [])
+        }
+
+    def _dependencies(self, key: Key) -> Set[Key]:
+        near = self._refs(key) | {Key(*k) for k in self.gstore.get_backref(key)}
+        deps = {key} | near
+        for k in near:
+            deps.update(Key(*b) for b in self.gstore.get_backref(k))
+        return deps
+
+    def refresh(self) -> None:
+        """
+        Drop the pages of the documents changed since the last call.
+        """
+        self._cursor, entries = self.gstore.changes(self._cursor)
+        if not entries:
+            return
+        known = set(self.gstore.glob((None, None, "module", None)))
+        changed: Set[Key] = set()
+        for entry in entries:
+            if entry is None or known != self._known:
+                self._known = known
+                self._pages.clear()
+                return
+            changed |= entry
+        for key in list(changed):
+            changed.update(self._refs(key))
+        for k in [k for k, (_, deps) in self._pages.items() if deps & changed]:
+            del self._pages[k]
+
+    async def get(self, package, version, ref, render):
+        self.refresh()
+        k = (package, version, ref)
+        if k not in self._pages:
+            page = await render()
+            deps = self._dependencies(Key(package, version, "module", ref))
+            self._pages[k] = (page, deps)
+        return self._pages[k][0]
+
+
 def serve(*, sidebar: bool):
 
     app = QuartTrio(__name__)
 
     store = Store(str(ingest_dir))
     gstore = GraphStore(ingest_dir)
+    cache = PageCache(gstore)
 
     async def full(package, version, sub, ref):
-        return await _route(ref, store, version, gstore=gstore, sidebar=sidebar)
+        return await cache.get(
+            package,
+            version,
+            ref,
+            lambda: _route(ref, store, version, gstore=gstore, sidebar=sidebar),
+        )
 
     async def full_gallery(module, version):
         return await gallery(module, store, version, gstore=gstore, sidebar=sidebar)
@@ -0,0 +1,212 @@
+"""
+Instrumentation of `papyri gen`.
+
+`GenReport` records how long each phase of the generation takes for each
+object – docstring parsing, example execution, type inference, figure
+encoding, serialisation... – as well as counters like the number of inferred
+tokens or generated figures, and the hit rate of the caches counting
+``<cache>_hits`` and ``<cache>_misses``. ``papyri gen --report <file>``
+writes it as JSON so that optimisations and exclusions can target the actual
+costs.
+
+The peak resident memory of the process during each phase is recorded as
+well, along with the peak size of the documents gen holds in memory, see
+`papyri.memory`.
+
+There is one report per process, see `get_report`; gen workers send theirs to
+the main process with their results, see `GenReport.pop_state`. With
+``--jobs`` the totals are thus summed over all the workers.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .memory import current_rss, peak_rss, reset_peak_rss
+
+# phases of the generation, in pipeline order; phases can be nested, "item"
+# covers all the processing of one object.
+PHASES = [
+    "collect",
+    "item",
+    "numpydoc",
+    "ts_parse",
+    "exec",
+    "figures",
+    "inference",
+    "highlight",
+    "serialize",
+    "write",
+    "examples",
+    "docs",
+]
+
+
+class GenReport:
+    """
+    Durations per phase and per object, and counters.
+
+    Attributes
+    ----------
+    times : dict
+        phase -> {qualified name -> seconds}; time not attributable to a
+        single object is recorded under the ``None`` key.
+    counters : dict
+        counter name -> value.
+    memory : dict
+        phase -> peak resident memory in bytes.
+    buffered : int
+        peak size in bytes of the documents held in memory, see
+        `papyri.gen.Gen.check_memory`.
+    """
+
+    def __init__(self):
+        # phases running, possibly in other threads -> peak memory so far.
+        self._running: Dict[int, int] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._resettable = True
+        self.reset()
+
+    def reset(self) -> None:
+        self.times: Dict[str, Dict[Optional[str], float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.memory: Dict[str, int] = defaultdict(int)
+        self.buffered = 0
+
+    def _update_running(self) -> None:
+        """
+        Account the peak memory since the last reset to the running phases.
+        """
+        if self._running:
+            rss = peak_rss() if self._resettable else current_rss()
+            for token, peak in self._running.items():
+                self._running[token] = max(peak, rss)
+
+    @contextmanager
+    def phase(self, name: str, qa: Optional[str] = None):
+        """
+        Context manager adding the duration of its body to phase ``name``, and
+        recording the peak memory of the process during it.
+
+        The peak of the process is reset when a phase starts, after being
+        accounted to the phases already running; where it can't be reset, the
+        memory is sampled when phases start and end instead.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._update_running()
+            token = next(self._tokens)
+            self._resettable = reset_peak_rss()
+            self._running[token] = peak_rss() if self._resettable else current_rss()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, qa)
+            with self._lock:
+                self._update_running()
+                peak = self._running.pop(token)
+            self.memory[name] = max(self.memory[name], peak)
+
+    def add_time(self, name: str, seconds: float, qa: Optional[str] = None) -> None:
+        """
+        Add ``seconds`` to phase ``name``, for time measured outside of
+        `phase`, like in another process.
+        """
+        self.times[name][qa] += seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def record_buffered(self, nbytes: int) -> None:
+        self.buffered = max(self.buffered, nbytes)
+
+    def pop_state(self) -> Dict[str, Any]:
+        """
+        Return the recorded data as plain dicts and reset the report.
+        """
+        state = {
+            "times": {k: dict(v) for k, v in self.times.items()},
+            "counters": dict(self.counters),
+            "memory": dict(self.memory),
+            "buffered": self.buffered,
+        }
+        self.reset()
+        return state
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        """
+        Add data returned by the `pop_state` of another report.
+        """
+        for name, per_item in state["times"].items():
+            for qa, seconds in per_item.items():
+                self.times[name][qa] += seconds
+        for name, n in state["counters"].items():
+            self.counters[name] += n
+        # workers are separate processes, keep the largest.
+        for name, peak in state["memory"].items():
+            self.memory[name] = max(self.memory[name], peak)
+        self.buffered = max(self.buffered, state["buffered"])
+
+    def to_json(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Summary of the report.
+
+        Parameters
+        ----------
+        top : int
+            number of slowest objects to list for each phase.
+        """
+        order = {p: i for i, p in enumerate(PHASES)}
+        names = sorted(self.times, key=lambda p: (order.get(p, len(order)), p))
+        slowest = {}
+        for name in names:
+            per_item = [(qa, s) for qa, s in self.times[name].items() if qa]
+            per_item.sort(key=lambda x: -x[1])
+            if per_item:
+                slowest[name] = [
+                    {"qa": qa, "seconds": round(s, 6)} for qa, s in per_item[:top]
+                ]
+        hit_rates = {}
+        for name in sorted(self.counters):
+            if name.endswith("_hits"):
+                cache = name[: -len("_hits")]
+                total = self.counters[name] + self.counters.get(cache + "_misses", 0)
+                if total:
+                    hit_rates[cache] = round(self.counters[name] / total, 4)
+        return {
+            "totals": {n: round(sum(self.times[n].values()), 6) for n in names},
+            "items": {n: len([qa for qa in self.times[n] if qa]) for n in names},
+            "slowest": slowest,
+            "counters": dict(sorted(self.counters.items())),
+            "hit_rates": hit_rates,
+            "peak_memory_mb": {
+                n: round(self.memory[n] / 2**20, 1) for n in names if n in self.memory
+            },
+            "peak_buffered_mb": round(self.buffered / 2**20, 1),
+        }
+
+    def write(self, path: Path, top: int = 10) -> None:
+        path.write_text(json.dumps(self.to_json(top), indent=2))
+
+
+_report: Optional[GenReport] = None
+
+
+def get_report() -> GenReport:
+    """
+    Return the report of the current process, creating it if needed.
+    """
+    global _report
+    if _report is None:
+        _report = GenReport()
+    return _report
@@ -0,0 +1,136 @@
+"""
+Source locations of the collected objects.
+
+`Gen.do_one_item` records the file and line where each object is defined.
+``inspect.getsourcelines`` finds classes by parsing the whole file of their
+module again for each of them, which is quadratic on large modules. The
+`SourceIndex` parses each file once with `ast` and maps the qualified names of
+its classes and functions to their lines; objects it can't place – compiled
+extensions, instances, objects without source – are left to `inspect`.
+Objects collected statically (see `papyri.static`) know their location.
+"""
+
+from __future__ import annotations
+
+import ast
+import inspect
+import os
+import sys
+from types import FunctionType, ModuleType
+from typing import Dict, Optional, Set, Tuple
+
+from .static import StaticItem
+
+
+class _DefinitionFinder(ast.NodeVisitor):
+    """
+    Collect qualname -> (first line, end line) of the classes and functions of
+    a module, with the same conventions as `inspect`.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.definitions: Dict[str, Tuple[int, int]] = {}
+
+    def _add(self, node) -> None:
+        qualname = ".".join(self.stack)
+        # the first definition wins, like in inspect.findsource
+        if qualname not in self.definitions:
+            start = (
+                node.decorator_list[0].lineno if node.decorator_list else node.lineno
+            )
+            self.definitions[qualname] = (start, node.end_lineno)
+
+    def visit_FunctionDef(self, node):
+        self.stack.append(node.name)
+        self._add(node)
+        self.stack.append("<locals>")
+        self.generic_visit(node)
+        self.stack.pop()
+        self.stack.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.stack.append(node.name)
+        self._add(node)
+        self.generic_visit(node)
+        self.stack.pop()
+
+
+class SourceIndex:
+    """
+    Index of the definitions in python source files, parsed once per file.
+    """
+
+    def __init__(self):
+        self._files: Dict[str, Optional[Dict[str, Tuple[int, int]]]] = {}
+        self._empty: Set[str] = set()
+
+    def definitions(self, path: str) -> Optional[Dict[str, Tuple[int, int]]]:
+        """
+        Qualified name -> (first line, end line) of the classes and functions
+        defined in ``path``, None if it can't be read or parsed.
+
+        The first line is the one of the first decorator, if any.
+        """
+        if path not in self._files:
+            try:
+                with open(path, "rb") as f:
+                    source = f.read()
+                tree = ast.parse(source, path)
+            except (OSError, SyntaxError, ValueError):
+                self._files[path] = None
+            else:
+                finder = _DefinitionFinder()
+                finder.visit(tree)
+                self._files[path] = finder.definitions
+                if not source:
+                    self._empty.add(path)
+        return self._files[path]
+
+    def locate(self, obj) -> Optional[Tuple[str, Optional[int]]]:
+        """
+        Source file and line of ``obj``.
+
+        Returns
+        -------
+        None if ``obj`` is not a module, class or function defined in a python
+        source file, otherwise a tuple with the absolute path of the file, as
+        given by ``IPython.core.oinspect.find_file``, and the line of the
+        definition, as given by ``inspect.getsourcelines`` – 0 for modules,
+        None for empty modules.
+        """
+        if isinstance(obj, StaticItem):
+            return os.path.normcase(os.path.abspath(obj.file)), obj.line
+        try:
+            obj = inspect.unwrap(obj)
+        except ValueError:
+            return None
+        if inspect.ismethod(obj):
+            obj = obj.__func__
+        line: Optional[int]
+        if isinstance(obj, ModuleType):
+            path = getattr(obj, "__file__", None)
+            line = 0
+        elif isinstance(obj, FunctionType):
+            path = obj.__code__.co_filename
+            line = obj.__code__.co_firstlineno
+        elif isinstance(obj, type):
+            module = sys.modules.get(obj.__module__)
+            path = getattr(module, "__file__", None)
+            line = None
+        else:
+            return None
+        if not isinstance(path, str) or not path.endswith(".py"):
+            return None
+        definitions = self.definitions(path)
+        if definitions is None:
+            return None
+        if path in self._empty:
+            line = None
+        elif line is None:
+            if obj.__qualname__ not in definitions:
+                return None
+            line = definitions[obj.__qualname__][0]
+        return os.path.normcase(os.path.abspath(path)), line
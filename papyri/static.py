@@ -0,0 +1,588 @@
+"""
+Static collection of the objects of a package, without importing it.
+
+`DFSCollector` walks the live objects of an imported package. This requires
+installing the package and all its dependencies, and runs import time side
+effects. `StaticCollector` finds the modules, classes and functions, and
+their docstrings and signatures, by parsing the source of the package with
+`ast`; the result has the same interface, so `Gen` processes it the same way,
+see ``papyri gen --static``.
+
+The namespace of each module is modeled from its definitions, its imports –
+including ``from x import *`` and submodules becoming attributes of their
+package once imported – and simple aliases like ``alias = func``. What only
+exists at runtime, like objects created dynamically or a ``__module__``
+rewritten by a decorator, is not found or is named after the module defining
+it. Before Python 3.10, class and static methods have no qualified name and
+are not collected, like with `DFSCollector`. Examples can't be executed in
+this mode.
+"""
+
+from __future__ import annotations
+
+import ast
+import importlib.metadata
+import importlib.util
+import sys
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+# decorators after which a function is not collected by DFSCollector, as the
+# class attribute is not a function.
+_NOT_FUNCTIONS = {"property", "cached_property", "setter", "getter", "deleter"}
+if sys.version_info < (3, 10):
+    # no __qualname__ to name them after, see full_qual.
+    _NOT_FUNCTIONS |= {"classmethod", "staticmethod"}
+
+
+class StaticItem:
+    """
+    A function or class found in the source of a package.
+
+    It has the attributes of the live object papyri uses: ``__module__``,
+    ``__qualname__``, ``__name__`` and ``__doc__``, plus the text of the
+    signature and the location of the definition.
+    """
+
+    def __init__(
+        self,
+        module: str,
+        qualname: str,
+        item_type: str,
+        doc: Optional[str],
+        signature: Optional[str],
+        file: str,
+        line: int,
+    ):
+        self.__module__ = module
+        self.__qualname__ = qualname
+        self.__name__ = qualname.rsplit(".", 1)[-1]
+        self.__doc__ = doc
+        # like str(type(obj)) for the live object
+        self.item_type = item_type
+        # like str(inspect.signature(obj))
+        self.signature = signature
+        self.file = file
+        self.line = line
+
+    def __repr__(self):
+        return f"<static {self.item_type[8:-2]} {self.__module__}.{self.__qualname__}>"
+
+
+def _decorator_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return ""
+
+
+def _unparse(node: ast.expr, source: Optional[str]) -> str:
+    """
+    Text of the expression ``node``, formatted like `inspect` does with
+    ``ast.unparse`` (3.9+), as written in ``source`` before.
+    """
+    if sys.version_info >= (3, 9):
+        return ast.unparse(node)
+    return ast.get_source_segment(source or "", node) or "..."
+
+
+def format_signature(
+    args: ast.arguments,
+    returns: Optional[ast.expr] = None,
+    *,
+    skip_first: bool = False,
+    string_annotations: bool = False,
+    source: Optional[str] = None,
+) -> str:
+    """
+    Format the arguments of a function definition like ``str`` of an
+    `inspect.Signature`.
+
+    Parameters
+    ----------
+    args, returns :
+        arguments and return annotation of an ``ast.FunctionDef``.
+    skip_first : bool
+        drop the first argument, for the signature of a class from the one of
+        its ``__init__``.
+    string_annotations : bool
+        format annotations as strings, as they are with
+        ``from __future__ import annotations``.
+    source : str, optional
+        source the nodes are from, only used before Python 3.9.
+    """
+
+    def annotation(node):
+        text = _unparse(node, source)
+        return repr(text) if string_annotations else text
+
+    def param(arg: ast.arg, default: Optional[ast.expr], prefix: str = "") -> str:
+        formatted = prefix + arg.arg
+        if arg.annotation is not None:
+            formatted += ": " + annotation(arg.annotation)
+        if default is not None:
+            sep = " = " if arg.annotation is not None else "="
+            formatted += sep + _unparse(default, source)
+        return formatted
+
+    positional = args.posonlyargs + args.args
+    defaults: List[Optional[ast.expr]] = [None] * (
+        len(positional) - len(args.defaults)
+    ) + list(args.defaults)
+    n_posonly = len(args.posonlyargs)
+    if skip_first and positional:
+        positional, defaults = positional[1:], defaults[1:]
+        n_posonly = max(0, n_posonly - 1)
+
+    params = []
+    for i, (arg, default) in enumerate(zip(positional, defaults)):
+        params.append(param(arg, default))
+        if i == n_posonly - 1:
+            params.append("/")
+    if args.vararg is not None:
+        params.append(param(args.vararg, None, "*"))
+    elif args.kwonlyargs:
+        params.append("*")
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        params.append(param(arg, default))
+    if args.kwarg is not None:
+        params.append(param(args.kwarg, None, "**"))
+
+    formatted = "(" + ", ".join(params) + ")"
+    if returns is not None:
+        formatted += " -> " + annotation(returns)
+    return formatted
+
+
+class _Module:
+    """
+    The parsed source of a module and the names it binds.
+    """
+
+    def __init__(self, name: str, path: Path, is_package: bool):
+        self.name = name
+        self.path = path
+        self.is_package = is_package
+        self.source = importlib.util.decode_source(path.read_bytes())
+        self.tree = ast.parse(self.source, str(path))
+        self.doc = ast.get_docstring(self.tree, clean=False)
+        self.string_annotations = False
+        # name -> binding, the first binding of a name wins.
+        #   ("def", node): function or class defined here
+        #   ("module", name): imported module
+        #   ("from", module, name): imported name
+        #   ("expr", node): other name or attribute chain
+        self.bindings: Dict[str, Tuple[Any, ...]] = {}
+        self.star_imports: List[str] = []
+        # package modules imported by this one, which become attributes of
+        # their parent package.
+        self.imported: Set[str] = set()
+        self.all: Optional[List[str]] = None
+        self._scan(self.tree.body)
+
+    def _bind(self, name: str, binding: Tuple[Any, ...]) -> None:
+        self.bindings.setdefault(name, binding)
+
+    def _absolute(self, module: Optional[str], level: int) -> str:
+        if not level:
+            return module or ""
+        parts = self.name.split(".")
+        if not self.is_package:
+            parts = parts[:-1]
+        if level > 1:
+            parts = parts[: -(level - 1)]
+        return ".".join(parts + ([module] if module else []))
+
+    def _scan(self, body: List[ast.stmt]) -> None:
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self._bind(node.name, ("def", node))
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    self.imported.add(alias.name)
+                    if alias.asname:
+                        self._bind(alias.asname, ("module", alias.name))
+                    else:
+                        top = alias.name.split(".")[0]
+                        self._bind(top, ("module", top))
+            elif isinstance(node, ast.ImportFrom):
+                module = self._absolute(node.module, node.level)
+                if module == "__future__":
+                    if any(a.name == "annotations" for a in node.names):
+                        self.string_annotations = True
+                    continue
+                self.imported.add(module)
+                for alias in node.names:
+                    if alias.name == "*":
+                        self.star_imports.append(module)
+                    else:
+                        self.imported.add(module + "." + alias.name)
+                        self._bind(
+                            alias.asname or alias.name, ("from", module, alias.name)
+                        )
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    node.targets if isinstance(node, ast.Assign) else [node.target]
+                )
+                for target in targets:
+                    if not isinstance(target, ast.Name):
+                        continue
+                    if node.value is None:
+                        continue
+                    if target.id == "__all__" and self.all is None:
+                        try:
+                            self.all = list(ast.literal_eval(node.value))
+                        except ValueError:
+                            pass
+                    elif isinstance(node.value, (ast.Name, ast.Attribute)):
+                        self._bind(target.id, ("expr", node.value))
+            elif isinstance(node, (ast.If, ast.Try)):
+                self._scan(node.body)
+                for handler in getattr(node, "handlers", []):
+                    self._scan(handler.body)
+                self._scan(node.orelse)
+                self._scan(getattr(node, "finalbody", []))
+
+
+# what a name refers to: a module, or a definition as (module name, qualname)
+_Target = Union[str, Tuple[str, str]]
+
+
+class StaticCollector:
+    """
+    Find the documentable objects of a package from its source, see the
+    module docstring.
+
+    Same interface as `DFSCollector`: `items` returns the objects by qualified
+    name, modules as `ModuleType` and classes and functions as `StaticItem`,
+    `aliases` and `paths` the names through which they were reached.
+
+    Parameters
+    ----------
+    root : str
+        name of the package.
+    submodules : sequence of str
+        submodules to scan even if they are not imported by the package,
+        relative to ``root``.
+    """
+
+    def __init__(self, root: str, submodules: Sequence[str] = ()):
+        assert "." not in root
+        self.root = root
+        spec = importlib.util.find_spec(root)
+        if spec is None or spec.origin is None:
+            raise ModuleNotFoundError(f"Can't find the source of {root!r}")
+        self._origin = Path(spec.origin)
+        self._modules: Dict[str, Optional[_Module]] = {}
+        self._namespaces: Dict[str, Dict[str, Tuple[Any, ...]]] = {}
+        self.obj: Dict[str, Any] = {}
+        self.aliases: Dict[str, List[str]] = defaultdict(lambda: [])
+        self.paths: Dict[str, str] = {}
+        self._open_list: Deque[Tuple[_Target, List[str]]] = deque([(root, [root])])
+        for sub in submodules:
+            name = root + "." + sub
+            self._open_list.append((name, name.split(".")))
+        self.visit_counts: Dict[str, int] = defaultdict(int)
+        self.visit_times: Dict[str, float] = defaultdict(float)
+
+    def module(self, name: str) -> Optional[_Module]:
+        """
+        The parsed module ``name`` of the package, None if there is none.
+        """
+        if name not in self._modules:
+            self._modules[name] = None
+            parts = name.split(".")
+            if parts[0] != self.root:
+                return None
+            if self._origin.name != "__init__.py":
+                candidates = [(self._origin, False)] if len(parts) == 1 else []
+            else:
+                base = self._origin.parent.joinpath(*parts[1:])
+                candidates = [
+                    (base / "__init__.py", True),
+                    (base.with_suffix(".py"), False),
+                ]
+            for path, is_package in candidates:
+                if path.is_file():
+                    start = time.perf_counter()
+                    try:
+                        self._modules[name] = _Module(name, path, is_package)
+                    except (SyntaxError, ValueError, OSError):
+                        pass
+                    self.visit_times[name] += time.perf_counter() - start
+                    break
+        return self._modules[name]
+
+    def _import_closure(self) -> None:
+        """
+        Parse all the modules of the package imported, directly or not, by the
+        root and the given submodules: they are the submodules available as
+        attributes of their package.
+        """
+        queue = deque(name for name, _ in self._open_list if isinstance(name, str))
+        done: Set[str] = set()
+        while queue:
+            name = queue.popleft()
+            if name in done:
+                continue
+            done.add(name)
+            module = self.module(name)
+            if module is None:
+                continue
+            for imported in sorted(module.imported):
+                parts = imported.split(".")
+                queue.extend(".".join(parts[: i + 1]) for i in range(len(parts)))
+
+    def namespace(self, module: _Module) -> Dict[str, Tuple[Any, ...]]:
+        """
+        Bindings of ``module``, including the ones of star imports.
+        """
+        if module.name not in self._namespaces:
+            self._namespaces[module.name] = self._names(module, {module.name})
+        return self._namespaces[module.name]
+
+    def _names(self, module: _Module, seen: Set[str]) -> Dict[str, Tuple[Any, ...]]:
+        names: Dict[str, Tuple[Any, ...]] = {}
+        for star in module.star_imports:
+            other = self.module(star)
+            if other is None or star in seen:
+                continue
+            other_names = self._names(other, seen | {star})
+            public = other.all
+            if public is None:
+                public = [n for n in other_names if not n.startswith("_")]
+            for name in public:
+                # resolved in the context of the other module.
+                if name in other_names or self.module(star + "." + name):
+                    names.setdefault(name, ("from", star, name))
+        # explicit bindings take precedence over star imports.
+        return {**names, **module.bindings}
+
+    def _submodules(self, module: _Module) -> List[str]:
+        """
+        Submodules of ``module`` imported by the package, see `_import_closure`.
+        """
+        prefix = module.name + "."
+        return sorted(
+            {
+                m[len(prefix) :].split(".")[0]
+                for other in self._modules.values()
+                if other is not None
+                for m in other.imported
+                if m.startswith(prefix)
+            }
+        )
+
+    def resolve(
+        self, target: _Target, attr: str, seen=frozenset()
+    ) -> Optional[_Target]:
+        """
+        What attribute ``attr`` of ``target`` refers to, None if unknown or
+        outside of the package.
+        """
+        if isinstance(target, tuple):
+            module_name, qualname = target
+            node = self._definition(module_name, qualname)
+            if isinstance(node, ast.ClassDef):
+                for child in node.body:
+                    if (
+                        isinstance(
+                            child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+                        )
+                        and child.name == attr
+                    ):
+                        return module_name, qualname + "." + attr
+            return None
+        module = self.module(target)
+        if module is None or (target, attr) in seen:
+            return None
+        seen = seen | {(target, attr)}
+        binding = self.namespace(module).get(attr)
+        if binding is None:
+            if self.module(target + "." + attr) is not None:
+                return target + "." + attr
+            return None
+        kind = binding[0]
+        if kind == "def":
+            return target, attr
+        if kind == "module":
+            return binding[1] if self.module(binding[1]) is not None else None
+        if kind == "from":
+            _, source, name = binding
+            if self.module(source + "." + name) is not None:
+                return source + "." + name
+            return self.resolve(source, name, seen)
+        # expression: a name, or an attribute chain starting with a name.
+        chain = []
+        expr = binding[1]
+        while isinstance(expr, ast.Attribute):
+            chain.append(expr.attr)
+            expr = expr.value
+        if not isinstance(expr, ast.Name) or (expr.id == attr and not chain):
+            return None
+        current = self.resolve(target, expr.id, seen)
+        for name in reversed(chain):
+            if current is None:
+                return None
+            current = self.resolve(current, name, seen)
+        return current
+
+    def _definition(self, module_name: str, qualname: str):
+        module = self.module(module_name)
+        if module is None:
+            return None
+        first, *rest = qualname.split(".")
+        binding = module.bindings.get(first)
+        if binding is None or binding[0] != "def":
+            return None
+        node = binding[1]
+        for name in rest:
+            if not isinstance(node, ast.ClassDef):
+                return None
+            for child in node.body:
+                if (
+                    isinstance(
+                        child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+                    )
+                    and child.name == name
+                ):
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def _object(self, target: _Target):
+        if isinstance(target, str):
+            module = self.module(target)
+            assert module is not None
+            obj = ModuleType(target, module.doc)
+            obj.__file__ = str(module.path)
+            return obj
+        module_name, qualname = target
+        module = self.module(module_name)
+        assert module is not None
+        node = self._definition(module_name, qualname)
+        doc = ast.get_docstring(node, clean=False)
+        if isinstance(node, ast.ClassDef):
+            item_type = "<class 'type'>"
+            signature = None
+            for child in node.body:
+                if isinstance(child, ast.FunctionDef) and child.name == "__init__":
+                    signature = format_signature(
+                        child.args,
+                        skip_first=True,
+                        string_annotations=module.string_annotations,
+                        source=module.source,
+                    )
+                    break
+        else:
+            decorators = {_decorator_name(d) for d in node.decorator_list}
+            item_type = "<class 'function'>"
+            for kind in ("classmethod", "staticmethod"):
+                if kind in decorators and "." in qualname:
+                    item_type = f"<class '{kind}'>"
+            signature = format_signature(
+                node.args,
+                node.returns,
+                string_annotations=module.string_annotations,
+                source=module.source,
+            )
+        line = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        return StaticItem(
+            module_name, qualname, item_type, doc, signature, str(module.path), line
+        )
+
+    def _children(self, target: _Target) -> List[Tuple[str, _Target]]:
+        if isinstance(target, str):
+            module = self.module(target)
+            assert module is not None
+            names = sorted(set(self.namespace(module)) | set(self._submodules(module)))
+            children = [(name, self.resolve(target, name)) for name in names]
+        else:
+            node = self._definition(*target)
+            children = []
+            if isinstance(node, ast.ClassDef):
+                for child in node.body:
+                    if isinstance(child, ast.ClassDef) or (
+                        isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+                        and not {_decorator_name(d) for d in child.decorator_list}
+                        & _NOT_FUNCTIONS
+                    ):
+                        children.append(
+                            (child.name, (target[0], target[1] + "." + child.name))
+                        )
+        return [(name, t) for name, t in children if t is not None]
+
+    def items(self) -> Dict[str, Any]:
+        """
+        Collect the objects reachable from the package, breadth first like
+        `DFSCollector`.
+        """
+        self._import_closure()
+        seen: Dict[_Target, str] = {}
+        while self._open_list:
+            target, stack = self._open_list.popleft()
+            if isinstance(target, str) and self.module(target) is None:
+                continue
+            path = ".".join(stack)
+            if target in seen:
+                self.paths[path] = seen[target]
+                continue
+            qa = target if isinstance(target, str) else ".".join(target)
+            start = time.perf_counter()
+            seen[target] = qa
+            self.obj[qa] = self._object(target)
+            self.aliases[qa].append(path)
+            self.paths[path] = qa
+            for name, child in self._children(target):
+                self._open_list.append((child, stack + [name]))
+            module = target if isinstance(target, str) else target[0]
+            self.visit_counts[module] += 1
+            self.visit_times[module] += time.perf_counter() - start
+        return self.obj
+
+    def stats(self) -> List[Tuple[str, int, float]]:
+        """
+        Per module number of objects and time spent parsing and visiting
+        them, slowest first.
+        """
+        return sorted(
+            (
+                (sub, self.visit_counts[sub], seconds)
+                for sub, seconds in self.visit_times.items()
+            ),
+            key=lambda x: -x[2],
+        )
+
+
+def static_version(root: str) -> str:
+    """
+    Version of package ``root`` without importing it: a literal
+    ``__version__`` in its ``__init__``, or the version of the installed
+    distribution of the same name.
+    """
+    spec = importlib.util.find_spec(root)
+    if spec is not None and spec.origin is not None and spec.origin.endswith(".py"):
+        tree = ast.parse(Path(spec.origin).read_bytes())
+        for node in tree.body:
+            if (
+                isinstance(node, ast.Assign)
+                and any(
+                    isinstance(t, ast.Name) and t.id == "__version__"
+                    for t in node.targets
+                )
+                and isinstance(node.value, ast.Constant)
+                and isinstance(node.value.value, str)
+            ):
+                return node.value.value
+    try:
+        return importlib.metadata.version(root)
+    except importlib.metadata.PackageNotFoundError:
+        return "???"
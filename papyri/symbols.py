@@ -0,0 +1,105 @@
+"""
+Symbol tables: canonical names of the objects of a package.
+
+An object can be reached under many names, ``numpy.linspace`` is also
+``numpy.core.linspace`` and ``numpy.core.function_base.linspace``. The
+`DFSCollector` already walks all those paths, the `SymbolTable` keeps the
+mapping from each of them to the canonical name – the one used as key in the
+docbundle – so that references can be normalised with a dictionary lookup
+instead of importing modules and walking attributes.
+
+The table is stored in the docbundle as ``symbols.json``, so that ingest can
+check references without the package being installed.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Callable, Dict, Iterable, Optional
+
+
+class SymbolTable:
+    """
+    Mapping from the names of objects to their canonical name.
+
+    Parameters
+    ----------
+    names : iterable of str
+        canonical names.
+    aliases : dict
+        other names -> canonical name.
+    """
+
+    def __init__(
+        self, names: Iterable[str] = (), aliases: Optional[Dict[str, str]] = None
+    ):
+        self._names = set(names)
+        self._aliases: Dict[str, str] = {}
+        for alias, canonical in (aliases or {}).items():
+            self.add(alias, canonical)
+
+    @classmethod
+    def from_collector(cls, collector) -> SymbolTable:
+        """
+        Build the table of the objects found by a `DFSCollector`.
+        """
+        table = cls(collector.obj.keys())
+        for path, qa in collector.paths.items():
+            if qa in table._names:
+                table.add(path, qa)
+        return table
+
+    def add(self, name: str, canonical: str) -> None:
+        self._names.add(canonical)
+        if name != canonical:
+            self._aliases[name] = canonical
+
+    def update(self, other: SymbolTable) -> None:
+        """
+        Add the symbols of ``other``, typically of another package.
+        """
+        self._names.update(other._names)
+        self._aliases.update(other._aliases)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names or name in self._aliases
+
+    def __len__(self) -> int:
+        return len(self._names) + len(self._aliases)
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        Canonical name of ``name``, None if it is not in the table.
+        """
+        if name in self._names:
+            return name
+        return self._aliases.get(name)
+
+    def normalise(
+        self, ref: str, fallback: Optional[Callable[[str], str]] = None
+    ) -> str:
+        """
+        Canonical name of ``ref``.
+
+        References not in the table are passed to ``fallback`` – typically
+        `papyri.gen.normalise_ref` which imports the object – or returned
+        unchanged.
+        """
+        canonical = self.get(ref)
+        if canonical is not None:
+            return canonical
+        if fallback is not None:
+            return fallback(ref)
+        return ref
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"names": sorted(self._names), "aliases": self._aliases},
+            indent=2,
+            sort_keys=True,
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> SymbolTable:
+        content = json.loads(data)
+        return cls(content["names"], content["aliases"])
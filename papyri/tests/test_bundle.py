@@ -0,0 +1,194 @@
+import io
+import json
+
+import pytest
+
+from papyri.bundle import (
+    BundlePatcher,
+    BundleWriter,
+    ZipBundleWriter,
+    bundle_writer,
+    in_shard,
+    merge_bundles,
+    parse_shard,
+    read_bundle,
+    shard_path,
+)
+
+
+def test_bundle_is_replaced_on_commit_only(tmp_path):
+    where = tmp_path / "pkg_1.0"
+    first = BundleWriter(where)
+    first.put_module("pkg.f.json", "{}")
+    first.put_doc(("sub", "index.rst"), "{}")
+    first.commit({}, {"version": "1.0"})
+    assert (where / "docs" / "sub" / "index.rst").exists()
+
+    second = BundleWriter(where)
+    second.put_module("pkg.g.json", "{}")
+    # not committed yet, the first bundle is still in place.
+    assert (where / "module" / "pkg.f.json").exists()
+    assert not (where / "module" / "pkg.g.json").exists()
+
+    second.commit({}, {"version": "1.0"})
+    assert not (where / "module" / "pkg.f.json").exists()
+    assert (where / "module" / "pkg.g.json").exists()
+    assert json.loads((where / "papyri.json").read_text()) == {"version": "1.0"}
+    assert not second.staging.exists()
+
+
+def test_interrupted_bundle_is_discarded(tmp_path):
+    where = tmp_path / "pkg_1.0"
+    writer = BundleWriter(where)
+    writer.put_asset("a.png", b"data")
+    assert not (writer.staging / "papyri.json").exists()
+    # a new run starts from scratch
+    writer = BundleWriter(where)
+    assert not (writer.staging / "assets" / "a.png").exists()
+    with pytest.raises(FileNotFoundError):
+        (where / "papyri.json").read_text()
+
+
+def test_interrupted_bundle_is_resumed(tmp_path):
+    where = tmp_path / "pkg_1.0"
+    writer = BundleWriter(where)
+    writer.put_module("pkg.f.json", "{}")
+    writer.record("pkg.f", {"hash": "h", "assets": {}})
+    # interrupted while writing the next entry.
+    writer._journal.write('["pkg.g", {"ha')
+    writer._journal.flush()
+
+    writer = BundleWriter(where, resume=True)
+    assert writer.completed == {"pkg.f": {"hash": "h", "assets": {}}}
+    assert (writer.staging / "module" / "pkg.f.json").exists()
+    writer.commit({}, {"version": "1.0"})
+    assert not (where / "checkpoint.jsonl").exists()
+
+
+def test_zip_bundle_roundtrip(tmp_path):
+    where = tmp_path / "pkg_1.0.zip"
+    writer = ZipBundleWriter(where)
+    writer.put_module("pkg.f.json", "{}")
+    writer.put_doc(("sub", "index.rst"), "doc")
+    writer.put_asset("a.png", b"data")
+    assert not where.exists()
+    writer.commit({}, {"version": "1.0"})
+
+    bundle = read_bundle(where)
+    assert bundle.name == "pkg_1.0"
+    assert bundle.listdir("module") == ["pkg.f.json"]
+    assert bundle.listdir("docs") == []
+    assert bundle.read_text("docs/sub/index.rst") == "doc"
+    assert bundle.read_bytes("assets/a.png") == b"data"
+    assert bundle.exists("manifest.json")
+
+    # as downloaded by `papyri install`
+    in_memory = read_bundle(io.BytesIO(where.read_bytes()))
+    assert in_memory.name == "pkg_1.0"
+    assert json.loads(in_memory.read_text("papyri.json")) == {"version": "1.0"}
+
+
+def test_dir_and_zip_bundles_list_the_same(tmp_path):
+    for where in [tmp_path / "pkg_1.0", tmp_path / "pkg_1.0.zip"]:
+        writer = bundle_writer(where)
+        writer.put_example("ex.json", "{}")
+        writer.put_asset("b.png", b"")
+        writer.put_asset("a.png", b"")
+        writer.commit({}, {})
+        bundle = read_bundle(where)
+        assert bundle.listdir("assets") == ["a.png", "b.png"]
+        assert bundle.listdir("examples") == ["ex.json"]
+
+
+def test_merge_bundles(tmp_path):
+    keys = ["pkg.f", "pkg.g", "pkg.h", "docs/sub/index.rst", "examples/ex.py"]
+    meta = {"module": "pkg", "version": "1.0", "logo": "logo.png", "aliases": {}}
+    full = bundle_writer(tmp_path / "full" / "pkg_1.0")
+    shards = [bundle_writer(shard_path(tmp_path / "pkg_1.0", (i, 2))) for i in (0, 1)]
+    manifests = [{}, {}, {}]
+    assets = [{}, {}, {}]
+    for key in keys:
+        (index,) = [i for i in (0, 1) if in_shard(key, (i, 2))]
+        for writer, manifest, names in [
+            (full, manifests[2], assets[2]),
+            (shards[index], manifests[index], assets[index]),
+        ]:
+            if key.startswith("docs/"):
+                writer.put_doc(tuple(key.split("/")[1:]), key)
+            elif key.startswith("examples/"):
+                writer.put_example(key[len("examples/") :], key)
+            else:
+                writer.put_module(key + ".json", key)
+            name = key.replace("/", "-") + ".png"
+            writer.put_asset(name, b"fig")
+            names[key] = name
+            manifest[key] = {"hash": key, "assets": {}}
+    for writer, manifest, names, shard in zip(
+        shards + [full], manifests, assets, [[0, 2], [1, 2], None]
+    ):
+        writer.put_asset("logo.png", b"logo")
+        writer.put_meta("symbols.json", "{}")
+        extra = {} if shard is None else {"shard": shard}
+        writer.commit(manifest, dict(meta, assets=names, **extra))
+
+    assert shards[0].where.name == "pkg_1.0-shard0of2"
+    with pytest.raises(ValueError, match="Expected shards"):
+        merge_bundles([shards[0].where])
+    where = merge_bundles([shards[1].where, shards[0].where])
+    assert where == tmp_path / "pkg_1.0"
+    merged, single = read_bundle(where), read_bundle(full.where)
+    for member in ["papyri.json", "manifest.json", "symbols.json"]:
+        assert merged.read_text(member) == single.read_text(member)
+    for folder in ["module", "examples", "assets"]:
+        assert merged.listdir(folder) == single.listdir(folder)
+    assert merged.read_text("docs/sub/index.rst") == "docs/sub/index.rst"
+
+    zipped = merge_bundles([s.where for s in shards], tmp_path / "out.zip")
+    assert read_bundle(zipped).listdir("assets") == single.listdir("assets")
+
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
+    for spec in ["4/4", "1", "a/b", "-1/2"]:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_bundle_is_patched_in_place(tmp_path):
+    where = tmp_path / "pkg_1.0"
+    writer = BundleWriter(where)
+    for qa in ["pkg.f", "pkg.g", "pkg.h"]:
+        writer.put_module(qa + ".json", "old")
+        writer.put_asset(qa + ".png", b"fig")
+    writer.put_example("ex.py", "{}")
+    manifest = {
+        "pkg.f": {"hash": "f", "assets": {"fig-pkg.f-0.png": "pkg.f.png"}},
+        "pkg.g": {"hash": "g", "assets": {"fig-pkg.g-0.png": "pkg.g.png"}},
+        "pkg.h": {"hash": "h", "assets": {"fig-pkg.h-0.png": "pkg.h.png"}},
+        "examples/ex.py": {"hash": "e", "assets": {}},
+    }
+    assets = {n: s for e in manifest.values() for n, s in e["assets"].items()}
+    writer.commit(manifest, {"aliases": {}, "assets": assets, "version": "1.0"})
+
+    # pkg.f changed and pkg.g was removed.
+    patcher = BundlePatcher(where, lambda key: key in ("pkg.f", "pkg.g"))
+    patcher.put_module("pkg.f.json", "new")
+    patcher.put_asset("new.png", b"new fig")
+    patcher.commit(
+        {"pkg.f": {"hash": "f2", "assets": {"fig-pkg.f-0.png": "new.png"}}},
+        {"aliases": {"pkg.f": "pkg.f2"}, "assets": {}},
+    )
+
+    bundle = read_bundle(where)
+    assert bundle.listdir("module") == ["pkg.f.json", "pkg.h.json"]
+    assert bundle.read_text("module/pkg.f.json") == "new"
+    assert bundle.listdir("assets") == ["new.png", "pkg.h.png"]
+    manifest = json.loads(bundle.read_text("manifest.json"))
+    assert sorted(manifest) == ["examples/ex.py", "pkg.f", "pkg.h"]
+    assert json.loads(bundle.read_text("papyri.json")) == {
+        "aliases": {"pkg.f": "pkg.f2"},
+        "assets": {"fig-pkg.f-0.png": "new.png", "fig-pkg.h-0.png": "pkg.h.png"},
+        "version": "1.0",
+    }
+    with pytest.raises(FileNotFoundError):
+        BundlePatcher(tmp_path / "missing", lambda key: True)
@@ -0,0 +1,89 @@
+import hashlib
+import importlib
+import logging
+import os
+
+from numpydoc.docscrape import NumpyDocString
+
+from papyri.execcache import ExecCache
+from papyri.report import get_report
+from papyri.symbols import SymbolTable
+
+# papyri.gen is shadowed by the gen command in papyri/__init__.py
+gen = importlib.import_module("papyri.gen")
+
+
+def example():
+    """
+    Examples
+    --------
+    >>> values = [3, 1, 2]
+
+    >>> sorted(values)
+    [1, 2, 3]
+    """
+
+
+def test_roundtrip_and_eviction(tmp_path):
+    cache = ExecCache(tmp_path, "pkg", "1.0", gen.Config())
+    first, second = cache.key("pkg.f", ["x = 1"], True), cache.key("pkg.g", [], True)
+    assert first != cache.key("pkg.f", ["x = 2"], True)
+    assert first != cache.key("pkg.f", ["x = 1"], False)
+    assert first != ExecCache(tmp_path, "pkg", "1.1", gen.Config()).key(
+        "pkg.f", ["x = 1"], True
+    )
+    assert cache.get(first) is None
+
+    tokens = [[("x", None, "n")]]
+    cache.put(first, [("execed", [b"png"])], tokens)
+    cache.put(second, [("execed", [b"png"]), ("execed", [b"other"])], [])
+    # file times may be too coarse to order the writes and the read below.
+    for entry in (tmp_path / "entries").iterdir():
+        os.utime(entry, (0, 0))
+    assert cache.get(first) == ([("execed", [b"png"])], tokens)
+    assert (
+        ExecCache(tmp_path, "pkg", "1.0", gen.Config(), force=True).get(first) is None
+    )
+
+    # the first entry was used last, the second one is evicted with its figure.
+    assert cache.evict(max_size=200) == 1
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    figures = [p.name for p in (tmp_path / "figures").iterdir()]
+    assert figures == [hashlib.sha256(b"png").hexdigest()]
+
+
+def test_key_tracks_symbols(tmp_path):
+    cache = ExecCache(tmp_path, "pkg", "1.0", gen.Config())
+    before = cache.key("pkg.f", ["x = 1"], True)
+    cache.set_symbols(SymbolTable(["pkg.f"]), SymbolTable(["dep.g"]))
+    key = cache.key("pkg.f", ["x = 1"], True)
+    assert key != before
+    cache.set_symbols(SymbolTable(["pkg.f"]), SymbolTable(["dep.g", "dep.h"]))
+    assert cache.key("pkg.f", ["x = 1"], True) != key
+    cache.set_symbols(SymbolTable(["pkg.f"]), SymbolTable(["dep.g"]))
+    assert cache.key("pkg.f", ["x = 1"], True) == key
+
+
+def test_examples_are_replayed(tmp_path):
+    config = gen.Config(exec=True, infer=True)
+    cache = ExecCache(tmp_path, "papyri", "0", config)
+
+    def run():
+        get_report().reset()
+        section, figs = gen.get_example_data(
+            NumpyDocString(example.__doc__),
+            obj=example,
+            qa="papyri.tests.test_execcache.example",
+            config=config,
+            log=logging.getLogger(__name__),
+            exec_cache=cache,
+        )
+        return section.to_json(), get_report().counters
+
+    executed, counters = run()
+    assert counters["exec_cache_misses"] == 1
+    replayed, counters = run()
+    assert counters["exec_cache_hits"] == 1
+    assert "inferred" not in counters
+    assert replayed == executed
@@ -0,0 +1,97 @@
+import pytest
+
+from papyri.execution import (
+    TIMEOUT,
+    ExampleExecutionError,
+    ForkServerExecutor,
+    get_executor,
+    preload_packages,
+)
+from papyri.gen import Config
+
+
+@pytest.fixture(scope="module")
+def executor():
+    return ForkServerExecutor(["papyri.gen"], timeout=5)
+
+
+def test_blocks_share_state(executor):
+    res = executor.run(
+        "papyri.gen.Gen",
+        [],
+        ["x = 1", "assert x == 1", "assert Gen.__name__ == 'Gen'"],
+        wait_for_show=True,
+        fallback=False,
+    )
+    assert res == [("execed", [])] * 3
+
+
+def test_exception(executor):
+    scripts = ["x = 1", "1 / 0", "x = 2"]
+    res = executor.run("papyri.gen.Gen", [], scripts, wait_for_show=True, fallback=True)
+    assert res == [("execed", []), ("exception_in_exec", []), ("exception_in_exec", [])]
+    with pytest.raises(ExampleExecutionError, match="ZeroDivisionError"):
+        executor.run("papyri.gen.Gen", [], scripts, wait_for_show=True, fallback=False)
+
+
+def test_batch_packages_are_preloaded():
+    config = Config(exec_timeout=123)
+    preload_packages(["numpy", "scipy"])
+    try:
+        preload = get_executor("scipy", config).preload
+    finally:
+        preload_packages([])
+    assert preload[:2] == ["scipy", "numpy"]
+    assert len(preload) == len(set(preload))
+
+
+def test_timeout():
+    executor = ForkServerExecutor(["papyri.gen"], timeout=1)
+    res = executor.run(
+        "papyri.gen.Gen",
+        [],
+        ["x = 1", "import time; time.sleep(60)"],
+        wait_for_show=True,
+        fallback=True,
+    )
+    assert res == [("execed", []), (TIMEOUT, [])]
+
+
+def test_figures(executor):
+    [(status, figs)] = executor.run(
+        "papyri.gen.Gen",
+        [],
+        ["plt.plot([1, 2, 3])\nplt.show()"],
+        wait_for_show=True,
+        fallback=False,
+    )
+    assert status == "execed"
+    assert len(figs) == 1
+    assert figs[0].startswith(b"\x89PNG")
+
+
+def test_gallery_script_runs_in_empty_namespace(executor):
+    res = executor.run(
+        None,
+        [],
+        ["assert 'np' not in dir()\nimport matplotlib.pyplot as plt\nplt.plot([1])"],
+        wait_for_show=False,
+        fallback=False,
+    )
+    [(ce_status, figs)] = res
+    assert ce_status == "execed"
+    assert len(figs) == 1
+
+
+def test_figures_time(executor):
+    job = executor.submit(
+        "papyri.gen.Gen",
+        [],
+        ["x = 1", "plt.plot([1, 2, 3])\nplt.show()"],
+        wait_for_show=True,
+    )
+    job.result(fallback=False)
+    assert job.figures_time > 0
+    job = executor.submit("papyri.gen.Gen", [], ["x = 1"], wait_for_show=True)
+    job.result(fallback=False)
+    assert job.figures_time == 0
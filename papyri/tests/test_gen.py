@@ -1,6 +1,20 @@
+import importlib
+import json
+import sys
 from functools import lru_cache
+from types import ModuleType
 
-from papyri.gen import Config, Gen, NumpyDocString
+from papyri.gen import (
+    Config,
+    DFSCollector,
+    Gen,
+    NumpyDocString,
+    asset_name,
+    batch_report_path,
+    item_digest,
+)
+from papyri.report import get_report
+from papyri.symbols import SymbolTable
 
 
 @lru_cache
@@ -23,3 +37,215 @@ def test_find_beyond_decorators():
     )
 
     assert doc.item_file.endswith("test_gen.py")
+
+
+def test_parallel_matches_serial():
+    """
+    Processing items on a worker pool should give the same bundle content and
+    ordering as a serial run.
+    """
+    config = Config(exec=False, infer=False, submodules=["examples"])
+
+    serial = Gen(dummy_progress=True)
+    serial.root = "papyri"
+    serial.do_one_mod("papyri", config=config)
+
+    parallel = Gen(dummy_progress=True, jobs=2)
+    parallel.root = "papyri"
+    parallel.do_one_mod("papyri", config=config)
+
+    assert list(parallel.data.keys()) == list(serial.data.keys())
+    assert parallel.data == serial.data
+    assert parallel.metadata == serial.metadata
+
+
+def test_item_digest_tracks_docstring():
+    def f(a):
+        """doc"""
+
+    d1 = item_digest(f, config_digest="c", refs_digest="r", aliases=[])
+    assert d1 == item_digest(f, config_digest="c", refs_digest="r", aliases=[])
+    assert d1 != item_digest(f, config_digest="other", refs_digest="r", aliases=[])
+    assert d1 != item_digest(f, config_digest="c", refs_digest="other", aliases=[])
+    f.__doc__ = "changed"
+    assert d1 != item_digest(f, config_digest="c", refs_digest="r", aliases=[])
+
+
+def test_collector_does_not_compare_objects():
+    """
+    The collector should track visited objects by identity, objects can have
+    arbitrary (and raising) `__eq__`, like numpy arrays.
+    """
+
+    class Ambiguous:
+        def __init__(self, qualname):
+            self.__module__ = "fake"
+            self.__qualname__ = qualname
+
+        def __eq__(self, other):
+            raise ValueError("ambiguous truth value")
+
+    mod = ModuleType("fake")
+    mod.a = Ambiguous("a")
+    mod.b = Ambiguous("b")
+    mod.alias = mod.a
+
+    collector = DFSCollector(mod, [])
+    items = collector.items()
+    assert set(items) == {"fake", "fake.a", "fake.b"}
+    assert collector.aliases["fake.a"] == ["fake.a"]
+    assert collector.visit_counts["fake"] == 3
+    assert collector.paths["fake.alias"] == "fake.a"
+
+
+def test_identical_figures_are_stored_once():
+    gen = Gen(dummy_progress=True)
+    gen.put_fig("fig-a-0.png", b"data")
+    gen.put_fig("fig-b-0.png", b"data")
+    gen.put_fig("fig-b-1.png", b"other")
+    assert gen.asset_names["fig-a-0.png"] == gen.asset_names["fig-b-0.png"]
+    assert gen.asset_names["fig-a-0.png"] == asset_name("x.png", b"data")
+    assert gen.asset_names["fig-b-1.png"].endswith(".png")
+    assert len(gen.bdata) == 2
+
+
+def test_docs_reused_when_unchanged(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    (docs / "index.rst").write_text("Title\n=====\n\nsome text\n")
+    (docs / "sub" / "other.rst").write_text("Other\n=====\n\nmore text\n")
+    bundle = tmp_path / "fake_1.0"
+
+    def run():
+        gen = Gen(dummy_progress=True)
+        gen.root, gen.version = "fake", "1.0"
+        gen.load_previous(bundle)
+        gen.open_bundle(bundle)
+        gen.do_docs(docs, False, Config())
+        gen.commit_bundle()
+        return gen
+
+    first = run()
+    (docs / "sub" / "other.rst").write_text("Other\n=====\n\nchanged\n")
+    previous = (bundle / "docs" / "index.rst").read_text()
+    get_report().reset()
+    second = run()
+    assert get_report().counters["docs_reused"] == 1
+    assert get_report().counters["docs"] == 1
+    assert second.manifest["docs/index.rst"] == first.manifest["docs/index.rst"]
+    assert second.manifest["docs/sub/other.rst"] != first.manifest["docs/sub/other.rst"]
+    assert (bundle / "docs" / "index.rst").read_text() == previous
+    assert "changed" in (bundle / "docs" / "sub" / "other.rst").read_text()
+
+
+def test_docs_are_patched_in_place(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    (docs / "index.rst").write_text("Title\n=====\n\nsome text\n")
+    (docs / "sub" / "other.rst").write_text("Other\n=====\n\nmore text\n")
+    bundle = tmp_path / "fake_1.0"
+    gen = Gen(dummy_progress=True)
+    gen.root, gen.version = "fake", "1.0"
+    gen.open_bundle(bundle)
+    gen.do_docs(docs, False, Config())
+    gen.commit_bundle()
+
+    (docs / "index.rst").write_text("Title\n=====\n\nchanged\n")
+    (docs / "sub" / "other.rst").unlink()
+    get_report().reset()
+    gen = Gen(dummy_progress=True)
+    gen.root, gen.version, gen.only = "fake", "1.0", "docs/sub/*"
+    gen.patch_bundle(bundle)
+    gen.do_docs(docs, False, Config())
+    gen.commit_bundle()
+    assert "docs" not in get_report().counters
+    assert "changed" not in (bundle / "docs" / "index.rst").read_text()
+    assert not (bundle / "docs" / "sub" / "other.rst").exists()
+    manifest = json.loads((bundle / "manifest.json").read_text())
+    assert list(manifest) == ["docs/index.rst"]
+
+
+def test_identical_docstrings_are_parsed_once():
+    def f(a):
+        """
+        Summary
+
+        Parameters
+        ----------
+        a : int
+            some *value*
+        """
+
+    def g(a):
+        pass
+
+    g.__doc__ = f.__doc__
+    config = Config(exec=False, infer=False)
+    gen = Gen(dummy_progress=True)
+    get_report().reset()
+    results = [
+        gen.do_one_qa(
+            qa,
+            obj,
+            config=config,
+            aliases=[],
+            known_refs=frozenset(),
+            failure_collection={},
+            config_digest="",
+            refs_digest="",
+        )
+        for qa, obj in [("m.f", f), ("m.g", g)]
+    ]
+    assert get_report().counters["parse_cache_hits"] == 3
+    assert get_report().to_json()["hit_rates"]["parse_cache"] == 0.5
+    f_blob, g_blob = [json.loads(data) for data, *_ in results]
+    assert f_blob["_content"] == g_blob["_content"]
+    # the parts that depend on the object are not shared.
+    assert (f_blob["signature"], g_blob["signature"]) == ("f(a)", "g(a)")
+
+
+def test_dependency_symbols_resolve_refs():
+    gen = Gen(dummy_progress=True)
+    gen.dependency_symbols = SymbolTable(["dep.real"], {"dep.alias": "dep.real"})
+    doc, _ = gen.do_one_item(
+        ex1,
+        NumpyDocString("Summary\n\nSee Also\n--------\ndep.alias\n"),
+        qa="irrelevant",
+        config=Config(exec=False, infer=False),
+        aliases=[],
+    )
+    assert doc.refs == ["dep.real"]
+
+
+def test_batch_reports_per_package():
+    assert batch_report_path("r.json", "numpy").name == "r.numpy.json"
+    assert batch_report_path("report", "scipy").name == "report.scipy.json"
+
+
+def test_links_updated_when_objects_change(tmp_path, monkeypatch):
+    """
+    Links are resolved at generation time, reused items should not keep links
+    to objects that were removed, nor miss the ones that were added.
+    """
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = tmp_path / "linkpkg.py"
+    bundle = tmp_path / "linkpkg_1.0"
+    doc = '"""\nSummary.\n\nSection\n=======\n\nsee :any:`linkpkg.g`.\n"""\n'
+
+    def run(source):
+        module.write_text(source)
+        sys.modules.pop("linkpkg", None)
+        importlib.invalidate_caches()
+        gen = Gen(dummy_progress=True)
+        gen.root, gen.version = "linkpkg", "1.0"
+        gen.load_previous(bundle)
+        gen.open_bundle(bundle)
+        gen.do_one_mod("linkpkg", config=Config(exec=False, infer=False))
+        gen.commit_bundle()
+        return (bundle / "module" / "linkpkg.json").read_text()
+
+    unlinked = run(doc)
+    assert '"Link"' not in unlinked
+    linked = run(doc + "\n\ndef g():\n    pass\n")
+    assert '"Link"' in linked
+    assert run(doc) == unlinked
@@ -0,0 +1,104 @@
+import sys
+
+import pytest
+
+from papyri.inference import InferenceEngine, LineIndex, StaticResolver, live_lookup
+from papyri.utils import pos_to_nl
+
+SCRIPT = """import numpy as np
+x = np.arange(10)
+
+y = x.sum()
+"""
+
+
+@pytest.mark.parametrize("pos", range(len(SCRIPT) - 1))
+def test_line_index_matches_pos_to_nl(pos):
+    assert LineIndex(SCRIPT)(pos) == pos_to_nl(SCRIPT, pos)
+
+
+def test_engine_infers_across_blocks():
+    engine = InferenceEngine()
+    prev = "import textwrap as tw"
+    tokens = engine.tokens("tw.dedent('')", {}, prev, infer=True, qa="a.b")
+    assert "".join(t for t, _, _ in tokens).strip() == "tw.dedent('')"
+    refs = {text: ref for text, ref, _ in tokens}
+    assert refs["tw"] == "textwrap"
+    assert refs["dedent"] == "textwrap.dedent"
+    assert refs["("] == ""
+    classes = {text: css for text, _, css in tokens}
+    assert classes["."] == "o"
+    assert classes["'"] == "s1"
+    assert engine.last["qa"] == "a.b"
+    assert engine.last["inferred"] == 2
+    assert engine.totals["blocks"] == 1
+
+
+def test_engine_timings_are_bounded():
+    engine = InferenceEngine()
+    for i in range(engine.SLOWEST + 5):
+        engine.tokens(f"x = {i}", {}, "", infer=False, qa=str(i))
+    assert engine.totals["blocks"] == engine.SLOWEST + 5
+    slowest = engine.slowest
+    assert len(slowest) == engine.SLOWEST
+    seconds = [t["seconds"] for t in slowest]
+    assert seconds == sorted(seconds, reverse=True)
+    engine.reset_timings()
+    assert not engine.totals and not engine.slowest
+
+
+def test_engine_no_inference():
+    engine = InferenceEngine()
+    tokens = engine.tokens("x = 1", {}, "", infer=False)
+    assert all(ref == "" for _, ref, _ in tokens)
+
+
+def test_classes_match_single_pass():
+    engine = InferenceEngine()
+    code = "import numpy as np\nx = np.arange(10) # comment\n"
+    tokens = engine.tokens(code, {}, "", infer=False)
+    assert [css for _, _, css in tokens] == engine.classes(code)
+
+
+def test_static_resolver_matches_jedi():
+    engine = InferenceEngine()
+    prev = "import textwrap as tw\nfrom textwrap import indent"
+    script = "for i in range(2):\n    tw.dedent(indent('é', str(i)))\n"
+    resolved = engine.tokens(script, {}, prev, infer=True, lookup=live_lookup)
+    static = engine.last
+    inferred = engine.tokens(script, {}, prev, infer=True)
+    jedi = engine.last
+    assert resolved == inferred
+    # the loop variable, twice, and the string
+    assert static["inferred"] == 3
+    assert static["resolved"] == jedi["inferred"] - 3
+
+
+def test_static_resolver_bindings():
+    code = "import textwrap\nw = textwrap.TextWrapper()\nw.wrap('')\nf = len\nf = 1"
+    refs = StaticResolver(code, live_lookup).refs
+    assert refs[(0, 7)] == "textwrap"
+    assert refs[(1, 0)] == "textwrap.TextWrapper"
+    assert refs[(2, 0)] == "textwrap.TextWrapper"
+    # attributes of instances and names bound twice are left to jedi.
+    assert (2, 2) not in refs
+    assert (3, 4) in refs
+    assert (3, 0) not in refs
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="no match statement")
+def test_static_resolver_match_bindings():
+    code = (
+        "min, len, str, abs\n"
+        "match []:\n"
+        "    case [*str]:\n"
+        "        pass\n"
+        "    case {**abs}:\n"
+        "        pass\n"
+        "    case len:\n"
+        "        pass\n"
+    )
+    refs = StaticResolver(code, live_lookup).refs
+    assert refs[(0, 0)] == "builtins.min"
+    # names bound by patterns are left to jedi.
+    assert not {(0, 5), (0, 10), (0, 15)} & refs.keys()
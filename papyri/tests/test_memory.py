@@ -0,0 +1,63 @@
+import importlib
+
+from papyri.gen import Gen
+from papyri.memory import SpillDict, current_rss, peak_rss
+from papyri.report import get_report
+
+
+def test_spill_dict_keeps_content_and_order():
+    d = SpillDict()
+    d["b"] = "text"
+    d[("docs", "a.rst")] = "doc"
+    d["c"] = b"bytes"
+    assert d.size == 12
+    assert d.spill() == 12
+    assert d.size == 0 and not d._memory
+    d["a"] = "new"
+    d["b"] = "replaced"
+    assert list(d) == [("docs", "a.rst"), "c", "a", "b"]
+    assert dict(d) == {
+        ("docs", "a.rst"): "doc",
+        "c": b"bytes",
+        "a": "new",
+        "b": "replaced",
+    }
+    del d["c"]
+    assert len(d) == 3
+    d.clear()
+    assert not d and d._dir is None
+
+
+def test_check_memory_spills_buffers():
+    assert 0 < current_rss() <= peak_rss()
+    gen = Gen(dummy_progress=True)
+    gen.put("pkg.f", "{}")
+    gen.put_fig("fig.png", b"data")
+    gen._parse_cache[("ts", "h")] = []
+    gen.check_memory()
+    assert gen.data._memory
+
+    get_report().reset()
+    gen.max_memory = 1
+    gen.check_memory()
+    assert not gen.data._memory and not gen.bdata._memory
+    assert not gen._parse_cache
+    assert get_report().counters["memory_spills"] == 1
+    assert get_report().buffered == 6
+    assert dict(gen.data) == {"pkg.f.json": "{}"}
+
+
+def test_check_memory_bounds_buffers(monkeypatch):
+    # papyri.gen is shadowed by the gen command in papyri/__init__.py
+    monkeypatch.setattr(importlib.import_module("papyri.gen"), "current_rss", lambda: 0)
+    gen = Gen(dummy_progress=True)
+    gen.max_memory = 16
+    gen._parse_cache[("ts", "h")] = []
+    gen.put("pkg.f", "{}")
+    gen.check_memory()
+    assert gen.data._memory
+    # more than a quarter of the limit, but the process is under it.
+    gen.put_fig("fig.png", b"data")
+    gen.check_memory()
+    assert not gen.data._memory and not gen.bdata._memory
+    assert gen._parse_cache
@@ -3,7 +3,8 @@ from textwrap import dedent
 import pytest
 
 from papyri import errors
-from papyri.ts import parse
+from papyri.take2 import compress_word
+from papyri.ts import Node, TSVisitor, parse, parser
 
 
 # @pytest.mark.xfail(strict=True)
@@ -41,3 +42,24 @@ def test_parse_reference():
     [text, reference] = paragraph.children
     assert reference.text == "reference <to this>"
     assert text.value == "This is a "
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Words,  spaces\nand lines ",
+        "A ``literal``, *emphasis*, :func:`role` and `ref`_ é.",
+        "Trailing colons::\n\n    code\n",
+        "Space before a literal ::\n\n    code\n",
+        "**strong** ",
+    ],
+)
+def test_paragraph_fast_path_matches_visit(text):
+    data = text.encode()
+    root = Node(parser.parse(data).root_node)
+    visitor = TSVisitor(data, root)
+    [paragraph] = [c for c in root.children if c.type == "paragraph"]
+    node = paragraph.with_whitespace()
+    assert compress_word(visitor._visit_inline(node)) == compress_word(
+        visitor.visit(node)
+    )
@@ -0,0 +1,72 @@
+import pytest
+
+from papyri.memory import reset_peak_rss
+from papyri.report import GenReport
+
+
+def test_report_totals_and_slowest():
+    report = GenReport()
+    report.add_time("exec", 1.0, "a")
+    report.add_time("exec", 3.0, "b")
+    report.add_time("exec", 2.0, "c")
+    report.add_time("collect", 0.5)
+    with report.phase("exec", "a"):
+        pass
+    report.count("figures", 2)
+
+    summary = report.to_json(top=2)
+    assert list(summary["totals"]) == ["collect", "exec"]
+    assert summary["totals"]["exec"] >= 6.0
+    assert summary["items"] == {"collect": 0, "exec": 3}
+    assert [s["qa"] for s in summary["slowest"]["exec"]] == ["b", "c"]
+    assert "collect" not in summary["slowest"]
+    assert summary["counters"] == {"figures": 2}
+
+
+def test_report_hit_rates():
+    report = GenReport()
+    report.count("parse_cache_hits", 1)
+    report.count("parse_cache_misses", 3)
+    # counted for every lookup, even if none was made.
+    report.count("static_resolver_hits", 0)
+    report.count("static_resolver_misses", 0)
+    assert report.to_json()["hit_rates"] == {"parse_cache": 0.25}
+
+
+def test_report_merge_worker_state():
+    main, worker = GenReport(), GenReport()
+    main.times["exec"]["a"] = 1.0
+    worker.times["exec"]["a"] = 1.0
+    worker.times["exec"]["b"] = 1.0
+    worker.count("items", 2)
+
+    main.memory["exec"] = 100
+    worker.memory["exec"] = 300
+    worker.record_buffered(10)
+    worker.record_buffered(5)
+    with worker.phase("collect"):
+        pass
+
+    main.merge(worker.pop_state())
+    assert main.memory["exec"] == 300
+    assert main.memory["collect"] > 0
+    assert main.buffered == 10
+    assert "collect" in main.to_json()["peak_memory_mb"]
+    assert dict(main.times["exec"]) == {"a": 2.0, "b": 1.0}
+    assert main.counters["items"] == 2
+    assert not worker.times and not worker.counters and not worker.memory
+
+
+def test_phase_memory_is_measured_per_phase():
+    if not reset_peak_rss():
+        pytest.skip("the peak memory of the process can't be reset")
+    report = GenReport()
+    with report.phase("item"):
+        with report.phase("exec"):
+            data = b"x" * 2**26
+            del data
+    with report.phase("write"):
+        pass
+    assert report.memory["exec"] > report.memory["write"] + 2**25
+    # the peak of a phase includes the ones of the phases nested in it.
+    assert report.memory["item"] >= report.memory["exec"]
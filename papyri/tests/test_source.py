@@ -0,0 +1,64 @@
+import importlib
+import inspect
+import sys
+from functools import lru_cache
+
+import pytest
+from IPython.core.oinspect import find_file
+
+from papyri.source import SourceIndex
+
+# papyri.gen is shadowed by the gen command in papyri/__init__.py
+gen = importlib.import_module("papyri.gen")
+
+
+def deco(cls):
+    return cls
+
+
+@deco
+class Outer:
+    class Inner:
+        def method(self):
+            pass
+
+
+def factory():
+    class Local:
+        pass
+
+    return Local
+
+
+@lru_cache
+def cached():
+    pass
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        gen,
+        gen.Gen,
+        gen.Gen.do_one_item,
+        Outer,
+        Outer.Inner,
+        Outer.Inner.method,
+        Outer.Inner().method,
+        factory(),
+        cached,
+    ],
+)
+def test_locate_matches_inspect(obj):
+    line = inspect.getsourcelines(obj)[1]
+    if obj is Outer and sys.version_info < (3, 9):
+        # inspect found the class statement rather than its decorator.
+        line -= 1
+    assert SourceIndex().locate(obj) == (find_file(obj), line)
+
+
+def test_locate_defers_to_inspect():
+    index = SourceIndex()
+    assert index.locate(len) is None
+    assert index.locate(Outer()) is None
+    assert index.locate(property()) is None
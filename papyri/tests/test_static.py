@@ -0,0 +1,98 @@
+import ast
+import importlib
+import sys
+import textwrap
+from types import ModuleType
+
+import pytest
+
+from papyri.gen import DFSCollector
+from papyri.static import StaticCollector, StaticItem, format_signature, static_version
+
+FILES = {
+    "__init__.py": '''
+        """Root docstring."""
+        __version__ = "1.2"
+        from .core import *
+        from . import sub as renamed
+        from .sub import Thing as Alias
+
+        same = Alias
+    ''',
+    "core.py": """
+        __all__ = ["public"]
+
+        def public(a, b=1, *args, c: int = 2, **kwargs) -> int:
+            '''Public.'''
+
+        def not_exported():
+            pass
+    """,
+    "sub.py": """
+        import os
+
+        class Thing:
+            '''A thing.'''
+
+            def __init__(self, x, /, y=None):
+                pass
+
+            @classmethod
+            def build(cls):
+                '''Build.'''
+
+            @property
+            def prop(self):
+                '''Not collected.'''
+
+            class Nested:
+                pass
+    """,
+}
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "staticpkg"
+    root.mkdir()
+    for name, content in FILES.items():
+        (root / name).write_text(textwrap.dedent(content))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "staticpkg"
+    for name in list(sys.modules):
+        if name.split(".")[0] == "staticpkg":
+            del sys.modules[name]
+
+
+def test_static_collection_matches_live(package):
+    collector = StaticCollector(package)
+    items = collector.items()
+    assert "staticpkg" not in sys.modules
+
+    assert isinstance(items["staticpkg"], ModuleType)
+    assert items["staticpkg"].__doc__ == "Root docstring."
+    thing = items["staticpkg.sub.Thing"]
+    assert isinstance(thing, StaticItem)
+    assert thing.__doc__ == "A thing."
+    assert thing.signature == "(x, /, y=None)"
+    if sys.version_info >= (3, 10):
+        build = items["staticpkg.sub.Thing.build"]
+        assert build.item_type == "<class 'classmethod'>"
+    assert collector.paths["staticpkg.same"] == "staticpkg.sub.Thing"
+    assert static_version(package) == "1.2"
+
+    live = DFSCollector(importlib.import_module(package), [])
+    assert sorted(items) == sorted(live.items())
+    assert collector.paths == live.paths
+    assert dict(collector.aliases) == dict(live.aliases)
+
+
+def test_format_signature():
+    def sig(source):
+        node = ast.parse(source).body[0]
+        return format_signature(node.args, node.returns, source=source)
+
+    assert sig("def f(a, b=1, *args, c: int = 2, **kw) -> int: pass") == (
+        "(a, b=1, *args, c: int = 2, **kw) -> int"
+    )
+    assert sig("def f(a, /, b, *, c): pass") == "(a, /, b, *, c)"
@@ -0,0 +1,33 @@
+from types import ModuleType
+
+from papyri.gen import DFSCollector
+from papyri.symbols import SymbolTable
+
+
+def f():
+    pass
+
+
+def test_symbol_table_from_collector():
+    mod = ModuleType("fake")
+    sub = ModuleType("fake.sub")
+    mod.sub = sub
+    f.__module__ = "fake.sub"
+    f.__qualname__ = "f"
+    sub.f = f
+    mod.f = f
+
+    collector = DFSCollector(mod, [])
+    collector.items()
+    table = SymbolTable.from_collector(collector)
+
+    assert table.normalise("fake.f") == "fake.sub.f"
+    assert table.normalise("fake.sub.f") == "fake.sub.f"
+    assert table.normalise("fake") == "fake"
+    assert table.get("other.f") is None
+    assert table.normalise("other.f") == "other.f"
+    assert table.normalise("other.f", lambda ref: "imported") == "imported"
+
+    loaded = SymbolTable.from_json(table.to_json())
+    assert loaded.normalise("fake.f") == "fake.sub.f"
+    assert len(loaded) == len(table)
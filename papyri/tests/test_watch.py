@@ -0,0 +1,47 @@
+import os
+
+from papyri.graphstore import GraphStore, Key
+from papyri.watch import changed_entries, snapshot
+
+
+def test_snapshot_tracks_sources(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "mod.py").write_text("x = 1")
+    (tmp_path / "pkg" / "data.txt").write_text("")
+    (tmp_path / "index.rst").write_text("Title")
+    before = snapshot([tmp_path / "pkg", tmp_path / "index.rst"])
+    assert sorted(before) == [
+        str(tmp_path / "index.rst"),
+        str(tmp_path / "pkg" / "mod.py"),
+    ]
+    os.utime(tmp_path / "pkg" / "mod.py", ns=(0, 0))
+    after = snapshot([tmp_path / "pkg", tmp_path / "index.rst"])
+    assert after[str(tmp_path / "pkg" / "mod.py")] == 0
+    assert after[str(tmp_path / "index.rst")] == before[str(tmp_path / "index.rst")]
+
+
+def test_changed_entries():
+    before = {"a": {"hash": "1"}, "b": {"hash": "2"}, "c": {"hash": "3"}}
+    after = {"a": {"hash": "1"}, "b": {"hash": "4"}, "d": {"hash": "5"}}
+    assert changed_entries(before, after) == ({"b", "d"}, {"c"})
+
+
+def test_change_journal_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / ".papyri" / "ingest").mkdir(parents=True)
+    store = GraphStore(tmp_path)
+    a, b = Key("pkg", "1.0", "module", "pkg.a"), Key("pkg", "1.0", "module", "pkg.b")
+    start, entries = store.changes()
+    assert entries == []
+
+    store.record_changes([a])
+    cursor, entries = store.changes(start)
+    assert entries == [{a}]
+    assert store.changes(cursor) == (cursor, [])
+
+    store.record_changes(None)
+    assert (tmp_path / "changes.jsonl").read_text() == ""
+    cursor, entries = store.changes(cursor)
+    assert entries == [None]
+    store.record_changes([b])
+    assert store.changes(cursor)[1] == [{b}]
@@ -67,7 +67,6 @@ class Node:
         if not self._with_whitespace:
             return [Node(n, _with_whitespace=False) for n in self.node.children]
 
-        self.node.children
         current_byte = self.start_byte
         current_point = self.start_point
         new_nodes = []
@@ -353,8 +352,63 @@ class TSVisitor:
         # print(' '*self.depth*4, b)
         return [b]
 
+    def _visit_inline(self, node):
+        """
+        Same as `visit`, for the children of a paragraph: the runs of text and
+        whitespace are merged in a single `Word`, which `compress_word` would do
+        anyway, instead of visiting and creating a word for each node.
+
+        A trailing single space is kept in its own word, as `visit_paragraph`
+        drops it.
+        """
+        acc: list = []
+        run: List[str] = []
+
+        def flush():
+            if run and run[-1] == " ":
+                if len(run) > 1:
+                    acc.append(Word("".join(run[:-1])))
+                acc.append(Word(" "))
+            elif run:
+                acc.append(Word("".join(run)))
+            run.clear()
+
+        # the gaps between the children are the whitespace nodes of
+        # `Node.children`, without creating them.
+        children = node.node.children
+        current = node.start_byte
+        for n in children:
+            if n.start_byte != current:
+                run.append(" " * len(self.bytes[current : n.start_byte].decode()))
+            current = n.end_byte
+            kind = n.type
+            if kind == "text":
+                run.append(self.bytes[n.start_byte : n.end_byte].decode())
+                continue
+            if kind == "whitespace":
+                content = self.bytes[n.start_byte : n.end_byte].decode()
+                run.append(" " * len(content))
+                continue
+            if kind == "::":
+                if run:
+                    run.append("::")
+                elif acc and isinstance(acc[-1], Word):
+                    acc.append(Word(acc.pop().value + "::"))
+                continue
+            flush()
+            meth = getattr(self, "visit_" + kind, None)
+            if meth is None:
+                raise ValueError(
+                    f"visit_{kind} not found while visiting {node}::\n{self.bytes[n.start_byte: n.end_byte].decode()!r}"
+                )
+            acc.extend(meth(Node(n)))
+        if children and current != node.end_byte:
+            run.append(" " * len(self.bytes[current : node.end_byte].decode()))
+        flush()
+        return acc
+
     def visit_paragraph(self, node, prev_end=None):
-        sub = self.visit(node.with_whitespace())
+        sub = self._visit_inline(node.with_whitespace())
         acc = []
         acc2 = []
 
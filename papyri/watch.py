@@ -0,0 +1,154 @@
+"""
+Regenerate, ingest and serve a package while its sources are edited.
+
+``papyri gen --watch`` generates the bundle of a package and ingests it, then
+polls the python files of the package, the narrative docs and the gallery
+examples for changes. On change the bundle is patched in place, see
+`papyri.gen.Gen.patch_bundle`, reusing every entry whose digest did not
+change; only the entries whose digest changed are then ingested in the
+`GraphStore`, which journals them so that a running ``papyri serve`` drops the
+pages showing them, see `papyri.render.PageCache`.
+
+Each generation runs in a new process, so that the edited modules are imported
+again; the results of the examples are still reused across generations, see
+`papyri.execcache`.
+
+The files are polled rather than watched with inotify: a ``stat`` per file
+every second is negligible next to a generation, and it works the same on all
+platforms and file systems, including network and container mounts.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+import toml
+
+from .bundle import read_bundle
+from .gen import Config, gen_main
+
+SUFFIXES = (".py", ".rst")
+
+
+def watched_paths(root: str, config: Config) -> List[Path]:
+    """
+    Files and folders watched for the package ``root``: the package itself,
+    found without importing it, ``docs_path`` and ``examples_folder``.
+    """
+    paths: List[Path] = []
+    spec = importlib.util.find_spec(root)
+    if spec is not None and spec.submodule_search_locations:
+        paths.extend(Path(p) for p in spec.submodule_search_locations)
+    elif spec is not None and spec.origin is not None:
+        paths.append(Path(spec.origin))
+    for folder in (config.docs_path, config.examples_folder):
+        if folder is not None:
+            paths.append(Path(folder).expanduser())
+    return paths
+
+
+def snapshot(paths: List[Path]) -> Dict[str, int]:
+    """
+    Modification time, in ns, of the python and rst files in ``paths``.
+    """
+    files = {}
+    for path in paths:
+        for p in [path] if path.is_file() else path.rglob("*"):
+            if p.suffix in SUFFIXES:
+                try:
+                    files[str(p)] = p.stat().st_mtime_ns
+                except OSError:
+                    # removed since listed.
+                    continue
+    return files
+
+
+def changed_entries(
+    before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]]
+) -> Tuple[Set[str], Set[str]]:
+    """
+    Keys of the manifest entries added or modified from ``before`` to
+    ``after``, and keys of the removed ones.
+    """
+    changed = {
+        k for k, v in after.items() if k not in before or before[k]["hash"] != v["hash"]
+    }
+    return changed, before.keys() - after.keys()
+
+
+def _generate(target_file: str, kwargs: Dict[str, Any]) -> Path:
+    """
+    Generate the bundle in a worker process, return its location.
+    """
+    g = gen_main(target_file=target_file, **kwargs)
+    return Path("~/.papyri/data").expanduser() / (g.root + "_" + g.version)
+
+
+def _manifest(where: Path) -> Dict[str, Dict[str, Any]]:
+    return json.loads(read_bundle(where).read_text("manifest.json"))
+
+
+def watch(target_file: str, *, interval: float = 1.0, **kwargs) -> None:
+    """
+    Generate and ingest the package of the configuration ``target_file``,
+    then update the bundle and the ingested documents when its sources
+    change, until interrupted.
+
+    Parameters
+    ----------
+    target_file : str
+        configuration file of the package.
+    interval : float
+        seconds between two polls of the sources.
+    **kwargs
+        passed to `papyri.gen.gen_main`; generations after the first one are
+        always incremental, and patch the bundle in place.
+    """
+    from .crosslink import Ingester
+
+    conf = toml.loads(Path(target_file).expanduser().read_text())
+    root = next(iter(conf))
+    paths = watched_paths(root, Config(**conf[root]))
+    context = multiprocessing.get_context("spawn")
+
+    def generate(**extra) -> Path:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            return pool.submit(_generate, target_file, dict(kwargs, **extra)).result()
+
+    files = snapshot(paths)
+    where = generate()
+    Ingester().ingest(where, False)
+    print(f"Watching {len(files)} files for changes, press Ctrl-C to stop")
+    while True:
+        time.sleep(interval)
+        current = snapshot(paths)
+        if current == files:
+            continue
+        # editors often write a file in several steps.
+        time.sleep(interval / 4)
+        current = snapshot(paths)
+        edited = sorted(
+            p for p in files.keys() | current.keys() if files.get(p) != current.get(p)
+        )
+        files = current
+        print(f"{len(edited)} files changed, regenerating:", *edited[:5])
+        start = time.perf_counter()
+        before = _manifest(where)
+        try:
+            where = generate(only="*", incremental=True, resume=False)
+        except Exception as e:
+            # most likely an error in the edited sources, wait for a fix.
+            print(f"Generation failed: {e!r}")
+            continue
+        changed, removed = changed_entries(before, _manifest(where))
+        Ingester().ingest(where, False, changed=changed, removed=removed)
+        print(
+            f"Updated {len(changed)} and removed {len(removed)} entries "
+            f"in {time.perf_counter() - start:.1f}s"
+        )